@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    # Trạng thái của một job chạy nền trong worker hiện tại
+    def __init__(self, kind: str, owner_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner_id = owner_id
+        self.status = "pending"  # pending | running | done | failed
+        self.progress = 0
+        self.total: Optional[int] = None
+        self.detail: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+
+    def advance(self, count: int) -> None:
+        self.progress += count
+        self.updated_at = datetime.now(timezone.utc)
+
+
+class JobRegistry:
+    """Chạy coroutine nền ngoài request và giữ trạng thái để client poll.
+
+    Job chỉ sống trong process: restart worker sẽ mất job đang chạy. Job cần
+    resume sau restart phải tự lưu tiến độ vào DB.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def spawn(
+        self,
+        kind: str,
+        func: Callable[[Job], Awaitable[None]],
+        owner_id: Optional[int] = None,
+    ) -> Job:
+        job = Job(kind, owner_id)
+        self._jobs[job.id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: Job, func: Callable[[Job], Awaitable[None]]) -> None:
+        job.status = "running"
+        try:
+            await func(job)
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.detail = "cancelled"
+            raise
+        except Exception as e:
+            logger.exception("background job %s (%s) failed", job.id, job.kind)
+            job.status = "failed"
+            job.detail = str(e)
+        else:
+            job.status = "done"
+        finally:
+            job.updated_at = datetime.now(timezone.utc)
+
+    def _prune(self) -> None:
+        # Bỏ job đã xong cũ nhất khi vượt giới hạn, không bỏ job đang chạy
+        while len(self._jobs) > self.max_jobs:
+            for job_id, job in self._jobs.items():
+                if job.status in ("done", "failed"):
+                    del self._jobs[job_id]
+                    break
+            else:
+                return
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        tasks = [
+            job.task for job in self._jobs.values() if job.task and not job.task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class PeriodicTask:
+    """Gọi `func` mỗi `interval` giây trong một task nền, hoặc sớm hơn khi có
+    `wake()`. `stop()` chờ lần chạy đang dở rồi gọi `func` lần cuối (dùng để
+    flush buffer khi tắt worker)."""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[None]], interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._loop())
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Đọc cờ trước khi chạy: stop() gọi trong lúc func đang chạy sẽ
+            # được thêm một lần chạy cuối
+            stopping = self._stopping
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("periodic task %s failed", self.name)
+            if stopping:
+                return
+
+    async def stop(self) -> None:
+        # Không cancel giữa chừng: func có thể đang ghi dở một lô
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+
+jobs = JobRegistry()
@@ -0,0 +1,157 @@
+"""Nội dung chương nén và cột nặng deferred: bộ nhớ và số byte gửi đi.
+
+Seed một truyện `--chapters` chương, mỗi chương `--words` từ tiếng Việt
+(~22KB) và `--images` URL ảnh, rồi đo:
+- dung lượng chapters.content: chữ gốc so với bytea nén zlib
+- nạp mọi entity Chapter của truyện: bộ nhớ đỉnh (tracemalloc) và thời gian,
+  cột content/images deferred (hiện tại) so với undefer
+- GET /stories/{id}/chapters (mục lục): số byte và thời gian mỗi request
+- GET /chapters/{id}/content: số byte trên dây và req/s với
+  Accept-Encoding deflate (gửi nguyên bytes nén) so với identity (giải nén)
+
+    BENCH_DATABASE_URL=... python -m benchmarks.chapter_content --chapters 1000
+"""
+
+import argparse
+import asyncio
+import random
+import tracemalloc
+
+from benchmarks.common import Timer, app_client, ms, report
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import undefer
+
+from database import AsyncSessionLocal
+from models import ApproveStatus, Chapter, Group, Story
+
+WORDS = (
+    "anh em chúng ta cùng nhau đi qua cánh rừng tối tăm nơi ma quỷ ẩn nấp "
+    "và chờ đợi người lữ khách lạc đường"
+).split()
+
+
+async def seed(chapters: int, words: int, images: int) -> tuple[int, int]:
+    random.seed(1)
+    async with AsyncSessionLocal() as session:
+        group = Group(name="bench group")
+        story = Story(title="bench story", status=ApproveStatus.APPROVED)
+        session.add_all([group, story])
+        await session.flush()
+        rows = [
+            {
+                "story_id": story.id,
+                "group_id": group.id,
+                "number": number,
+                "title": f"Chương {number}",
+                "status": ApproveStatus.APPROVED,
+                "content": " ".join(random.choices(WORDS, k=words)),
+                "images": "\n".join(
+                    f"https://cdn.example/{number}/{page}.jpg" for page in range(images)
+                ),
+            }
+            for number in range(1, chapters + 1)
+        ]
+        await session.execute(insert(Chapter), rows)
+        await session.commit()
+        raw = sum(len(row["content"].encode()) for row in rows)
+        return story.id, raw
+
+
+async def load_chapters(story_id: int, options: list) -> tuple[str, str]:
+    async with AsyncSessionLocal() as session:
+        tracemalloc.start()
+        with Timer() as timer:
+            result = await session.execute(
+                select(Chapter)
+                .options(*options)
+                .where(Chapter.story_id == story_id)
+                .order_by(Chapter.number)
+            )
+            result.scalars().all()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return f"{peak / 1e6:.1f}MB", ms(timer.elapsed)
+
+
+async def wire_bytes(client, url: str, encoding: str) -> int:
+    async with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as r:
+        assert r.status_code == 200, r.status_code
+        return sum([len(chunk) async for chunk in r.aiter_raw()])
+
+
+async def throughput(client, url: str, headers: dict, rounds: int) -> str:
+    with Timer() as timer:
+        for _ in range(rounds):
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, response.status_code
+    return f"{rounds / timer.elapsed:.0f} req/s"
+
+
+async def main(chapters: int, words: int, images: int, rounds: int):
+    async with app_client() as client:
+        story_id, raw = await seed(chapters, words, images)
+        async with AsyncSessionLocal() as session:
+            stored = await session.scalar(
+                select(func.sum(func.octet_length(Chapter.__table__.c.content)))
+            )
+            chapter_id = await session.scalar(
+                select(Chapter.id)
+                .where(Chapter.story_id == story_id)
+                .order_by(Chapter.number)
+                .offset(chapters // 2)
+                .limit(1)
+            )
+        report(
+            f"chapters.content, {chapters} chapters",
+            ("text", "zlib bytea", "ratio"),
+            [(f"{raw / 1e6:.1f}MB", f"{stored / 1e6:.1f}MB", f"{raw / stored:.1f}x")],
+        )
+        report(
+            "load every Chapter entity of the story",
+            ("columns", "peak memory", "time"),
+            [
+                (
+                    "content/images loaded",
+                    *await load_chapters(
+                        story_id, [undefer(Chapter.content), undefer(Chapter.images)]
+                    ),
+                ),
+                ("deferred", *await load_chapters(story_id, [])),
+            ],
+        )
+        toc_url = f"/stories/{story_id}/chapters"
+        content_url = f"/chapters/{chapter_id}/content"
+        rows = [
+            (
+                "TOC",
+                "identity",
+                f"{await wire_bytes(client, toc_url, 'identity') / 1e3:.1f}KB",
+                await throughput(client, toc_url, {}, rounds),
+            )
+        ]
+        for encoding in ("deflate", "identity"):
+            rows.append(
+                (
+                    "content",
+                    encoding,
+                    f"{await wire_bytes(client, content_url, encoding) / 1e3:.1f}KB",
+                    await throughput(
+                        client, content_url, {"Accept-Encoding": encoding}, rounds
+                    ),
+                )
+            )
+        report(
+            f"read endpoints, {rounds} requests each",
+            ("endpoint", "encoding", "bytes", "throughput"),
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=4000)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.words, args.images, args.rounds))
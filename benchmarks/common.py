@@ -0,0 +1,114 @@
+"""Tiện ích chung cho các benchmark: app chạy trong process, đếm câu SQL,
+in bảng kết quả.
+
+Benchmark cần DB sẽ drop/tạo lại toàn bộ bảng lúc khởi động app, nên chỉ
+chạy trên một database riêng, truyền qua BENCH_DATABASE_URL. Module này phải
+được import trước mọi module của app (database.py đọc DATABASE_URL lúc
+import).
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+if BENCH_DATABASE_URL:
+    os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.environ["DB_RESET_ON_STARTUP"] = "1"
+
+import httpx
+from sqlalchemy import event, text
+
+
+@asynccontextmanager
+async def app_client():
+    # Chạy lifespan của app (tạo bảng, task nền) và trả client gọi thẳng ASGI
+    if not BENCH_DATABASE_URL:
+        raise SystemExit(
+            "BENCH_DATABASE_URL is not set; benchmarks drop and recreate all tables"
+        )
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            yield client
+
+
+class QueryCounter:
+    """Đếm câu SQL chạy trên engine chính trong khối `with`."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        from database import engine
+
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc_info):
+        from database import engine
+
+        event.remove(engine.sync_engine, "before_cursor_execute", self._count)
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+
+
+async def execute(sql: str, **params):
+    # Seed dữ liệu bằng SQL thô, commit ngay
+    from database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text(sql), params)
+        await session.commit()
+        return result
+
+
+async def register(client: httpx.AsyncClient, username: str, admin=False) -> dict:
+    # Tạo user, trả header Authorization
+    password = "password123"
+    await client.post(
+        "/users/register",
+        json={
+            "username": username,
+            "email": f"{username}@bench.io",
+            "password": password,
+        },
+    )
+    if admin:
+        from cache import principal_cache
+
+        await execute("UPDATE users SET role = 'ADMIN' WHERE username = :u", u=username)
+        principal_cache.clear()
+    response = await client.post(
+        "/users/login", data={"username": username, "password": password}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def report(title: str, header: tuple, rows: list[tuple]) -> None:
+    table = [tuple(str(cell) for cell in row) for row in [header, *rows]]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    print(f"\n{title}")
+    for index, row in enumerate(table):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
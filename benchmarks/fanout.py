@@ -0,0 +1,124 @@
+"""Fan-out thông báo chương mới tới follower của truyện và các nhóm dịch.
+
+Seed `--users` user, một truyện và `--groups` nhóm, mỗi nhóm một chương đã
+duyệt. Follower chồng lên nhau: user chia hết cho 2 follow truyện, user chia
+hết cho g + 1 follow nhóm g. Đo fan_out_new_chapter (truyện + một nhóm) và
+fan_out_new_chapters cho cả `--groups` chương (truyện + mọi nhóm): thời gian,
+số câu SQL, và kiểm tra mỗi follower nhận đúng một thông báo, counter khớp.
+
+    BENCH_DATABASE_URL=... python -m benchmarks.fanout --users 100000 --groups 4
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import QueryCounter, Timer, app_client, execute, ms, report
+from background import Job
+from services.notification import (
+    FANOUT_CHUNK_SIZE,
+    fan_out_new_chapter,
+    fan_out_new_chapters,
+)
+
+
+async def seed(users: int, groups: int) -> list:
+    await execute(
+        "INSERT INTO users (username, email, role, status, created_at, updated_at) "
+        "SELECT 'reader' || n, 'reader' || n || '@bench.io', 'USER', 'ACTIVE', "
+        "now(), now() FROM generate_series(1, :users) AS n",
+        users=users,
+    )
+    await execute(
+        "INSERT INTO stories (title, status, created_at, updated_at) "
+        "VALUES ('fan-out story', 'APPROVED', now(), now())"
+    )
+    await execute(
+        "INSERT INTO groups (name, created_at, updated_at) "
+        "SELECT 'group ' || g, now(), now() FROM generate_series(1, :groups) AS g",
+        groups=groups,
+    )
+    await execute(
+        "INSERT INTO chapters (story_id, group_id, number, status, created_at, "
+        "updated_at) SELECT stories.id, groups.id, groups.id, 'APPROVED', now(), "
+        "now() FROM stories CROSS JOIN groups"
+    )
+    await execute(
+        "INSERT INTO follows (user_id, story_id, created_at) "
+        "SELECT users.id, stories.id, now() FROM users CROSS JOIN stories "
+        "WHERE users.id % 2 = 0"
+    )
+    await execute(
+        "INSERT INTO follows (user_id, group_id, created_at) "
+        "SELECT users.id, groups.id, now() FROM users CROSS JOIN groups "
+        "WHERE users.id % (groups.id + 1) = 0"
+    )
+    await execute("ANALYZE follows")
+    result = await execute("SELECT id, group_id FROM chapters ORDER BY id")
+    return result.all()
+
+
+async def expected_followers(group_ids: list[int]) -> int:
+    result = await execute(
+        "SELECT count(DISTINCT user_id) FROM follows "
+        "WHERE story_id IS NOT NULL OR group_id = ANY(:group_ids)",
+        group_ids=group_ids,
+    )
+    return result.scalar_one()
+
+
+async def run(label: str, fan_out, chapter_ids: list[int], groups: list[int]):
+    await execute("TRUNCATE notifications, notification_counters")
+    expected = await expected_followers(groups)
+    with QueryCounter() as queries, Timer() as timer:
+        await fan_out(Job("bench"), chapter_ids)
+    row = (
+        await execute(
+            "SELECT count(*) AS sent, count(DISTINCT user_id) AS users, "
+            "(SELECT coalesce(sum(unread), 0) FROM notification_counters) "
+            "AS unread FROM notifications"
+        )
+    ).one()
+    no_duplicates = row.sent == row.users == row.unread
+    return (
+        label,
+        expected,
+        row.sent,
+        "ok" if no_duplicates and row.sent == expected else "MISMATCH",
+        ms(timer.elapsed),
+        queries.count,
+    )
+
+
+async def main(users: int, groups: int):
+    async with app_client():
+        chapters = await seed(users, groups)
+        chapter_ids = [chapter.id for chapter in chapters]
+        group_ids = [chapter.group_id for chapter in chapters]
+        follows = (await execute("SELECT count(*) FROM follows")).scalar_one()
+        rows = [
+            await run(
+                "1 chapter",
+                lambda job, ids: fan_out_new_chapter(job, ids[0]),
+                chapter_ids[:1],
+                group_ids[:1],
+            ),
+            await run(
+                f"{groups} chapters",
+                fan_out_new_chapters,
+                chapter_ids,
+                group_ids,
+            ),
+        ]
+    report(
+        f"{users} users, {follows} follows, chunk {FANOUT_CHUNK_SIZE}",
+        ("fan-out", "followers", "sent", "unique", "time", "statements"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--groups", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.groups))
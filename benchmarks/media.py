@@ -0,0 +1,70 @@
+"""Phục vụ ảnh trang từ blob store qua GET /media/<hash>.<ext>.
+
+Ghi `--pages` blob ngẫu nhiên cỡ `--size` byte vào MEDIA_ROOT tạm, rồi đo
+số request/giây khi `--concurrency` client đọc lần lượt cả chương:
+- FileResponse mặc định (đọc 64KB mỗi lượt thread pool)
+- BlobFileResponse (1MB mỗi lượt, hiện tại)
+- 304 khi If-None-Match khớp ETag
+- Range 64KB đầu (206)
+
+    BENCH_DATABASE_URL=... python -m benchmarks.media --pages 40 --size 600000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("MEDIA_ROOT", tempfile.mkdtemp(prefix="bench-media-"))
+
+from benchmarks.common import Timer, app_client, report
+from fastapi.responses import FileResponse
+
+import routers.media
+from storage import blob_store
+
+
+async def run(client, urls: list[str], concurrency: int, headers=None) -> str:
+    async def reader():
+        for url in urls:
+            response = await client.get(url, headers=headers)
+            assert response.status_code in (200, 206, 304), response.status_code
+
+    with Timer() as timer:
+        await asyncio.gather(*(reader() for _ in range(concurrency)))
+    return f"{len(urls) * concurrency / timer.elapsed:.0f} req/s"
+
+
+async def main(pages: int, size: int, concurrency: int):
+    digests = [(await blob_store.put(os.urandom(size)))[0] for _ in range(pages)]
+    urls = [f"/media/{digest}.jpg" for digest in digests]
+    async with app_client() as client:
+        blob_response = routers.media.BlobFileResponse
+        routers.media.BlobFileResponse = FileResponse
+        try:
+            default_chunks = await run(client, urls, concurrency)
+        finally:
+            routers.media.BlobFileResponse = blob_response
+        rows = [
+            ("200, 64KB chunks", default_chunks),
+            ("200, 1MB chunks", await run(client, urls, concurrency)),
+            ("304", await run(client, urls, concurrency, {"If-None-Match": "*"})),
+            (
+                "206 Range 64KB",
+                await run(client, urls, concurrency, {"Range": "bytes=0-65535"}),
+            ),
+        ]
+    report(
+        f"{pages} pages of {size} bytes, {concurrency} concurrent readers",
+        ("response", "throughput"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--size", type=int, default=600000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.size, args.concurrency))
@@ -0,0 +1,97 @@
+"""Badge chưa đọc và đánh dấu đã đọc với bộ đếm notification_counters.
+
+Seed `--notifications` thông báo chưa đọc cho một user (cùng `--others`
+user khác để bảng không chỉ có một user), rồi so:
+- badge: COUNT(*) trên notifications so với get_unread_count (một lần đọc
+  theo khóa chính)
+- mark all read: một câu UPDATE ... RETURNING cập nhật cả bộ đếm
+
+    BENCH_DATABASE_URL=... python -m benchmarks.notifications --notifications 100000
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import QueryCounter, Timer, app_client, execute, ms, report
+from sqlalchemy import func, select
+
+from database import AsyncSessionLocal
+from models import Notification, User
+from services.notification import get_unread_count, mark_notifications_read
+
+
+async def count_unread(session, user_id: int) -> int:
+    # Baseline: đếm thẳng trên bảng notifications
+    return await session.scalar(
+        select(func.count()).where(
+            Notification.user_id == user_id, Notification.is_read.is_(False)
+        )
+    )
+
+
+async def measure(badge, user_id: int, rounds: int) -> tuple[str, int]:
+    async with AsyncSessionLocal() as session:
+        value = await badge(session, user_id)
+        with Timer() as timer:
+            for _ in range(rounds):
+                await badge(session, user_id)
+    return ms(timer.elapsed / rounds), value
+
+
+async def main(notifications: int, others: int, rounds: int):
+    async with app_client():
+        await execute(
+            "INSERT INTO users (username, email, role, status, created_at, updated_at) "
+            "SELECT 'reader' || n, 'reader' || n || '@bench.io', 'USER', 'ACTIVE', "
+            "now(), now() FROM generate_series(0, :others) AS n",
+            others=others,
+        )
+        await execute(
+            "INSERT INTO notifications (user_id, type, content, is_read, created_at) "
+            "SELECT users.id, 'NEW_CHAPTER', 'chương mới', false, now() "
+            "FROM users CROSS JOIN generate_series(1, :per_user) "
+            "WHERE users.username <> 'reader0'",
+            per_user=max(1, notifications // max(others, 1)),
+        )
+        await execute(
+            "INSERT INTO notifications (user_id, type, content, is_read, created_at) "
+            "SELECT users.id, 'NEW_CHAPTER', 'chương mới', false, now() "
+            "FROM users CROSS JOIN generate_series(1, :n) "
+            "WHERE users.username = 'reader0'",
+            n=notifications,
+        )
+        await execute(
+            "INSERT INTO notification_counters (user_id, unread) "
+            "SELECT user_id, count(*) FROM notifications GROUP BY user_id"
+        )
+        await execute("ANALYZE notifications")
+        async with AsyncSessionLocal() as session:
+            user_id = await session.scalar(
+                select(User.id).where(User.username == "reader0")
+            )
+        rows = [
+            ("COUNT(*)", *await measure(count_unread, user_id, rounds)),
+            ("counter", *await measure(get_unread_count, user_id, rounds)),
+        ]
+        report(
+            f"unread badge, {notifications} unread",
+            ("badge", "per read", "value"),
+            rows,
+        )
+        async with AsyncSessionLocal() as session:
+            with QueryCounter() as queries, Timer() as timer:
+                marked, unread = await mark_notifications_read(session, user_id)
+        report(
+            "mark all read",
+            ("marked", "unread after", "statements", "time"),
+            [(marked, unread, queries.count, ms(timer.elapsed))],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--others", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.notifications, args.others, args.rounds))
@@ -0,0 +1,86 @@
+"""Độ trễ event loop khi nhiều request login cùng lúc.
+
+Đo độ trễ tối đa/p99 của một task ngủ 5ms mỗi vòng (đại diện cho các
+request khác trong cùng worker) trong lúc `--logins` request login sai mật
+khẩu chạy đồng thời: bcrypt trong thread pool (hiện tại) so với bcrypt chạy
+thẳng trên event loop.
+
+    BENCH_DATABASE_URL=... python -m benchmarks.password_hash --logins 20
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import contextmanager
+
+from benchmarks.common import Timer, app_client, ms, register, report
+import services.user
+
+PROBE_INTERVAL = 0.005
+
+
+@contextmanager
+def inline_hashing():
+    # Baseline: passlib chạy trên event loop như trước khi có thread pool
+    original = services.user._run_password_job
+
+    async def run_inline(func, *args):
+        return func(*args)
+
+    services.user._run_password_job = run_inline
+    try:
+        yield
+    finally:
+        services.user._run_password_job = original
+
+
+async def _probe(lags: list[float], done: asyncio.Event):
+    while not done.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def run(client, logins: int):
+    lags: list[float] = []
+    done = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, done))
+    with Timer() as timer:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/users/login",
+                    data={"username": "bench_user", "password": "wrong-password"},
+                )
+                for _ in range(logins)
+            )
+        )
+    done.set()
+    await probe
+    lags.sort()
+    statuses = sorted({response.status_code for response in responses})
+    return (
+        ms(timer.elapsed),
+        ms(lags[-1]),
+        ms(lags[int(len(lags) * 0.99)]),
+        statuses,
+    )
+
+
+async def main(logins: int):
+    async with app_client() as client:
+        await register(client, "bench_user")
+        with inline_hashing():
+            inline = await run(client, logins)
+        pooled = await run(client, logins)
+    report(
+        f"{logins} concurrent failed logins",
+        ("bcrypt", "total", "max loop lag", "p99 loop lag", "statuses"),
+        [("inline", *inline), ("thread pool", *pooled)],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=20)
+    asyncio.run(main(parser.parse_args().logins))
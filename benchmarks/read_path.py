@@ -0,0 +1,78 @@
+"""Read path chiếu cột + orjson so với ORM + Pydantic cho danh sách group.
+
+Mỗi vòng mở session mới, đọc `--limit` group và serialize thành body JSON
+như route trả về (bỏ qua response cache để đo đúng phần DB + serialize):
+- orm: select(Group), GroupRead.model_validate, JSONResponse
+- projected: list_groups_read (chỉ các cột GroupRead), FastJSONResponse
+
+    BENCH_DATABASE_URL=... python -m benchmarks.read_path --groups 500 --limit 100
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import Timer, app_client, execute, ms, report
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from database import AsyncSessionLocal
+from models import Group
+from responses import FastJSONResponse
+from schemas.group import GroupRead
+from services.group import list_groups_read
+
+
+async def orm_page(limit: int) -> bytes:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Group)
+            .options(undefer(Group.description))
+            .order_by(Group.id)
+            .limit(limit)
+        )
+        groups = [GroupRead.model_validate(group) for group in result.scalars()]
+    return JSONResponse(jsonable_encoder(groups)).body
+
+
+async def projected_page(limit: int) -> bytes:
+    async with AsyncSessionLocal() as session:
+        groups = await list_groups_read(session, limit=limit)
+    return FastJSONResponse(groups).body
+
+
+async def measure(page, limit: int, rounds: int) -> tuple[str, str, int]:
+    await page(limit)
+    with Timer() as timer:
+        for _ in range(rounds):
+            body = await page(limit)
+    return ms(timer.elapsed / rounds), f"{rounds / timer.elapsed:.0f}/s", len(body)
+
+
+async def main(groups: int, limit: int, rounds: int):
+    async with app_client():
+        await execute(
+            "INSERT INTO groups (name, description, avatar, created_at, updated_at) "
+            "SELECT 'group ' || n, repeat('mô tả nhóm ', 20), 'avatar.png', now(), now() "
+            "FROM generate_series(1, :groups) AS n",
+            groups=groups,
+        )
+        rows = [
+            ("orm", *await measure(orm_page, limit, rounds)),
+            ("projected", *await measure(projected_page, limit, rounds)),
+        ]
+    report(
+        f"GET /groups, {limit} rows per page",
+        ("path", "per page", "throughput", "body bytes"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.groups, args.limit, args.rounds))
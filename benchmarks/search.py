@@ -0,0 +1,144 @@
+"""Tìm truyện (GET /stories/search) trên một kho truyện giả lập.
+
+Seed `--stories` truyện đã duyệt, mỗi truyện tối đa 3 tag trong 30 tag:
+- title: "story <n> <một trong 10 từ chung> w<n % 5000>": từ w<k> khớp
+  khoảng stories/5000 truyện (chọn lọc), từ chung khớp 10%
+- author: một trong 5 họ, mỗi họ khớp 20% (rộng)
+Đo thời gian mỗi request và số câu SQL cho truy vấn chọn lọc, rộng, lọc tag
+(kèm facet), không lọc; rồi đi theo next_cursor `--pages` trang với truy vấn
+rộng và danh sách mới nhất để xem trang sâu có chậm đi không.
+
+    BENCH_DATABASE_URL=... python -m benchmarks.search --stories 200000
+"""
+
+import argparse
+import asyncio
+from urllib.parse import quote
+
+from benchmarks.common import QueryCounter, Timer, app_client, execute, ms, report
+
+WORDS = (
+    "dragon",
+    "sword",
+    "school",
+    "magic",
+    "king",
+    "ghost",
+    "ninja",
+    "love",
+    "robot",
+    "hero",
+)
+AUTHORS = ("nguyen", "tran", "le", "pham", "hoang")
+TAGS = 30
+
+
+async def seed(stories: int):
+    await execute(
+        "INSERT INTO stories (title, author, description, status, created_at, "
+        "updated_at) SELECT 'story ' || n || ' ' "
+        "|| (CAST(:words AS text[]))[n % 10 + 1] || ' w' || n % 5000, "
+        "(CAST(:authors AS text[]))[n % 5 + 1], 'description ' || md5(n::text), "
+        "'APPROVED', now() - n * interval '1 minute', now() "
+        "FROM generate_series(1, :stories) AS n",
+        words=list(WORDS),
+        authors=list(AUTHORS),
+        stories=stories,
+    )
+    await execute(
+        "INSERT INTO tags (name) SELECT 'tag' || t FROM generate_series(1, :tags) t",
+        tags=TAGS,
+    )
+    await execute(
+        "INSERT INTO story_tags (story_id, tag_id) "
+        "SELECT DISTINCT stories.id, tags.id FROM stories "
+        "CROSS JOIN LATERAL (VALUES (stories.id % :tags), "
+        "(stories.id / 7 % :tags), (stories.id / 53 % :tags)) AS picked(k) "
+        "JOIN tags ON tags.name = 'tag' || (picked.k + 1)",
+        tags=TAGS,
+    )
+    await execute(
+        "UPDATE stories SET tags = joined.names FROM ("
+        "SELECT story_tags.story_id, string_agg(tags.name, ', ') AS names "
+        "FROM story_tags JOIN tags ON tags.id = story_tags.tag_id "
+        "GROUP BY story_tags.story_id) AS joined WHERE joined.story_id = stories.id"
+    )
+    await execute("ANALYZE stories")
+    await execute("ANALYZE story_tags")
+
+
+async def measure(client, params: str, rounds: int) -> tuple:
+    url = f"/stories/search?{params}"
+    page = (await client.get(url)).json()
+    with QueryCounter() as queries, Timer() as timer:
+        for _ in range(rounds):
+            response = await client.get(url)
+            assert response.status_code == 200, response.text
+    return (
+        params or "(no filter)",
+        len(page["items"]),
+        len(page["facets"] or []),
+        ms(timer.elapsed / rounds),
+        queries.count // rounds,
+    )
+
+
+async def walk(client, params: str, pages: int) -> tuple:
+    # Đi theo next_cursor, ghi thời gian trang đầu và trang cuối
+    cursor, times = None, []
+    for _ in range(pages):
+        url = f"/stories/search?{params}" + (
+            f"&cursor={quote(cursor)}" if cursor else ""
+        )
+        with Timer() as timer:
+            response = await client.get(url)
+        times.append(timer.elapsed)
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    return (
+        params or "(no filter)",
+        len(times),
+        ms(times[0]),
+        ms(sum(times) / len(times)),
+        ms(times[-1]),
+    )
+
+
+async def main(stories: int, rounds: int, pages: int):
+    async with app_client() as client:
+        await seed(stories)
+        queries = [
+            "q=w42",
+            "q=w42%20school",
+            "q=nguyen",
+            "q=dragon",
+            "tag=tag1",
+            "tag=tag1&tag=tag8",
+            "q=nguyen&tag=tag1&tag=tag8",
+            "",
+        ]
+        rows = [await measure(client, params, rounds) for params in queries]
+        report(
+            f"{stories} stories, first page of 20",
+            ("query", "items", "facets", "per request", "statements"),
+            rows,
+        )
+        walks = [
+            await walk(client, params, pages)
+            for params in ("limit=20", "q=nguyen&limit=20", "tag=tag1&limit=20")
+        ]
+        report(
+            f"cursor walk, up to {pages} pages",
+            ("query", "pages", "first", "mean", "last"),
+            walks,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.stories, args.rounds, args.pages))
@@ -0,0 +1,79 @@
+"""Thundering herd: N request giống nhau cùng lúc, cache nguội.
+
+So số câu SQL phát ra với số request được phục vụ, khi có và khi tắt
+single-flight (mỗi request tự tải), cho GET /groups/{id} và
+GET /users/by-username/{username}.
+
+    BENCH_DATABASE_URL=... python -m benchmarks.singleflight --n 100 1000
+"""
+
+import argparse
+import asyncio
+from contextlib import contextmanager
+
+from benchmarks.common import QueryCounter, Timer, app_client, ms, register, report
+from response_cache import response_cache
+from services.group import group_reads
+from services.user import user_reads
+
+
+@contextmanager
+def uncoalesced(flight):
+    # Baseline: mỗi caller chạy hàm tải của mình, không chờ chung
+    flight.do = lambda key, load: load()
+    try:
+        yield
+    finally:
+        del flight.do
+
+
+async def herd(client, flight, n: int, path: str, headers: dict):
+    response_cache.clear()
+    flight.forget_if(lambda key: True)
+    with QueryCounter() as queries, Timer() as timer:
+        responses = await asyncio.gather(
+            *(client.get(path, headers=headers) for _ in range(n))
+        )
+    assert all(response.status_code == 200 for response in responses)
+    return queries.count, timer.elapsed
+
+
+async def main(sizes: list[int]):
+    async with app_client() as client:
+        headers = await register(client, "bench_admin", admin=True)
+        group = await client.post("/groups/", json={"name": "bench"}, headers=headers)
+        targets = [
+            ("group", group_reads, f"/groups/{group.json()['id']}"),
+            ("user", user_reads, "/users/by-username/bench_admin"),
+        ]
+        # Nạp sẵn principal của token để chỉ đo lookup
+        await client.get("/users/by-username/bench_admin", headers=headers)
+        rows = []
+        for name, flight, path in targets:
+            for n in sizes:
+                with uncoalesced(flight):
+                    base_queries, base_time = await herd(
+                        client, flight, n, path, headers
+                    )
+                queries, elapsed = await herd(client, flight, n, path, headers)
+                rows.append(
+                    (
+                        name,
+                        n,
+                        base_queries,
+                        ms(base_time),
+                        queries,
+                        ms(elapsed),
+                    )
+                )
+        report(
+            "thundering herd (cold cache)",
+            ("lookup", "requests", "queries", "time", "coalesced", "time"),
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, nargs="+", default=[100, 1000])
+    asyncio.run(main(parser.parse_args().n))
@@ -0,0 +1,74 @@
+"""Chi phí của trending tăng dần: ghi sự kiện, flush, refresh top-K, đọc.
+
+Ghi `--events` sự kiện rải trên `--stories` truyện vào buffer, flush xuống
+story_trending, refresh top-K rồi đo GET /stories/trending qua ASGI.
+
+    BENCH_DATABASE_URL=... python -m benchmarks.trending --stories 10000 --events 200000
+"""
+
+import argparse
+import asyncio
+import random
+
+from benchmarks.common import (
+    QueryCounter,
+    Timer,
+    app_client,
+    execute,
+    ms,
+    report,
+)
+from services.trending import (
+    flush_trending_buffer,
+    record_story_event,
+    refresh_trending_top,
+    trending_task,
+)
+
+
+async def main(stories: int, events: int, rounds: int):
+    async with app_client() as client:
+        # Chỉ đo các bước gọi tay, không để chu kỳ nền chen vào
+        await trending_task.stop()
+        await execute(
+            "INSERT INTO stories (title, status, created_at, updated_at) "
+            "SELECT 'story ' || n, 'APPROVED', now(), now() "
+            "FROM generate_series(1, :stories) AS n",
+            stories=stories,
+        )
+        story_ids = [random.randint(1, stories) for _ in range(events)]
+        kinds = random.choices(["view", "comment", "follow"], k=events)
+        rows = []
+        with Timer() as timer:
+            for story_id, kind in zip(story_ids, kinds):
+                record_story_event(story_id, kind)
+        rows.append(
+            ("record_story_event", f"{timer.elapsed / events * 1e6:.1f}us/event", "-")
+        )
+        with QueryCounter() as queries, Timer() as timer:
+            await flush_trending_buffer()
+        rows.append(("flush buffer", ms(timer.elapsed), queries.count))
+        with QueryCounter() as queries, Timer() as timer:
+            await refresh_trending_top()
+        rows.append(("refresh top-K", ms(timer.elapsed), queries.count))
+        with QueryCounter() as queries, Timer() as timer:
+            for _ in range(rounds):
+                response = await client.get("/stories/trending?window=day")
+                assert response.status_code == 200
+        rows.append(
+            ("GET /stories/trending", ms(timer.elapsed / rounds), queries.count)
+        )
+    report(
+        f"{events} events over {stories} stories",
+        ("step", "time", "statements"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.stories, args.events, args.rounds))
@@ -0,0 +1,73 @@
+"""Tạo variant WebP cho trang truyện: một process so với process pool.
+
+Sinh `--pages` ảnh JPEG `--width`x`--height` (nhiễu + gradient để encoder
+phải làm việc thật), rồi đo số trang/giây của imaging.render_variants với
+VARIANT_WIDTHS, chạy tuần tự trong process hiện tại và qua
+ProcessPoolExecutor IMAGE_WORKERS process như services.variant. Không cần DB.
+
+    python -m benchmarks.variants --pages 24
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from benchmarks.common import Timer, report
+import imaging
+from services.variant import IMAGE_WORKERS, VARIANT_QUALITY, VARIANT_WIDTHS
+
+
+def make_pages(directory: str, pages: int, width: int, height: int) -> list[str]:
+    gradient = Image.linear_gradient("L").resize((width, height))
+    paths = []
+    for index in range(pages):
+        noise = Image.effect_noise((width, height), 40 + index)
+        image = Image.merge("RGB", (gradient, noise, gradient.rotate(180)))
+        path = os.path.join(directory, f"page-{index}.jpg")
+        image.save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+def render(path: str):
+    return imaging.render_variants(path, list(VARIANT_WIDTHS), VARIANT_QUALITY)
+
+
+def main(pages: int, width: int, height: int):
+    with tempfile.TemporaryDirectory(prefix="bench-variants-") as directory:
+        paths = make_pages(directory, pages, width, height)
+        with Timer() as serial:
+            for path in paths:
+                render(path)
+        with ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            # Khởi động process con trước khi đo
+            list(executor.map(render, paths[:IMAGE_WORKERS]))
+            with Timer() as pooled:
+                list(executor.map(render, paths))
+    report(
+        f"{pages} pages {width}x{height}, widths {VARIANT_WIDTHS}",
+        ("runner", "time", "pages/s"),
+        [
+            ("1 process", f"{serial.elapsed:.2f}s", f"{pages / serial.elapsed:.1f}"),
+            (
+                f"pool x{IMAGE_WORKERS}",
+                f"{pooled.elapsed:.2f}s",
+                f"{pages / pooled.elapsed:.1f}",
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=2400)
+    args = parser.parse_args()
+    main(args.pages, args.width, args.height)
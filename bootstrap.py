@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import os
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum as SAEnum,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+logger = logging.getLogger(__name__)
+
+# Chỉ dùng khi dev: drop toàn bộ bảng rồi tạo lại mỗi lần khởi động
+_TRUTHY = ("1", "true", "yes")
+DB_RESET_ON_STARTUP = os.getenv("DB_RESET_ON_STARTUP", "0").lower() in _TRUTHY
+# Key của Postgres advisory lock, để chỉ một worker chạy DDL tại một thời điểm
+SCHEMA_LOCK_KEY = 0x6D616E6761
+
+# Chạy một lần, ngay sau khi cột được thêm vào bảng đã có dữ liệu, để bộ đếm
+# khớp với dữ liệu cũ. Theo thứ tự: story_id của bình luận chương phải có
+# trước khi đếm bình luận của truyện.
+COLUMN_BACKFILLS = (
+    (
+        ("stories", "comment_count"),
+        "UPDATE comments SET story_id = chapters.story_id FROM chapters "
+        "WHERE comments.chapter_id = chapters.id AND comments.story_id IS NULL",
+    ),
+    (
+        ("stories", "comment_count"),
+        "UPDATE stories SET comment_count = counts.n "
+        "FROM (SELECT story_id, count(*) AS n FROM comments "
+        "WHERE story_id IS NOT NULL GROUP BY story_id) AS counts "
+        "WHERE stories.id = counts.story_id",
+    ),
+    (
+        ("chapters", "comment_count"),
+        "UPDATE chapters SET comment_count = counts.n "
+        "FROM (SELECT chapter_id, count(*) AS n FROM comments "
+        "WHERE chapter_id IS NOT NULL GROUP BY chapter_id) AS counts "
+        "WHERE chapters.id = counts.chapter_id",
+    ),
+)
+# Index cũ đã được thay thế trong models
+DROPPED_INDEXES = ("ix_stories_created_at_id",)
+
+# Bảng lưu fingerprint nằm ngoài Base.metadata để không ảnh hưởng fingerprint
+_bootstrap_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _bootstrap_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def metadata_fingerprint(metadata: MetaData) -> str:
+    # Hash của DDL (bảng, index, giá trị enum) mà metadata sinh ra cho Postgres
+    dialect = postgresql.dialect()
+    parts = []
+    for table in metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            parts.append(str(CreateIndex(index).compile(dialect=dialect)))
+        for column in table.columns:
+            if isinstance(column.type, SAEnum):
+                parts.append(f"{column.type.name}: {','.join(column.type.enums)}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def _current_fingerprint(conn: AsyncConnection) -> str | None:
+    exists = await conn.scalar(select(func.to_regclass(schema_version.name)))
+    if exists is None:
+        return None
+    return await conn.scalar(
+        select(schema_version.c.fingerprint).where(schema_version.c.id == 1)
+    )
+
+
+def _column_types(sync_conn) -> dict[tuple[str, str], str]:
+    result = sync_conn.execute(
+        text(
+            "SELECT table_name, column_name, data_type "
+            "FROM information_schema.columns WHERE table_schema = current_schema()"
+        )
+    )
+    return {(row.table_name, row.column_name): row.data_type for row in result}
+
+
+def _add_missing_columns(sync_conn, metadata: MetaData) -> set[tuple[str, str]]:
+    # Cột mới trên bảng đã có: ADD COLUMN theo đúng định nghĩa trong models
+    # (kiểu, default, NOT NULL, cột generated), kèm FK nếu có
+    existing = _column_types(sync_conn)
+    preparer = sync_conn.dialect.identifier_preparer
+    added = set()
+    for table in metadata.sorted_tables:
+        for column in table.columns:
+            if (table.name, column.name) in existing:
+                continue
+            ddl = str(CreateColumn(column).compile(dialect=sync_conn.dialect))
+            for fk in column.foreign_keys:
+                ddl += (
+                    f" REFERENCES {preparer.format_table(fk.column.table)} "
+                    f"({preparer.format_column(fk.column)})"
+                )
+                if fk.ondelete:
+                    ddl += f" ON DELETE {fk.ondelete}"
+            logger.info("adding column %s.%s", table.name, column.name)
+            sync_conn.execute(
+                text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN IF NOT EXISTS {ddl}"
+                )
+            )
+            added.add((table.name, column.name))
+    return added
+
+
+def _check_chapter_content(sync_conn) -> None:
+    # chapters.content đổi từ text sang bytea nén zlib (models.CompressedText).
+    # Nén trong transaction khởi động sẽ giữ advisory lock và chặn mọi worker
+    # suốt lúc viết lại cả bảng, nên việc này chỉ làm bằng lệnh riêng (commit
+    # theo chunk); app không khởi động khi cột còn là text.
+    if _column_types(sync_conn).get(("chapters", "content")) == "text":
+        logger.error(
+            "chapters.content is still text; run `python -m services.chapter_content`"
+            " before starting the app"
+        )
+        raise RuntimeError("chapters.content has not been compressed")
+
+
+def _create_missing(sync_conn, metadata: MetaData) -> None:
+    # create_all chỉ tạo bảng còn thiếu; cột mới trên bảng cũ được ADD COLUMN
+    # và backfill, rồi mới tới index (index có thể dùng cột vừa thêm)
+    _check_chapter_content(sync_conn)
+    metadata.create_all(sync_conn, checkfirst=True)
+    added = _add_missing_columns(sync_conn, metadata)
+    for column, statement in COLUMN_BACKFILLS:
+        if column in added:
+            sync_conn.execute(text(statement))
+    for name in DROPPED_INDEXES:
+        sync_conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def bootstrap_schema(engine: AsyncEngine, metadata: MetaData) -> None:
+    fingerprint = metadata_fingerprint(metadata)
+    if not DB_RESET_ON_STARTUP:
+        # Fast path: schema đã khớp thì không cần lock, không chạy DDL
+        async with engine.connect() as conn:
+            if await _current_fingerprint(conn) == fingerprint:
+                return
+
+    async with engine.begin() as conn:
+        await conn.execute(select(func.pg_advisory_xact_lock(SCHEMA_LOCK_KEY)))
+        if DB_RESET_ON_STARTUP:
+            logger.warning("DB_RESET_ON_STARTUP is set: dropping all tables")
+            await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+        else:
+            # Worker khác có thể đã migrate xong trong lúc chờ lock
+            current = await _current_fingerprint(conn)
+            if current == fingerprint:
+                return
+            logger.info(
+                "schema fingerprint changed (%s -> %s), creating missing tables, "
+                "columns and indexes",
+                current,
+                fingerprint,
+            )
+            await conn.run_sync(_create_missing, metadata)
+        await conn.run_sync(_bootstrap_metadata.create_all)
+        stmt = pg_insert(schema_version).values(id=1, fingerprint=fingerprint)
+        await conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[schema_version.c.id],
+                set_={"fingerprint": fingerprint, "applied_at": func.now()},
+            )
+        )
@@ -1,18 +1,59 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from models import Base
+import background
+from bootstrap import bootstrap_schema
 from database import engine
-from routers import user, group
+from cache import principal_cache
+from metrics import SQLMetricsMiddleware, register_cache
+from response_cache import response_cache
+from routers import (
+    user,
+    group,
+    story,
+    chapter,
+    comment,
+    notification,
+    reading,
+    donation,
+    media,
+    moderation,
+    jobs,
+    metrics,
+)
+from services.group import group_reads
+from services.notification_stream import notification_hub
+from services.reading import reading_flusher
+from services.story import story_details
+from services.toc import toc_cache
+from services.trending import refresh_trending_top, trending_task
+from services.user import shutdown_password_hasher, user_reads
+from services.user_purge import user_purge_task
+from services.variant import shutdown_image_workers, variant_cache
 
 from contextlib import asynccontextmanager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    await bootstrap_schema(engine, Base.metadata)
+    await notification_hub.start()
+    reading_flusher.start()
+    await refresh_trending_top()
+    trending_task.start()
+    # Chạy tiếp các job xóa/ẩn danh user còn dở từ lần chạy trước
+    user_purge_task.start()
+    user_purge_task.wake()
     yield
+    await notification_hub.stop()
+    # Flush nốt tiến độ đọc/lượt xem còn trong buffer trước khi đóng; lượt xem
+    # đổ tiếp vào buffer trending nên trending dừng sau
+    await reading_flusher.stop()
+    await trending_task.stop()
+    await user_purge_task.stop()
+    await background.jobs.shutdown()
+    shutdown_password_hasher()
+    shutdown_image_workers()
 
 
 app = FastAPI(
@@ -30,9 +71,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(SQLMetricsMiddleware)
+register_cache("principal", principal_cache)
+register_cache("image_variants", variant_cache)
+register_cache("story_toc", toc_cache)
+register_cache("story_detail", story_details)
+register_cache("group_reads", group_reads)
+register_cache("user_reads", user_reads)
+register_cache("responses", response_cache)
 
 app.include_router(user.router)
 app.include_router(group.router)
+app.include_router(story.router)
+app.include_router(chapter.router)
+app.include_router(comment.router)
+app.include_router(notification.router)
+app.include_router(reading.router)
+app.include_router(donation.router)
+app.include_router(media.router)
+app.include_router(moderation.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
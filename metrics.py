@@ -0,0 +1,235 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 = tắt slow-query log
+
+slow_query_logger = logging.getLogger("sql.slow")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [
+        f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Iterable[float],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = sorted(buckets)
+        self.labelnames = labelnames
+        # labels -> [số lần rơi vào từng bucket (+Inf ở cuối), sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class SlowestQueryGauge:
+    # Câu SQL chậm nhất từng thấy cho mỗi route template
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._slowest: dict[str, tuple[float, str]] = {}
+
+    def observe(self, route: str, duration: float, statement: str) -> None:
+        current = self._slowest.get(route)
+        if current is None or duration > current[0]:
+            self._slowest[route] = (duration, statement[:200])
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        for route, (duration, statement) in sorted(self._slowest.items()):
+            labels = _format_labels(("route", "statement"), (route, statement))
+            lines.append(f"{self.name}{labels} {duration}")
+        return lines
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    LATENCY_BUCKETS,
+    ("method", "route"),
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed per request.",
+    QUERY_COUNT_BUCKETS,
+    ("method", "route"),
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements per request.",
+    LATENCY_BUCKETS,
+    ("method", "route"),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Latency of individual SQL statements.",
+    LATENCY_BUCKETS,
+)
+db_slowest_query = SlowestQueryGauge(
+    "db_slowest_query_seconds",
+    "Slowest SQL statement observed per route template.",
+)
+
+_metrics = [
+    http_request_duration,
+    db_queries_per_request,
+    db_time_per_request,
+    db_query_duration,
+    db_slowest_query,
+]
+_caches: dict[str, object] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    # Xuất hits/misses/evictions/size của một TTLCache trên /metrics
+    _caches[name] = cache
+
+
+def _render_caches() -> list[str]:
+    stats = {name: cache.stats() for name, cache in sorted(_caches.items())}
+    lines = []
+    for key, kind in (
+        ("hits", "counter"),
+        ("misses", "counter"),
+        ("evictions", "counter"),
+        ("size", "gauge"),
+    ):
+        name = f"cache_{key}_total" if kind == "counter" else f"cache_{key}"
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, cache_stats in stats.items():
+            lines.append(f'{name}{{cache="{cache_name}"}} {cache_stats[key]}')
+    return lines
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_render_caches())
+    return "\n".join(lines) + "\n"
+
+
+# --------------- SQL instrumentation ---------------
+class RequestQueryStats:
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = ""
+
+
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._query_started_at
+    db_query_duration.observe(duration)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total += duration
+        if duration > stats.slowest:
+            stats.slowest = duration
+            stats.slowest_statement = statement
+    if SLOW_QUERY_MS and duration * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "slow query (%.1f ms): %s", duration * 1000, statement
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLMetricsMiddleware:
+    """ASGI middleware ghi số query, tổng thời gian DB và câu chậm nhất theo
+    route template (ví dụ "/groups/{group_id}", không phải path thực)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestQueryStats()
+        token = _request_stats.set(stats)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            template = route.path if route is not None else "<unmatched>"
+            method = scope["method"]
+            http_request_duration.observe(
+                time.perf_counter() - started_at, method, template
+            )
+            db_queries_per_request.observe(stats.count, method, template)
+            db_time_per_request.observe(stats.total, method, template)
+            if stats.count:
+                db_slowest_query.observe(
+                    template, stats.slowest, stats.slowest_statement
+                )
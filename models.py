@@ -5,13 +5,23 @@ from sqlalchemy import (
     ForeignKey,
     String,
     Integer,
+    LargeBinary,
+    literal,
+    text,
     Boolean,
+    Computed,
+    Date,
     DateTime,
     Enum as SAEnum,
+    Index,
     Text,
+    UniqueConstraint,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator
 import enum
-from datetime import datetime, timezone
+import zlib
+from datetime import date, datetime, timezone
 
 
 class UserRole(enum.Enum):
@@ -38,6 +48,13 @@ class ApproveStatus(enum.Enum):
     REJECTED = "rejected"
 
 
+def status_is(column, value: ApproveStatus):
+    # Giá trị được render thẳng vào SQL thay vì bind param: planner chỉ dùng
+    # được index partial theo status (vd. ix_stories_pending_created_id) khi
+    # thấy hằng số, kể cả với prepared statement của asyncpg
+    return column == literal(value, column.type, literal_execute=True)
+
+
 class NotificationType(enum.Enum):
     NEW_STORY = "new_story"
     NEW_CHAPTER = "new_chapter"
@@ -46,6 +63,28 @@ class NotificationType(enum.Enum):
     OTHER = "other"
 
 
+class CompressedText(TypeDecorator):
+    """Text lưu dạng bytea nén zlib, nén/giải nén tự động khi ghi/đọc.
+
+    Dữ liệu trong DB là định dạng zlib chuẩn, trùng với content-coding
+    "deflate" của HTTP nên có thể gửi thẳng cho client không cần giải nén.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+    level = 6
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), self.level)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.decompress(value).decode("utf-8")
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -98,9 +137,16 @@ class User(Base):
 # --------------- Group ---------------
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        # Phân trang keyset GET /groups theo (created_at, id)
+        Index("ix_groups_created_at_id", "created_at", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True)
-    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Cột nặng không load mặc định; entity cần trả về thì undefer()
+    description: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_raiseload=True
+    )
     avatar: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
@@ -141,14 +187,52 @@ class Group(Base):
 # --------------- Story ---------------
 class Story(Base):
     __tablename__ = "stories"
+    __table_args__ = (
+        Index("ix_stories_search_vector", "search_vector", postgresql_using="gin"),
+        # Tìm kiếm không có từ khóa: truyện đã duyệt mới nhất trước, keyset
+        # (created_at, id); truyện chờ/bị từ chối không nằm trong index
+        Index(
+            "ix_stories_approved_created_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'APPROVED'"),
+        ),
+        # Hàng đợi kiểm duyệt: truyện chờ duyệt, cũ nhất trước
+        Index(
+            "ix_stories_pending_created_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(255), index=True)
-    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    description: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_raiseload=True
+    )
+    # Bản hiển thị của tag, nguồn chuẩn là bảng tags/story_tags
     tags: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     author: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # Full-text search: Postgres tự tính lại khi title/author/description đổi
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     status: Mapped[ApproveStatus] = mapped_column(
         SAEnum(ApproveStatus), default=ApproveStatus.PENDING
     )
+    # Cộng dồn theo lô từ services.reading, có thể trễ vài giây
+    view_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Số bình luận của truyện, gồm cả bình luận trong các chương (services.comment)
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Tăng mỗi khi mục lục (chương đã duyệt) đổi; cache mục lục so với số này
+    chapter_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
@@ -173,6 +257,30 @@ class Story(Base):
     donates: Mapped[List["Donate"]] = relationship(
         back_populates="story", cascade="all, delete-orphan"
     )
+    story_tags: Mapped[List["StoryTag"]] = relationship(
+        back_populates="story", cascade="all, delete-orphan"
+    )
+
+
+# --------------- Tag ---------------
+class Tag(Base):
+    __tablename__ = "tags"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(50), unique=True)
+
+
+# --------------- StoryTag (N-N story <-> tag) ---------------
+class StoryTag(Base):
+    __tablename__ = "story_tags"
+    __table_args__ = (
+        # Lọc truyện theo tag: tag_id -> story_id
+        Index("ix_story_tags_tag_story", "tag_id", "story_id"),
+    )
+    story_id: Mapped[int] = mapped_column(ForeignKey("stories.id"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(ForeignKey("tags.id"), primary_key=True)
+
+    story: Mapped["Story"] = relationship(back_populates="story_tags")
+    tag: Mapped["Tag"] = relationship()
 
 
 # --------------- GroupStory (N-N group <-> story) ---------------
@@ -192,16 +300,36 @@ class GroupStory(Base):
 # --------------- Chapter ---------------
 class Chapter(Base):
     __tablename__ = "chapters"
+    __table_args__ = (
+        # Mục lục và chương trước/sau của một truyện theo số chương
+        Index("ix_chapters_story_number", "story_id", "number"),
+        # Hàng đợi kiểm duyệt: chương chờ duyệt, cũ nhất trước
+        Index(
+            "ix_chapters_pending_created_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     story_id: Mapped[int] = mapped_column(ForeignKey("stories.id"))
     group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"))
     number: Mapped[int] = mapped_column(Integer)
     title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    images: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Nội dung chữ nén zlib; chỉ endpoint đọc chương lấy ra (xem
+    # services.chapter_content)
+    content: Mapped[Optional[str]] = mapped_column(
+        CompressedText, nullable=True, deferred=True, deferred_raiseload=True
+    )
+    # Danh sách ảnh dạng text cũ; trang ảnh mới nằm trong chapter_pages
+    images: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_raiseload=True
+    )
     status: Mapped[ApproveStatus] = mapped_column(
         SAEnum(ApproveStatus), default=ApproveStatus.PENDING
     )
+    view_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
@@ -216,11 +344,87 @@ class Chapter(Base):
     comments: Mapped[List["Comment"]] = relationship(
         back_populates="chapter", cascade="all, delete-orphan"
     )
+    pages: Mapped[List["ChapterPage"]] = relationship(
+        back_populates="chapter",
+        cascade="all, delete-orphan",
+        order_by="ChapterPage.number",
+    )
+
+
+# --------------- ChapterPage ---------------
+# Manifest trang của chương: thứ tự trang và blob ảnh (storage.blob_store)
+class ChapterPage(Base):
+    __tablename__ = "chapter_pages"
+    __table_args__ = (
+        UniqueConstraint("chapter_id", "number", name="uq_chapter_pages_number"),
+        Index("ix_chapter_pages_blob_hash", "blob_hash"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    chapter_id: Mapped[int] = mapped_column(
+        ForeignKey("chapters.id", ondelete="CASCADE")
+    )
+    number: Mapped[int] = mapped_column(Integer)
+    # sha256 hex của nội dung ảnh, cũng là tên file trong blob store
+    blob_hash: Mapped[str] = mapped_column(String(64))
+    content_type: Mapped[str] = mapped_column(String(50))
+    size: Mapped[int] = mapped_column(Integer)
+    width: Mapped[int] = mapped_column(Integer)
+    height: Mapped[int] = mapped_column(Integer)
+
+    chapter: Mapped["Chapter"] = relationship(back_populates="pages")
+    # Ảnh thu nhỏ của blob trang này (theo hash nên dùng chung giữa các chương)
+    variants: Mapped[List["ImageVariant"]] = relationship(
+        primaryjoin="foreign(ImageVariant.source_hash) == ChapterPage.blob_hash",
+        order_by="ImageVariant.width",
+        viewonly=True,
+    )
+
+
+# --------------- ImageVariant ---------------
+# Bản resize (WebP) của một blob ảnh theo từng chiều rộng, do services.variant
+# tạo. Khóa theo hash ảnh gốc: cùng ảnh thì dùng chung variant.
+class ImageVariant(Base):
+    __tablename__ = "image_variants"
+    source_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    width: Mapped[int] = mapped_column(Integer, primary_key=True)
+    height: Mapped[int] = mapped_column(Integer)
+    blob_hash: Mapped[str] = mapped_column(String(64))
+    content_type: Mapped[str] = mapped_column(String(50))
+    size: Mapped[int] = mapped_column(Integer)
 
 
 # --------------- Comment ---------------
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Bình luận gốc theo đối tượng, mới nhất trước, keyset (created_at, id).
+        # Bình luận chương có cả story_id nên index truyện bỏ qua chúng.
+        Index(
+            "ix_comments_story_created_id",
+            "story_id",
+            "created_at",
+            "id",
+            postgresql_where=text("parent_id IS NULL AND chapter_id IS NULL"),
+        ),
+        Index(
+            "ix_comments_chapter_created_id",
+            "chapter_id",
+            "created_at",
+            "id",
+            postgresql_where=text("parent_id IS NULL"),
+        ),
+        Index(
+            "ix_comments_group_created_id",
+            "group_id",
+            "created_at",
+            "id",
+            postgresql_where=text("parent_id IS NULL"),
+        ),
+        # Trả lời của một bình luận, cũ nhất trước
+        Index("ix_comments_parent_created_id", "parent_id", "created_at", "id"),
+        # Chuyển bình luận của user bị xóa theo chunk (services.user_purge)
+        Index("ix_comments_user_id", "user_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     story_id: Mapped[Optional[int]] = mapped_column(
@@ -232,7 +436,12 @@ class Comment(Base):
     chapter_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("chapters.id"), nullable=True
     )
+    # Trả lời chỉ một cấp: parent luôn là bình luận gốc, cùng đối tượng với nó
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("comments.id", ondelete="CASCADE"), nullable=True
+    )
     content: Mapped[str] = mapped_column(Text)
+    reply_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
@@ -251,6 +460,21 @@ class Comment(Base):
 # --------------- Follow ---------------
 class Follow(Base):
     __tablename__ = "follows"
+    __table_args__ = (
+        # Fan-out thông báo: quét follower theo thứ tự user_id
+        Index("ix_follows_story_user", "story_id", "user_id"),
+        Index("ix_follows_group_user", "group_id", "user_id"),
+        # Mỗi user follow một truyện một lần; cũng dùng để tra trạng thái follow
+        Index(
+            "uq_follows_user_story",
+            "user_id",
+            "story_id",
+            unique=True,
+            postgresql_where=text("story_id IS NOT NULL"),
+        ),
+        # Xóa mọi follow (truyện và group) của user theo chunk
+        Index("ix_follows_user_id", "user_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     story_id: Mapped[Optional[int]] = mapped_column(
@@ -271,6 +495,17 @@ class Follow(Base):
 # --------------- Notification ---------------
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Danh sách thông báo của user, keyset theo id giảm dần
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Partial index chỉ chứa thông báo chưa đọc
+        Index(
+            "ix_notifications_user_unread",
+            "user_id",
+            "id",
+            postgresql_where=text("NOT is_read"),
+        ),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     type: Mapped[NotificationType] = mapped_column(
@@ -286,9 +521,81 @@ class Notification(Base):
     user: Mapped["User"] = relationship(back_populates="notifications")
 
 
+# --------------- NotificationCounter ---------------
+# Số thông báo chưa đọc của mỗi user, cập nhật cùng transaction với
+# insert/đánh dấu đã đọc để badge chỉ là một lần đọc theo khóa chính
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+
+# --------------- ReadingProgress ---------------
+# Vị trí đọc gần nhất của user trong mỗi truyện, ghi theo lô từ services.reading
+class ReadingProgress(Base):
+    __tablename__ = "reading_progress"
+    __table_args__ = (
+        # "Đọc tiếp": truyện user đọc gần đây nhất
+        Index("ix_reading_progress_user_updated", "user_id", "updated_at"),
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    story_id: Mapped[int] = mapped_column(
+        ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True
+    )
+    chapter_id: Mapped[int] = mapped_column(
+        ForeignKey("chapters.id", ondelete="CASCADE")
+    )
+    page: Mapped[int] = mapped_column(Integer, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+# --------------- StoryTrending ---------------
+# Điểm trending của truyện, cập nhật dần theo sự kiện (services.trending).
+# score_day/score_week là log của tổng có suy giảm theo thời gian (forward
+# decay), chỉ dùng để so sánh giữa các truyện; score_all là tổng không suy giảm
+class StoryTrending(Base):
+    __tablename__ = "story_trending"
+    __table_args__ = (
+        Index("ix_story_trending_day", "score_day"),
+        Index("ix_story_trending_week", "score_week"),
+        Index("ix_story_trending_all", "score_all"),
+    )
+    story_id: Mapped[int] = mapped_column(
+        ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True
+    )
+    score_day: Mapped[float] = mapped_column(Float)
+    score_week: Mapped[float] = mapped_column(Float)
+    score_all: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+# --------------- TrendingSnapshot ---------------
+# Ảnh chụp top-K định kỳ của từng cửa sổ thời gian, để xem lại lịch sử bảng xếp hạng
+class TrendingSnapshot(Base):
+    __tablename__ = "trending_snapshots"
+    __table_args__ = (
+        Index("ix_trending_snapshots_period_taken", "period", "taken_at"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # "day" | "week" | "all" (WINDOW là từ khóa SQL nên không đặt tên cột vậy)
+    period: Mapped[str] = mapped_column(String(10))
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    rank: Mapped[int] = mapped_column(Integer)
+    story_id: Mapped[int] = mapped_column(ForeignKey("stories.id", ondelete="CASCADE"))
+    score: Mapped[float] = mapped_column(Float)
+
+
 # --------------- Donate ---------------
 class Donate(Base):
     __tablename__ = "donates"
+    __table_args__ = (
+        # Chuyển donate của user bị xóa theo chunk (services.user_purge)
+        Index("ix_donates_user_id", "user_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     group_id: Mapped[Optional[int]] = mapped_column(
@@ -306,3 +613,85 @@ class Donate(Base):
     user: Mapped["User"] = relationship(back_populates="donates")
     group: Mapped[Optional["Group"]] = relationship(back_populates="donates")
     story: Mapped[Optional["Story"]] = relationship(back_populates="donates")
+
+
+# --------------- Donation rollups ---------------
+# Tổng donate cộng dồn trong cùng transaction với insert vào donates
+# (services.donation), để bảng xếp hạng không phải SUM cả bảng donates.
+# Dòng có day = ALL_TIME_DAY là tổng mọi thời gian của scope đó.
+ALL_TIME_DAY = date(1970, 1, 1)
+
+
+class DonationDailyTotal(Base):
+    __tablename__ = "donation_daily_totals"
+    # scope: "group" | "story"
+    scope: Mapped[str] = mapped_column(String(10), primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, default=0)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DonorDailyTotal(Base):
+    __tablename__ = "donor_daily_totals"
+    __table_args__ = (
+        # Top donor mọi thời gian: đọc theo index, dừng sau `limit` dòng
+        Index(
+            "ix_donor_daily_totals_scope_day_total",
+            "scope",
+            "scope_id",
+            "day",
+            "total",
+        ),
+        Index("ix_donor_daily_totals_user", "user_id"),
+    )
+    # scope: "group" | "story" | "site" (scope_id = 0)
+    scope: Mapped[str] = mapped_column(String(10), primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    total: Mapped[float] = mapped_column(Float, default=0)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+# --------------- UserPurgeJob ---------------
+# Job xóa/ẩn danh user chạy nền theo chunk (services.user_purge). Lưu trong DB
+# để chạy tiếp sau khi restart; không có FK vì dòng job sống lâu hơn user.
+class UserPurgeJob(Base):
+    __tablename__ = "user_purge_jobs"
+    __table_args__ = (
+        # Mỗi user tối đa một job đang chờ/chạy
+        Index(
+            "uq_user_purge_jobs_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    # "delete" | "anonymize"
+    action: Mapped[str] = mapped_column(String(10))
+    # pending | running | done | failed, như background.Job
+    status: Mapped[str] = mapped_column(String(10), default="pending")
+    # Bước đang chạy; chạy lại từ bước này khi resume
+    step: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
+    progress: Mapped[int] = mapped_column(Integer, default=0)
+    detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    requested_by: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Worker đang giữ job gia hạn lease sau mỗi chunk; lease hết hạn (worker
+    # chết) thì worker khác nhận chạy tiếp
+    lease_token: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    lease_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CURSOR_SECRET_KEY = os.getenv("CURSOR_SECRET_KEY", "YOUR_SECRET")
+MAX_PAGE_SIZE = 100
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes, scope: str) -> bytes:
+    return hmac.new(
+        CURSOR_SECRET_KEY.encode(), scope.encode() + b"|" + payload, hashlib.sha256
+    ).digest()[:16]
+
+
+def encode_cursor(sort_value: Any, row_id: int, scope: str = "") -> str:
+    # Cursor mờ (opaque) dạng "<payload>.<chữ ký>", payload là (sort_key, id)
+    if isinstance(sort_value, datetime):
+        value = ["dt", sort_value.isoformat()]
+    else:
+        value = ["v", sort_value]
+    payload = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload, scope))}"
+
+
+def decode_cursor(cursor: str, scope: str = "") -> tuple[Any, int]:
+    try:
+        raw_payload, raw_signature = cursor.split(".", 1)
+        payload = _b64decode(raw_payload)
+        if not hmac.compare_digest(_b64decode(raw_signature), _sign(payload, scope)):
+            raise ValueError("bad signature")
+        (kind, value), row_id = json.loads(payload)
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+async def paginate_keyset(
+    session: AsyncSession,
+    stmt: Select,
+    *,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    scope: str = "",
+    scalars: bool = True,
+    sort_key: Optional[Callable[[Any], Any]] = None,
+) -> tuple[list, Optional[str]]:
+    """Phân trang keyset theo (sort_column, id_column).
+
+    sort_column phải NOT NULL và nên có index tổng hợp (sort_column, id)
+    để trang sâu tốn ngang trang đầu. `scope` được ký cùng cursor để cursor
+    của route/kiểu sắp xếp này không dùng được cho route khác. Trả về
+    (items, next_cursor); next_cursor là None khi đã hết dữ liệu.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, scope)
+        key = tuple_(sort_column, id_column)
+        stmt = stmt.where(
+            key < (sort_value, last_id) if descending else key > (sort_value, last_id)
+        )
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+    result = await session.execute(stmt.limit(limit + 1))
+    items = list(result.scalars().all() if scalars else result.all())
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        if sort_key is None:
+            sort_value = getattr(last, sort_column.key)
+        else:
+            sort_value = sort_key(last)
+        next_cursor = encode_cursor(sort_value, getattr(last, id_column.key), scope)
+    return items, next_cursor
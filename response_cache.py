@@ -0,0 +1,85 @@
+"""Cache response JSON đã serialize cho các GET công khai, kèm ETag.
+
+Entry giữ sẵn body và ETag (tính từ id/updated_at của các dòng trong
+response), nên request trùng key trả 200 hoặc 304 (If-None-Match khớp) mà
+không query DB hay serialize lại. Service ghi dữ liệu phải invalidate key
+liên quan sau commit; cache nằm riêng trong từng worker nên `ttl` giới hạn
+độ cũ với thay đổi đến từ worker khác.
+"""
+
+import hashlib
+import os
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from cache import TTLCache
+from responses import FastJSONResponse
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def version_etag(*parts: Any) -> str:
+    # parts: các giá trị xác định nội dung response, vd (id, updated_at) mỗi dòng
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+class ResponseCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        # Tăng mỗi lần invalidate: response tải xong sau một lần invalidate
+        # (có thể đã đọc dữ liệu cũ) không được đưa vào cache
+        self._generation = 0
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self._generation += 1
+        super().invalidate(*keys)
+
+    def invalidate_if(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        self._generation += 1
+        super().invalidate_if(predicate)
+
+    def clear(self) -> None:
+        self._generation += 1
+        super().clear()
+
+    async def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        load: Callable[[], Awaitable[Optional[tuple[Any, str]]]],
+    ) -> Optional[Response]:
+        """Response JSON cho `key`; `load` trả (payload, etag) hoặc None (không
+        tìm thấy, không cache) khi cache chưa có."""
+        entry = self.get(key)
+        if entry is None:
+            generation = self._generation
+            loaded = await load()
+            if loaded is None:
+                return None
+            payload, etag = loaded
+            entry = CachedResponse(FastJSONResponse(payload).body, etag)
+            if generation == self._generation:
+                self.set(key, entry)
+        # no-cache: client/proxy được giữ bản sao nhưng phải hỏi lại (304)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "2000")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "30")),
+)
@@ -0,0 +1,21 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import FileResponse, JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    # Serialize bằng orjson cho các read path trả dict/row trực tiếp (bỏ qua
+    # validate Pydantic). OPT_UTC_Z để datetime giống output của Pydantic ("Z").
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        )
+
+
+class BlobFileResponse(FileResponse):
+    # Mặc định FileResponse đọc 64KB mỗi lần, mỗi lần một lượt qua thread pool;
+    # trang truyện thường < 1MB nên đọc 1MB một lần gửi xong trong một lượt
+    chunk_size = 1024 * 1024
@@ -0,0 +1,88 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_read_db
+from models import User
+from schemas.chapter import (
+    ChapterApproveResult,
+    ChapterCreate,
+    ChapterPageRead,
+    ChapterRead,
+)
+from security import get_current_user, get_read_user_optional
+from services.chapter import approve_chapter, create_chapter, get_chapter_by_id
+from services.chapter_content import (
+    accepts_deflate,
+    get_compressed_content,
+    iter_decompressed,
+)
+from services.page import list_chapter_pages, replace_chapter_pages
+
+router = APIRouter(prefix="/chapters", tags=["chapters"])
+
+
+@router.post("/", response_model=ChapterRead)
+async def create_chapter_api(
+    chapter_in: ChapterCreate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await create_chapter(session, chapter_in, current_user)
+
+
+@router.post("/{chapter_id}/approve", response_model=ChapterApproveResult)
+async def approve_chapter_api(
+    chapter_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    chapter, job = await approve_chapter(session, chapter_id, current_user)
+    return {"chapter": chapter, "fanout_job": job}
+
+
+@router.get("/{chapter_id}/content", response_class=Response)
+async def read_chapter_content_api(
+    chapter_id: int,
+    accept_encoding: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    found, data = await get_compressed_content(session, chapter_id, current_user)
+    if not found:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    media_type = "text/plain; charset=utf-8"
+    headers = {"Vary": "Accept-Encoding"}
+    if data is None:
+        return Response(b"", media_type=media_type, headers=headers)
+    if accepts_deflate(accept_encoding):
+        # Bytes trong DB đã là zlib ("deflate" của HTTP): gửi nguyên
+        headers["Content-Encoding"] = "deflate"
+        return Response(data, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        iter_decompressed(data), media_type=media_type, headers=headers
+    )
+
+
+@router.get("/{chapter_id}/pages", response_model=list[ChapterPageRead])
+async def list_chapter_pages_api(
+    chapter_id: int,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    return await list_chapter_pages(session, chapter_id, current_user)
+
+
+@router.put("/{chapter_id}/pages", response_model=list[ChapterPageRead])
+async def replace_chapter_pages_api(
+    chapter_id: int,
+    files: list[UploadFile] = File(...),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    chapter = await get_chapter_by_id(session, chapter_id)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    return await replace_chapter_pages(session, chapter, files, current_user)
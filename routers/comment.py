@@ -0,0 +1,105 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_read_db
+from models import User
+from schemas.comment import CommentCreate, CommentRead, CommentUpdate
+from schemas.common import CursorPage
+from security import get_current_user, get_read_user_optional
+from services.comment import (
+    create_comment,
+    delete_comment,
+    get_comment,
+    list_comments,
+    list_replies,
+    update_comment,
+)
+
+router = APIRouter(prefix="/comments", tags=["comments"])
+
+
+@router.post("/", response_model=CommentRead)
+async def create_comment_api(
+    comment_in: CommentCreate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await create_comment(session, comment_in, current_user)
+
+
+@router.get("/", response_model=CursorPage[CommentRead])
+async def list_comments_api(
+    story_id: Optional[int] = None,
+    chapter_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    targets = {
+        target: target_id
+        for target, target_id in (
+            ("story", story_id),
+            ("chapter", chapter_id),
+            ("group", group_id),
+        )
+        if target_id is not None
+    }
+    if len(targets) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Exactly one of story_id, chapter_id or group_id is required",
+        )
+    [(target, target_id)] = targets.items()
+    items, next_cursor = await list_comments(
+        session,
+        target,
+        target_id,
+        limit=limit,
+        cursor=cursor,
+        current_user=current_user,
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{comment_id}/replies", response_model=CursorPage[CommentRead])
+async def list_replies_api(
+    comment_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    items, next_cursor = await list_replies(
+        session, comment_id, limit=limit, cursor=cursor, current_user=current_user
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.put("/{comment_id}", response_model=CommentRead)
+async def update_comment_api(
+    comment_id: int,
+    comment_in: CommentUpdate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    comment = await get_comment(session, comment_id)
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return await update_comment(session, comment, comment_in, current_user)
+
+
+@router.delete("/{comment_id}")
+async def delete_comment_api(
+    comment_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    comment = await get_comment(session, comment_id)
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    await delete_comment(session, comment, current_user)
+    return {"detail": "Comment deleted"}
@@ -0,0 +1,56 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_read_db
+from models import User
+from responses import FastJSONResponse
+from schemas.donation import (
+    DonationCreate,
+    DonationRead,
+    DonationTotals,
+    LeaderboardEntry,
+)
+from security import get_current_user
+from services.donation import (
+    create_donation,
+    get_donation_totals,
+    get_donor_leaderboard,
+)
+
+router = APIRouter(prefix="/donations", tags=["donations"])
+
+
+@router.post("/", response_model=DonationRead)
+async def create_donation_api(
+    donation_in: DonationCreate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await create_donation(session, donation_in, current_user)
+
+
+@router.get("/leaderboard", response_model=list[LeaderboardEntry])
+async def donor_leaderboard_api(
+    scope: Literal["group", "story", "site"],
+    scope_id: int = 0,
+    period: Literal["day", "week", "month", "all"] = "month",
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_read_db),
+):
+    # Top donor của group/story/toàn site, đọc từ bảng rollup
+    rows = await get_donor_leaderboard(session, scope, scope_id, period, limit)
+    return FastJSONResponse(rows)
+
+
+@router.get("/totals", response_model=DonationTotals)
+async def donation_totals_api(
+    scope: Literal["group", "story"],
+    scope_id: int,
+    days: int = Query(30, ge=1, le=366),
+    session: AsyncSession = Depends(get_read_db),
+):
+    return FastJSONResponse(
+        await get_donation_totals(session, scope, scope_id, days=days)
+    )
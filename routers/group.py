@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_db, get_read_db
 from models import User, UserRole
+from response_cache import response_cache
 from routers.user import get_current_user
-from schemas.group import GroupCreate, GroupRead, GroupUpdate
+from schemas.common import CursorPage
+from schemas.group import (
+    GroupCreate,
+    GroupMemberResult,
+    GroupMembersUpdate,
+    GroupRead,
+    GroupUpdate,
+)
 from services.group import (
+    bulk_update_members,
     create_group,
     get_group_by_id,
-    list_groups,
+    get_group_read,
+    groups_etag,
+    list_groups_read,
+    list_groups_read_page,
     update_group,
     delete_group,
 )
@@ -29,36 +42,92 @@ async def create_group_api(
     return group
 
 
-@router.get("/", response_model=list[GroupRead])
+@router.get("/", response_model=list[GroupRead] | CursorPage[GroupRead])
 async def list_groups_api(
-    skip: int = 0, limit: int = 20, session: AsyncSession = Depends(get_db)
+    request: Request,
+    skip: int = 0,
+    limit: int = 20,
+    paging: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    sort: Literal["created_at", "name"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    session: AsyncSession = Depends(get_read_db),
 ):
-    return await list_groups(session, skip=skip, limit=limit)
+    # paging=offset giữ nguyên hành vi cũ (list), paging=cursor trả về envelope
+    # {items, next_cursor}; trang sâu tốn ngang trang đầu
+    if paging == "offset" and cursor is None:
+
+        async def load():
+            groups = await list_groups_read(session, skip=skip, limit=limit)
+            return groups, groups_etag(groups)
+
+        key = ("groups", "offset", skip, limit)
+    else:
+
+        async def load():
+            items, next_cursor = await list_groups_read_page(
+                session,
+                limit=limit,
+                cursor=cursor,
+                sort=sort,
+                descending=order == "desc",
+            )
+            page = {"items": items, "next_cursor": next_cursor}
+            return page, groups_etag(items, next_cursor)
+
+        key = ("groups", "cursor", limit, cursor, sort, order)
+    return await response_cache.respond(request, key, load)
 
 
 @router.get("/{group_id}", response_model=GroupRead)
-async def get_group_api(group_id: int, session: AsyncSession = Depends(get_db)):
-    group = await get_group_by_id(session, group_id)
-    if not group:
+async def get_group_api(
+    group_id: int, request: Request, session: AsyncSession = Depends(get_read_db)
+):
+    async def load():
+        group = await get_group_read(session, group_id)
+        return (group, groups_etag([group])) if group else None
+
+    response = await response_cache.respond(request, ("group", group_id), load)
+    if response is None:
         raise HTTPException(status_code=404, detail="Group not found")
-    return group
+    return response
 
 
 @router.put("/{group_id}", response_model=GroupRead)
 async def update_group_api(
-    group_id: int, group_in: GroupUpdate, session: AsyncSession = Depends(get_db)
+    group_id: int,
+    group_in: GroupUpdate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
     group = await get_group_by_id(session, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
-    updated_group = await update_group(session, group, group_in)
+    updated_group = await update_group(session, group, group_in, current_user)
     return updated_group
 
 
 @router.delete("/{group_id}")
-async def delete_group_api(group_id: int, session: AsyncSession = Depends(get_db)):
+async def delete_group_api(
+    group_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     group = await get_group_by_id(session, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
-    await delete_group(session, group)
+    await delete_group(session, group, current_user)
     return {"detail": "Group deleted"}
+
+
+@router.post("/{group_id}/members/bulk", response_model=list[GroupMemberResult])
+async def bulk_update_members_api(
+    group_id: int,
+    change: GroupMembersUpdate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    group = await get_group_by_id(session, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return await bulk_update_members(session, group, change, current_user)
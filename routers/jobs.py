@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from background import jobs
+from models import User, UserRole
+from schemas.job import JobRead
+from security import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job_api(job_id: str, current_user: User = Depends(get_current_user)):
+    job = jobs.get(job_id)
+    # Chỉ người tạo job hoặc admin được xem
+    if not job or (
+        job.owner_id != current_user.id and current_user.role != UserRole.ADMIN
+    ):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
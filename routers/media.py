@@ -0,0 +1,65 @@
+import asyncio
+import os
+import re
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from response_cache import etag_matches
+from responses import BlobFileResponse
+from services.variant import VariantUnavailable, get_variant
+from storage import MEDIA_TYPES, blob_store
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# Khi chạy sau nginx, đặt MEDIA_ACCEL_REDIRECT (vd "/_blobs/", location
+# internal trỏ vào MEDIA_ROOT) để nginx gửi file bằng sendfile thay vì app
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT")
+# Blob theo hash không bao giờ đổi nội dung nên cache vĩnh viễn được
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Ảnh gốc trả thay cho variant chưa tạo được: URL ?w= sẽ có variant sau đó
+FALLBACK_CACHE_CONTROL = os.getenv("MEDIA_FALLBACK_CACHE_CONTROL", "public, max-age=60")
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+
+@router.get("/{digest}.{ext}")
+async def get_media_api(
+    digest: str,
+    ext: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096),
+    session: AsyncSession = Depends(get_db),
+):
+    if not _DIGEST_RE.fullmatch(digest) or ext not in MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Not found")
+    media_type = MEDIA_TYPES[ext]
+    cache_control = IMMUTABLE_CACHE_CONTROL
+    if w is not None:
+        # Bản thu nhỏ gần nhất >= w (tạo lần đầu nếu chưa có), không có thì ảnh gốc
+        try:
+            variant = await get_variant(session, digest, w)
+        except VariantUnavailable:
+            variant = None
+            cache_control = FALLBACK_CACHE_CONTROL
+        if variant is not None:
+            digest, media_type = variant
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    path = blob_store.path(digest)
+    if MEDIA_ACCEL_REDIRECT:
+        relative = path.relative_to(blob_store.root).as_posix()
+        headers["X-Accel-Redirect"] = MEDIA_ACCEL_REDIRECT + relative
+        return Response(media_type=media_type, headers=headers)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+    # FileResponse tự xử lý Range/If-Range (206) và đọc file theo chunk
+    return BlobFileResponse(
+        path, media_type=media_type, headers=headers, stat_result=stat_result
+    )
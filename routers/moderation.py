@@ -0,0 +1,69 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_read_db
+from models import User
+from schemas.common import CursorPage
+from schemas.moderation import (
+    ModerationBatch,
+    ModerationBatchResult,
+    PendingChapter,
+    PendingStory,
+)
+from security import get_current_user, get_read_user
+from services.moderation import (
+    list_pending_chapters,
+    list_pending_stories,
+    moderate_chapters,
+    moderate_stories,
+)
+
+router = APIRouter(prefix="/moderation", tags=["moderation"])
+
+
+@router.get("/stories", response_model=CursorPage[PendingStory])
+async def pending_stories_api(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+):
+    items, next_cursor = await list_pending_stories(
+        session, current_user, limit=limit, cursor=cursor
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/chapters", response_model=CursorPage[PendingChapter])
+async def pending_chapters_api(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+):
+    items, next_cursor = await list_pending_chapters(
+        session, current_user, limit=limit, cursor=cursor
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/stories", response_model=ModerationBatchResult)
+async def moderate_stories_api(
+    batch: ModerationBatch,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    results, job = await moderate_stories(session, batch, current_user)
+    return {"results": results, "fanout_job": job}
+
+
+@router.post("/chapters", response_model=ModerationBatchResult)
+async def moderate_chapters_api(
+    batch: ModerationBatch,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    results, job = await moderate_chapters(session, batch, current_user)
+    return {"results": results, "fanout_job": job}
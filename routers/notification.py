@@ -0,0 +1,93 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal, get_db
+from models import User
+from schemas.notification import (
+    MarkReadResult,
+    NotificationMarkRead,
+    NotificationPage,
+    UnreadCount,
+)
+from security import authenticate_token, get_current_user, oauth2_scheme_optional
+from services.notification import (
+    get_unread_count,
+    list_notifications,
+    mark_notifications_read,
+)
+from services.notification_stream import notification_hub
+
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+@router.get("/", response_model=NotificationPage)
+async def list_notifications_api(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    items, next_cursor = await list_notifications(
+        session, current_user.id, limit=limit, cursor=cursor, unread_only=unread_only
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/stream")
+async def stream_notifications_api(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = None,
+    last_id: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+):
+    # EventSource của trình duyệt không gửi được header Authorization nên chấp
+    # nhận token qua query (?access_token=); token khi đó có thể lọt vào log
+    # của proxy, nên ưu tiên header khi client hỗ trợ.
+    # Không dùng get_db: session request sẽ bị giữ suốt thời gian stream mở.
+    async with AsyncSessionLocal() as session:
+        user = await authenticate_token(session, token or access_token)
+        user_id = user.id
+    # Trả 503 sớm khi đã đầy; giới hạn chính xác kiểm tra lại lúc subscribe
+    if notification_hub.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+        )
+    return StreamingResponse(
+        notification_hub.stream(user_id, last_event_id or last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def unread_count_api(
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return {"unread": await get_unread_count(session, current_user.id)}
+
+
+@router.post("/read", response_model=MarkReadResult)
+async def mark_read_api(
+    mark_in: NotificationMarkRead,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    marked, unread = await mark_notifications_read(
+        session, current_user.id, up_to_id=mark_in.up_to_id, ids=mark_in.ids
+    )
+    return {"marked": marked, "unread": unread}
+
+
+@router.post("/read-all", response_model=MarkReadResult)
+async def mark_all_read_api(
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    marked, unread = await mark_notifications_read(session, current_user.id)
+    return {"marked": marked, "unread": unread}
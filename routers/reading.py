@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from models import User
+from schemas.reading import ReadingEvent, ReadingProgressRead
+from security import get_current_user
+from services.reading import (
+    get_reading_progress,
+    list_reading_progress,
+    record_reading,
+)
+
+router = APIRouter(prefix="/reading", tags=["reading"])
+
+
+@router.post("/events", status_code=status.HTTP_202_ACCEPTED)
+async def record_reading_api(
+    event: ReadingEvent, current_user: User = Depends(get_current_user)
+):
+    # Chỉ ghi vào buffer, dữ liệu xuống DB sau vài giây (xem services.reading)
+    record_reading(
+        current_user.id, event.story_id, event.chapter_id, event.page, event.opened
+    )
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/progress", response_model=list[ReadingProgressRead])
+async def list_reading_progress_api(
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await list_reading_progress(session, current_user.id, limit=limit)
+
+
+@router.get("/progress/{story_id}", response_model=ReadingProgressRead)
+async def get_reading_progress_api(
+    story_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    progress = await get_reading_progress(session, current_user.id, story_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Reading progress not found")
+    return progress
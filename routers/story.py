@@ -0,0 +1,151 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_read_db
+from models import User
+from responses import FastJSONResponse
+from schemas.chapter import ChapterNavigation, TocEntry
+from schemas.story import (
+    FollowState,
+    StoryCreate,
+    StoryDetail,
+    StoryRead,
+    StorySearchPage,
+    StoryUpdate,
+    TrendingStory,
+)
+from security import get_current_user, get_read_user_optional
+from services.story import (
+    create_story,
+    follow_story,
+    get_story_by_id,
+    get_story_detail,
+    search_stories,
+    unfollow_story,
+    update_story,
+)
+from services.toc import StoryToc, get_story_toc
+from services.trending import TRENDING_TOP_K, get_trending
+from services.visibility import story_visible
+
+router = APIRouter(prefix="/stories", tags=["stories"])
+
+
+@router.post("/", response_model=StoryRead)
+async def create_story_api(
+    story_in: StoryCreate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await create_story(session, story_in, current_user)
+
+
+@router.get("/search", response_model=StorySearchPage)
+async def search_stories_api(
+    q: Optional[str] = Query(None, max_length=200),
+    tag: list[str] = Query([]),
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_db),
+):
+    page = await search_stories(session, q=q, tags=tag, limit=limit, cursor=cursor)
+    return FastJSONResponse(page)
+
+
+@router.get("/trending", response_model=list[TrendingStory])
+async def trending_stories_api(
+    window: Literal["day", "week", "all"] = "day",
+    limit: int = Query(20, ge=1, le=TRENDING_TOP_K),
+):
+    # Đọc từ top-K trong bộ nhớ, không chạm DB
+    return FastJSONResponse(get_trending(window, limit))
+
+
+@router.get("/{story_id}", response_model=StoryDetail)
+async def get_story_detail_api(
+    story_id: int,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    detail = await get_story_detail(session, story_id, current_user)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return FastJSONResponse(detail)
+
+
+@router.put("/{story_id}", response_model=StoryRead)
+async def update_story_api(
+    story_id: int,
+    story_in: StoryUpdate,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    story = await get_story_by_id(session, story_id)
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return await update_story(session, story, story_in, current_user)
+
+
+async def _visible_toc(
+    session: AsyncSession, story_id: int, current_user: Optional[User]
+) -> Optional[StoryToc]:
+    # Truyện đã duyệt phục vụ thẳng từ cache; chỉ truyện chưa duyệt mới cần
+    # một query kiểm tra quyền xem
+    toc = await get_story_toc(session, story_id)
+    if toc is None or toc.approved:
+        return toc
+    if not await session.scalar(select(story_visible(story_id, current_user))):
+        return None
+    return toc
+
+
+@router.get("/{story_id}/chapters", response_model=list[TocEntry])
+async def story_chapters_api(
+    story_id: int,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    toc = await _visible_toc(session, story_id, current_user)
+    if toc is None:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return Response(toc.json(), media_type="application/json")
+
+
+@router.get(
+    "/{story_id}/chapters/{chapter_id}/navigation", response_model=ChapterNavigation
+)
+async def chapter_navigation_api(
+    story_id: int,
+    chapter_id: int,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_read_user_optional),
+):
+    # Chương trước/sau khi lật trang; thường phục vụ từ cache, không query DB
+    toc = await _visible_toc(session, story_id, current_user)
+    navigation = toc.navigation(chapter_id) if toc else None
+    if navigation is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    return FastJSONResponse(navigation)
+
+
+@router.post("/{story_id}/follow", response_model=FollowState)
+async def follow_story_api(
+    story_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    await follow_story(session, story_id, current_user)
+    return {"following": True}
+
+
+@router.delete("/{story_id}/follow", response_model=FollowState)
+async def unfollow_story_api(
+    story_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    await unfollow_story(session, story_id, current_user)
+    return {"following": False}
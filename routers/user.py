@@ -2,20 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from security import create_access_token
-from database import get_db
-from models import User, UserStatus
-from schemas.user import UserCreate, UserRead, UserUpdate
+from database import get_db, get_read_db
+from models import User, UserRole, UserStatus
+from responses import FastJSONResponse
+from schemas.user import UserCreate, UserPurgeJobRead, UserRead, UserUpdate
 from schemas.common import TokenResponse
-from security import get_current_user
+from security import get_current_user, get_read_user
 from services.user import (
     create_user,
     get_user_by_id,
     get_user_by_username,
+    get_user_read_by_id,
+    get_user_read_by_username,
     update_user_details,
     verify_password,
-    user_read_safe,
+    user_row_safe,
     anonymize_user,
+    delete_user,
 )
+from services.user_purge import get_purge_job
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -33,7 +38,9 @@ async def login(
     session: AsyncSession = Depends(get_db),
 ):
     user = await get_user_by_username(session, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password(
+        form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
@@ -53,13 +60,13 @@ async def read_me(current_user: User = Depends(get_current_user)):
 @router.get("/{user_id}", response_model=UserRead)
 async def get_user(
     user_id: int,
-    session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
 ):
-    user = await get_user_by_id(session, user_id)
+    user = await get_user_read_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user_read_safe(user, current_user)
+    return FastJSONResponse(user_row_safe(user, current_user))
 
 
 @router.put("/{user_id}", response_model=UserRead)
@@ -76,17 +83,31 @@ async def update_user(
 @router.get("/by-username/{username}", response_model=UserRead)
 async def get_user_by_username_route(
     username: str,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+):
+    user = await get_user_read_by_username(session, username)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return FastJSONResponse(user_row_safe(user, current_user))
+
+
+@router.post(
+    "/{user_id}/anonymize", response_model=UserPurgeJobRead, status_code=202
+)
+async def anonymize_user_route(
+    user_id: int,
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    user = await get_user_by_username(session, username)
+    user = await get_user_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user_read_safe(user, current_user)
+    return await anonymize_user(session, user, current_user)
 
 
-@router.post("/{user_id}/anonymize", response_model=UserRead)
-async def anonymize_user_route(
+@router.delete("/{user_id}", response_model=UserPurgeJobRead, status_code=202)
+async def delete_user_route(
     user_id: int,
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -94,5 +115,20 @@ async def anonymize_user_route(
     user = await get_user_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    result = await anonymize_user(session, user, current_user)
-    return result
+    return await delete_user(session, user, current_user)
+
+
+@router.get("/purge-jobs/{job_id}", response_model=UserPurgeJobRead)
+async def get_purge_job_route(
+    job_id: int,
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = await get_purge_job(session, job_id)
+    # Người tạo job hoặc admin được xem; user tự xóa mình không còn đăng
+    # nhập được nên chỉ admin theo dõi tiếp
+    if not job or (
+        job.requested_by != current_user.id and current_user.role != UserRole.ADMIN
+    ):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, computed_field
+
+from models import ApproveStatus
+from schemas.job import JobRead
+from storage import media_url
+
+
+class ChapterCreate(BaseModel):
+    story_id: int
+    # Chỉ admin được chọn group; team member luôn đăng cho group của mình
+    group_id: Optional[int] = None
+    number: int = Field(..., ge=0)
+    title: Optional[str] = Field(None, max_length=255)
+    content: Optional[str] = None
+    images: Optional[str] = None
+
+
+class ChapterRead(BaseModel):
+    id: int
+    story_id: int
+    group_id: int
+    number: int
+    title: Optional[str]
+    status: ApproveStatus
+    comment_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TocEntry(BaseModel):
+    id: int
+    number: int
+    title: Optional[str]
+    group_id: int
+
+
+class ChapterNavigation(BaseModel):
+    prev: Optional[TocEntry]
+    current: TocEntry
+    next: Optional[TocEntry]
+
+
+class ChapterApproveResult(BaseModel):
+    chapter: ChapterRead
+    fanout_job: JobRead
+
+
+class PageVariantRead(BaseModel):
+    width: int
+    height: int
+    size: int
+    content_type: str
+    blob_hash: str
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        return media_url(self.blob_hash, self.content_type)
+
+    class Config:
+        from_attributes = True
+
+
+class ChapterPageRead(BaseModel):
+    number: int
+    blob_hash: str
+    content_type: str
+    size: int
+    width: int
+    height: int
+    # Bản thu nhỏ đã tạo; thiếu thì lấy qua url?w=<chiều rộng>
+    variants: list[PageVariantRead] = []
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        return media_url(self.blob_hash, self.content_type)
+
+    class Config:
+        from_attributes = True
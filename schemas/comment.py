@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class CommentCreate(BaseModel):
+    # Bình luận gốc: đúng một trong story_id/chapter_id/group_id.
+    # Trả lời: chỉ parent_id, đối tượng lấy theo bình luận gốc.
+    story_id: Optional[int] = None
+    chapter_id: Optional[int] = None
+    group_id: Optional[int] = None
+    parent_id: Optional[int] = None
+    content: str = Field(..., min_length=1, max_length=5000)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        targets = [self.story_id, self.chapter_id, self.group_id, self.parent_id]
+        if sum(target is not None for target in targets) != 1:
+            raise ValueError(
+                "Exactly one of story_id, chapter_id, group_id or parent_id is required"
+            )
+        return self
+
+
+class CommentUpdate(BaseModel):
+    content: str = Field(..., min_length=1, max_length=5000)
+
+
+class CommentAuthor(BaseModel):
+    id: int
+    username: str
+
+    class Config:
+        from_attributes = True
+
+
+class CommentRead(BaseModel):
+    id: int
+    story_id: Optional[int]
+    chapter_id: Optional[int]
+    group_id: Optional[int]
+    parent_id: Optional[int]
+    content: str
+    reply_count: int
+    author: CommentAuthor = Field(validation_alias="user")
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
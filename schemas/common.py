@@ -1,5 +1,15 @@
+from typing import Generic, Optional, TypeVar
+
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
+
 class TokenResponse(BaseModel):
     access_token: str
-    token_type: str = "bearer"
\ No newline at end of file
+    token_type: str = "bearer"
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,46 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DonationCreate(BaseModel):
+    # Cần ít nhất một trong group_id, story_id
+    group_id: Optional[int] = None
+    story_id: Optional[int] = None
+    amount: float = Field(..., gt=0, le=1_000_000_000)
+    message: Optional[str] = Field(None, max_length=255)
+
+
+class DonationRead(BaseModel):
+    id: int
+    user_id: int
+    group_id: Optional[int]
+    story_id: Optional[int]
+    amount: float
+    message: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: int
+    username: str
+    total: float
+    count: int
+
+
+class DailyDonationTotal(BaseModel):
+    day: date
+    total: float
+    count: int
+
+
+class DonationTotals(BaseModel):
+    scope: str
+    scope_id: int
+    total: float
+    count: int
+    daily: list[DailyDonationTotal]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
+from models import GroupRole
 
 
 class GroupCreate(BaseModel):
@@ -24,3 +25,16 @@ class GroupRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class GroupMembersUpdate(BaseModel):
+    action: Literal["add", "remove", "set_role"]
+    user_ids: list[int] = Field(..., min_length=1, max_length=500)
+    # Role gán cho user khi action là add hoặc set_role
+    role: GroupRole = GroupRole.MEMBER
+
+
+class GroupMemberResult(BaseModel):
+    user_id: int
+    status: Literal["updated", "unchanged", "not_found", "conflict"]
+    detail: Optional[str] = None
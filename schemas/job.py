@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: int
+    total: Optional[int] = None
+    detail: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from schemas.job import JobRead
+
+
+class PendingStory(BaseModel):
+    id: int
+    title: str
+    author: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PendingChapter(BaseModel):
+    id: int
+    story_id: int
+    story_title: str
+    group_id: int
+    number: int
+    title: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ModerationBatch(BaseModel):
+    action: Literal["approve", "reject"]
+    ids: list[int] = Field(..., min_length=1, max_length=500)
+
+
+class ModerationItemResult(BaseModel):
+    id: int
+    status: Literal["updated", "not_found", "conflict"]
+    detail: Optional[str] = None
+
+
+class ModerationBatchResult(BaseModel):
+    results: list[ModerationItemResult]
+    # Job thông báo cho follower khi duyệt; None nếu không có gì được duyệt
+    fanout_job: Optional[JobRead] = None
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from models import NotificationType
+
+
+class NotificationRead(BaseModel):
+    id: int
+    type: NotificationType
+    content: str
+    link: Optional[str]
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationPage(BaseModel):
+    items: list[NotificationRead]
+    next_cursor: Optional[str] = None
+
+
+class NotificationMarkRead(BaseModel):
+    # Không truyền gì: đánh dấu tất cả; up_to_id: mọi thông báo có id <= N
+    up_to_id: Optional[int] = None
+    ids: Optional[list[int]] = Field(None, max_length=500)
+
+
+class UnreadCount(BaseModel):
+    unread: int
+
+
+class MarkReadResult(BaseModel):
+    marked: int
+    unread: int
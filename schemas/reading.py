@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+# Cột integer (int4) của Postgres; id/page lớn hơn làm hỏng cả lô khi flush
+MAX_INT4 = 2**31 - 1
+
+
+class ReadingEvent(BaseModel):
+    story_id: int = Field(..., ge=1, le=MAX_INT4)
+    chapter_id: int = Field(..., ge=1, le=MAX_INT4)
+    page: int = Field(1, ge=1, le=MAX_INT4)
+    # True khi vừa mở chương (tính một lượt xem), False khi chỉ lật trang
+    opened: bool = False
+
+
+class ReadingProgressRead(BaseModel):
+    story_id: int
+    chapter_id: int
+    page: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
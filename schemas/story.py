@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from models import ApproveStatus
+from schemas.chapter import TocEntry
+
+
+class StoryCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    # Danh sách tag cách nhau bởi dấu phẩy, ví dụ "action, fantasy"
+    tags: Optional[str] = Field(None, max_length=255)
+    author: Optional[str] = Field(None, max_length=100)
+
+
+class StoryUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=1, max_length=255)
+    description: Optional[str] = None
+    tags: Optional[str] = Field(None, max_length=255)
+    author: Optional[str] = Field(None, max_length=100)
+
+
+class StoryRead(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    tags: Optional[str]
+    author: Optional[str]
+    status: ApproveStatus
+    comment_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StorySearchItem(BaseModel):
+    id: int
+    title: str
+    author: Optional[str]
+    tags: Optional[str]
+    rank: float
+
+
+class TagFacet(BaseModel):
+    name: str
+    count: int
+
+
+class StorySearchPage(BaseModel):
+    items: list[StorySearchItem]
+    next_cursor: Optional[str] = None
+    # Chỉ tính ở trang đầu (khi không có cursor)
+    facets: Optional[list[TagFacet]] = None
+
+
+class TrendingStory(BaseModel):
+    id: int
+    title: str
+    author: Optional[str]
+    tags: Optional[str]
+    # Điểm đã suy giảm tới thời điểm refresh gần nhất (window=all: tổng điểm)
+    score: float
+
+
+class StoryGroup(BaseModel):
+    id: int
+    name: str
+    avatar: Optional[str]
+
+
+class StoryDetail(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    tags: Optional[str]
+    author: Optional[str]
+    status: ApproveStatus
+    view_count: int
+    comment_count: int
+    follower_count: int
+    created_at: datetime
+    updated_at: datetime
+    groups: list[StoryGroup]
+    chapters: list[TocEntry]
+    # None khi không đăng nhập
+    is_following: Optional[bool] = None
+
+
+class FollowState(BaseModel):
+    following: bool
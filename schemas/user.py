@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, EmailStr, Field
 from models import UserRole, UserStatus, GroupRole
 
@@ -33,3 +33,18 @@ class UserUpdate(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UserPurgeJobRead(BaseModel):
+    id: int
+    user_id: int
+    action: Literal["delete", "anonymize"]
+    status: str
+    step: Optional[str] = None
+    progress: int
+    detail: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,11 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 
-from database import get_db
-from models import UserStatus
+from cache import principal_cache
+from database import engine, get_db, get_read_db
+from models import User, UserStatus
 from services.user import get_user_by_id
 
 SECRET_KEY = "YOUR_SECRET"
@@ -13,6 +17,8 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
+# Cho route tự xử lý khi không có header Authorization (ví dụ SSE)
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/users/login", auto_error=False)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -32,17 +38,76 @@ def decode_access_token(token: str):
         return None
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db)
-):
-    payload = decode_access_token(token)
+def _principal_snapshot(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+
+
+def _attach_principal(session: AsyncSession, snapshot: dict) -> User:
+    # Dựng lại User từ snapshot và gắn vào session như đã load từ DB (không query),
+    # để các service vẫn có thể sửa và commit current_user như bình thường
+    existing = session.sync_session.identity_map.get(identity_key(User, snapshot["id"]))
+    if existing is not None:
+        return existing
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+
+async def load_principal(session: AsyncSession, user_id: int) -> User | None:
+    snapshot = principal_cache.get(user_id)
+    if snapshot is not None:
+        return _attach_principal(session, snapshot)
+    user = await get_user_by_id(session, user_id)
+    # Không cache bản đọc từ replica: replica trễ có thể đưa role/status cũ
+    # vào lại cache ngay sau khi primary đã invalidate
+    if user is not None and session.bind is engine:
+        principal_cache.set(user_id, _principal_snapshot(user))
+    return user
+
+
+async def authenticate_token(session: AsyncSession, token: str | None) -> User:
+    payload = decode_access_token(token) if token else None
     if not payload or "sub" not in payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
-    user = await get_user_by_id(session, int(payload["sub"]))
+    user = await load_principal(session, int(payload["sub"]))
     if not user or user.status == UserStatus.INACTIVE:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found or inactive"
         )
     return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db)
+):
+    return await authenticate_token(session, token)
+
+
+async def get_current_user_optional(
+    token: str | None = Depends(oauth2_scheme_optional),
+    session: AsyncSession = Depends(get_db),
+) -> User | None:
+    # Route công khai trả thêm thông tin riêng khi có token; token sai vẫn 401
+    if token is None:
+        return None
+    return await authenticate_token(session, token)
+
+
+# Cho route dùng get_read_db: xác thực trên chính session của route, một
+# request chỉ mở một session (FastAPI dùng chung dependency trong request)
+async def get_read_user(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_read_db)
+):
+    return await authenticate_token(session, token)
+
+
+async def get_read_user_optional(
+    token: str | None = Depends(oauth2_scheme_optional),
+    session: AsyncSession = Depends(get_read_db),
+) -> User | None:
+    if token is None:
+        return None
+    return await authenticate_token(session, token)
@@ -0,0 +1,88 @@
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from background import Job, jobs
+from models import ApproveStatus, Chapter, Group, Story, User, UserRole
+from schemas.chapter import ChapterCreate
+from services.notification import fan_out_new_chapter
+from services.toc import bump_chapter_version, invalidate_toc
+from services.variant import schedule_chapter_variants
+
+
+async def create_chapter(
+    session: AsyncSession, chapter_in: ChapterCreate, current_user: User
+) -> Chapter:
+    data = chapter_in.model_dump()
+    if current_user.role == UserRole.ADMIN:
+        data["group_id"] = data["group_id"] or current_user.group_id
+    elif current_user.group_id is not None:
+        data["group_id"] = current_user.group_id
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    if data["group_id"] is None or not await session.get(Group, data["group_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Group not found"
+        )
+    if not await session.get(Story, data["story_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Story not found"
+        )
+    chapter = Chapter(**data)
+    session.add(chapter)
+    await session.commit()
+    await session.refresh(chapter)
+    return chapter
+
+
+async def get_chapter_by_id(session: AsyncSession, chapter_id: int) -> Chapter | None:
+    result = await session.execute(select(Chapter).where(Chapter.id == chapter_id))
+    return result.scalar_one_or_none()
+
+
+async def approve_chapter(
+    session: AsyncSession, chapter_id: int, current_user: User
+) -> tuple[Chapter, Job]:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    # Một câu UPDATE có điều kiện PENDING: hai admin duyệt cùng lúc thì chỉ
+    # một người nhận được dòng, người kia nhận 409 và không tạo job lần nữa
+    chapter = await session.scalar(
+        update(Chapter)
+        .where(Chapter.id == chapter_id, Chapter.status == ApproveStatus.PENDING)
+        .values(status=ApproveStatus.APPROVED)
+        .returning(Chapter)
+        .execution_options(populate_existing=True)
+    )
+    if chapter is None:
+        current = await session.scalar(
+            select(Chapter.status).where(Chapter.id == chapter_id)
+        )
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chapter not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Chapter already {current.value}",
+        )
+    # Chương vừa duyệt xuất hiện trong mục lục
+    await bump_chapter_version(session, chapter.story_id)
+    await session.commit()
+    invalidate_toc(chapter.story_id)
+
+    # Gửi thông báo cho follower chạy nền, không nằm trong request duyệt
+    job = jobs.spawn(
+        "chapter_fanout",
+        lambda job: fan_out_new_chapter(job, chapter_id),
+        owner_id=current_user.id,
+    )
+    await schedule_chapter_variants(
+        session, chapter.story_id, chapter_id, current_user.id
+    )
+    return chapter, job
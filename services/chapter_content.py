@@ -0,0 +1,131 @@
+"""Nội dung chữ của chương, lưu nén zlib (models.CompressedText).
+
+Endpoint đọc chương lấy thẳng bytes nén từ DB: client nhận "deflate" thì
+gửi nguyên bytes đó, không tốn CPU nén lại; client khác thì giải nén từng
+khúc trong lúc gửi, không giữ cả chương đã giải nén trong bộ nhớ.
+
+DB tạo trước khi nén nội dung còn cột chapters.content kiểu text, và app
+không khởi động (bootstrap) cho tới khi cột được chuyển sang bytea nén. Chạy
+một lần, trước khi deploy bản mới:
+
+    python -m services.chapter_content --chunk-size 1000
+"""
+
+import argparse
+import asyncio
+import zlib
+from typing import Iterator, Optional
+
+from sqlalchemy import LargeBinary, bindparam, select, text, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models import Chapter, CompressedText, User
+from services.visibility import chapter_visible
+
+STREAM_CHUNK_SIZE = 64 * 1024
+MIGRATE_CHUNK_SIZE = 1000
+
+
+def accepts_deflate(accept_encoding: Optional[str]) -> bool:
+    # "gzip, deflate;q=0.5" -> True; "deflate;q=0" -> False
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip() != "deflate":
+            continue
+        q = params.strip().removeprefix("q=") if params.strip() else "1"
+        try:
+            return float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
+async def get_compressed_content(
+    session: AsyncSession, chapter_id: int, current_user: Optional[User] = None
+) -> tuple[bool, Optional[bytes]]:
+    """(chương có tồn tại và xem được không, bytes zlib của nội dung hoặc None)."""
+    # type_coerce: lấy bytes thô, bỏ qua bước giải nén của CompressedText
+    result = await session.execute(
+        select(type_coerce(Chapter.content, LargeBinary)).where(
+            Chapter.id == chapter_id, chapter_visible(Chapter.id, current_user)
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return False, None
+    return True, row[0]
+
+
+def iter_decompressed(data: bytes) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+    view = memoryview(data)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        chunk = decompressor.decompress(view[start : start + STREAM_CHUNK_SIZE])
+        if chunk:
+            yield chunk
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+async def migrate_chapter_content(chunk_size: int = MIGRATE_CHUNK_SIZE) -> int:
+    # Thêm cột bytea tạm, nén từng khoảng id bằng Python (Postgres không có
+    # zlib), rồi đổi cột trong một transaction ngắn
+    async with AsyncSessionLocal() as session:
+        data_type = await session.scalar(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'chapters' AND column_name = 'content'"
+            )
+        )
+        if data_type != "text":
+            print("chapters.content is already compressed")
+            return 0
+        await session.execute(
+            text("ALTER TABLE chapters ADD COLUMN IF NOT EXISTS content_zlib bytea")
+        )
+        max_id = await session.scalar(text("SELECT max(id) FROM chapters")) or 0
+        await session.commit()
+    compress = CompressedText().process_bind_param
+    done = 0
+    for start in range(0, max_id, chunk_size):
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                text(
+                    "SELECT id, content FROM chapters "
+                    "WHERE id > :start AND id <= :end AND content IS NOT NULL"
+                ),
+                {"start": start, "end": start + chunk_size},
+            )
+            rows = [
+                {"chapter_id": row.id, "data": compress(row.content, None)}
+                for row in result
+            ]
+            if rows:
+                await session.execute(
+                    text(
+                        "UPDATE chapters SET content_zlib = :data "
+                        "WHERE id = :chapter_id"
+                    ).bindparams(bindparam("data", type_=LargeBinary)),
+                    rows,
+                )
+            await session.commit()
+        done = min(start + chunk_size, max_id)
+        print(f"compressed chapter content up to id {done}/{max_id}")
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("ALTER TABLE chapters DROP COLUMN content"))
+        await session.execute(
+            text("ALTER TABLE chapters RENAME COLUMN content_zlib TO content")
+        )
+        await session.commit()
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert chapters.content from text to zlib-compressed bytea"
+    )
+    parser.add_argument("--chunk-size", type=int, default=MIGRATE_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(migrate_chapter_content(args.chunk_size))
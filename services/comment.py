@@ -0,0 +1,248 @@
+"""Bình luận cho truyện, chương hoặc nhóm dịch, có trả lời một cấp.
+
+Danh sách phân trang keyset (created_at, id) trên index partial của từng
+đối tượng, tác giả nạp bằng một query selectin cho cả trang: mỗi trang luôn
+tốn đúng hai query dù có bao nhiêu bình luận. Số bình luận của chương/truyện
+(comment_count) và số trả lời (reply_count) được cập nhật trong cùng
+transaction với insert/delete nên không cần COUNT khi hiển thị.
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import Chapter, Comment, Group, Story, User, UserRole
+from pagination import paginate_keyset
+from schemas.comment import CommentCreate, CommentUpdate
+from services.trending import record_story_event
+from services.visibility import chapter_visible, story_visible
+
+COMMENT_TARGETS = {
+    "story": Comment.story_id,
+    "chapter": Comment.chapter_id,
+    "group": Comment.group_id,
+}
+
+
+def _with_author(stmt):
+    # Một query IN (...) cho tác giả của cả trang, chỉ lấy cột cần hiển thị
+    return stmt.options(selectinload(Comment.user).load_only(User.id, User.username))
+
+
+async def _adjust_comment_counts(
+    session: AsyncSession, story_id: int | None, chapter_id: int | None, delta: int
+):
+    # Giữ nguyên updated_at: có bình luận mới không phải là sửa truyện/chương
+    if chapter_id is not None:
+        await session.execute(
+            update(Chapter)
+            .where(Chapter.id == chapter_id)
+            .values(
+                comment_count=Chapter.comment_count + delta,
+                updated_at=Chapter.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if story_id is not None:
+        await session.execute(
+            update(Story)
+            .where(Story.id == story_id)
+            .values(
+                comment_count=Story.comment_count + delta,
+                updated_at=Story.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _target_visible(current_user: User | None):
+    # Bình luận của truyện/chương chưa duyệt chỉ hiện với người xem được đối
+    # tượng đó (services.visibility); bình luận nhóm luôn công khai
+    return and_(
+        or_(
+            Comment.chapter_id.is_(None),
+            chapter_visible(Comment.chapter_id, current_user),
+        ),
+        or_(Comment.story_id.is_(None), story_visible(Comment.story_id, current_user)),
+    )
+
+
+async def create_comment(
+    session: AsyncSession, comment_in: CommentCreate, current_user: User
+) -> Comment:
+    data = comment_in.model_dump(exclude={"parent_id"})
+    if comment_in.parent_id is not None:
+        # Trả lời một trả lời thì gắn vào bình luận gốc của nó. UPDATE khóa
+        # dòng gốc trước khi insert, cùng thứ tự với delete_comment, nên
+        # reply_count không lệch khi xóa và trả lời cùng lúc.
+        root_id = (
+            select(func.coalesce(Comment.parent_id, Comment.id))
+            .where(Comment.id == comment_in.parent_id)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            update(Comment)
+            .where(Comment.id == root_id)
+            .values(reply_count=Comment.reply_count + 1, updated_at=Comment.updated_at)
+            .returning(
+                Comment.id, Comment.story_id, Comment.chapter_id, Comment.group_id
+            )
+            .execution_options(synchronize_session=False)
+        )
+        root = result.one_or_none()
+        if root is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent comment not found",
+            )
+        data.update(
+            parent_id=root.id,
+            story_id=root.story_id,
+            chapter_id=root.chapter_id,
+            group_id=root.group_id,
+        )
+    elif comment_in.chapter_id is not None:
+        # Bình luận chương mang cả story_id để tính vào truyện
+        story_id = await session.scalar(
+            select(Chapter.story_id).where(Chapter.id == comment_in.chapter_id)
+        )
+        if story_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Chapter not found"
+            )
+        data["story_id"] = story_id
+    elif comment_in.story_id is not None:
+        if not await session.get(Story, comment_in.story_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Story not found"
+            )
+    elif not await session.get(Group, comment_in.group_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Group not found"
+        )
+    comment = Comment(user=current_user, **data)
+    session.add(comment)
+    await _adjust_comment_counts(session, comment.story_id, comment.chapter_id, 1)
+    await session.commit()
+    if comment.story_id is not None:
+        record_story_event(comment.story_id, "comment")
+    return comment
+
+
+async def get_comment(session: AsyncSession, comment_id: int) -> Comment | None:
+    result = await session.execute(
+        _with_author(select(Comment).where(Comment.id == comment_id))
+    )
+    return result.scalar_one_or_none()
+
+
+def _check_can_modify(comment: Comment, current_user: User, allow_admin: bool):
+    if comment.user_id == current_user.id:
+        return
+    if allow_admin and current_user.role == UserRole.ADMIN:
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+
+async def update_comment(
+    session: AsyncSession,
+    comment: Comment,
+    comment_in: CommentUpdate,
+    current_user: User,
+) -> Comment:
+    # Chỉ tác giả được sửa nội dung
+    _check_can_modify(comment, current_user, allow_admin=False)
+    comment.content = comment_in.content
+    await session.commit()
+    return comment
+
+
+async def delete_comment(session: AsyncSession, comment: Comment, current_user: User):
+    # Tác giả hoặc admin; xóa bình luận gốc xóa luôn các trả lời (FK cascade)
+    _check_can_modify(comment, current_user, allow_admin=True)
+    if comment.parent_id is None:
+        # Khóa dòng gốc: create_comment phải chờ nên reply_count đọc được là
+        # đúng số trả lời sẽ bị xóa theo
+        reply_count = await session.scalar(
+            select(Comment.reply_count)
+            .where(Comment.id == comment.id)
+            .with_for_update()
+        )
+        if reply_count is None:
+            # Đã bị xóa bởi request khác
+            return
+        removed = 1 + reply_count
+    else:
+        await session.execute(
+            update(Comment)
+            .where(Comment.id == comment.parent_id)
+            .values(reply_count=Comment.reply_count - 1, updated_at=Comment.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        removed = 1
+    result = await session.execute(
+        delete(Comment)
+        .where(Comment.id == comment.id)
+        .returning(Comment.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
+        await session.rollback()
+        return
+    await _adjust_comment_counts(
+        session, comment.story_id, comment.chapter_id, -removed
+    )
+    await session.commit()
+
+
+async def list_comments(
+    session: AsyncSession,
+    target: str,
+    target_id: int,
+    limit: int = 20,
+    cursor: str | None = None,
+    current_user: User | None = None,
+) -> tuple[list[Comment], str | None]:
+    # Bình luận gốc của đối tượng, mới nhất trước
+    filters = [COMMENT_TARGETS[target] == target_id, Comment.parent_id.is_(None)]
+    if target == "story":
+        filters += [
+            Comment.chapter_id.is_(None),
+            story_visible(target_id, current_user),
+        ]
+    elif target == "chapter":
+        filters.append(chapter_visible(target_id, current_user))
+    return await paginate_keyset(
+        session,
+        _with_author(select(Comment).where(*filters)),
+        sort_column=Comment.created_at,
+        id_column=Comment.id,
+        limit=limit,
+        cursor=cursor,
+        descending=True,
+        scope=f"comments:{target}:{target_id}",
+    )
+
+
+async def list_replies(
+    session: AsyncSession,
+    comment_id: int,
+    limit: int = 20,
+    cursor: str | None = None,
+    current_user: User | None = None,
+) -> tuple[list[Comment], str | None]:
+    # Trả lời theo thứ tự thời gian, cũ nhất trước. Trả lời mang story_id /
+    # chapter_id của bình luận gốc nên lọc được theo đối tượng như trên.
+    stmt = select(Comment).where(
+        Comment.parent_id == comment_id, _target_visible(current_user)
+    )
+    return await paginate_keyset(
+        session,
+        _with_author(stmt),
+        sort_column=Comment.created_at,
+        id_column=Comment.id,
+        limit=limit,
+        cursor=cursor,
+        scope=f"comments:replies:{comment_id}",
+    )
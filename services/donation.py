@@ -0,0 +1,296 @@
+"""Donate và các bảng tổng hợp (rollup) cho bảng xếp hạng.
+
+Mỗi donate được cộng vào donation_daily_totals (theo group/story) và
+donor_daily_totals (theo group/story/toàn site và user), theo ngày UTC và
+một dòng tổng mọi thời gian (ALL_TIME_DAY), trong cùng transaction với
+insert. Bảng xếp hạng chỉ đọc rollup: số dòng cần đọc phụ thuộc số donor
+và số ngày trong khoảng, không phụ thuộc tổng số donate.
+
+Dựng lại rollup từ donates (sau khi đổi cách tính, hoặc khi nghi lệch):
+
+    python -m services.donation --chunk-size 10000
+
+Lệnh cộng lại theo từng khoảng id vào bảng tạm (*_rebuild), rồi thay nội
+dung bảng rollup trong một transaction: bảng xếp hạng vẫn đọc số cũ trong
+lúc chạy, không bao giờ thấy rollup trống hay dựng dở. Donate đến trong lúc
+chạy được cộng vào bảng tạm ngay trước khi thay.
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    Column,
+    Date,
+    MetaData,
+    Table,
+    cast,
+    func,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models import (
+    ALL_TIME_DAY,
+    Donate,
+    DonationDailyTotal,
+    DonorDailyTotal,
+    Group,
+    Story,
+    User,
+)
+from schemas.donation import DonationCreate
+from services.trending import record_story_event
+
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def _donation_scopes(condition, with_site: bool):
+    # Mỗi donate -> một dòng cho mỗi scope nó thuộc về và mỗi mốc
+    # (ngày UTC, mọi thời gian)
+    scopes = [("group", Donate.group_id), ("story", Donate.story_id)]
+    if with_site:
+        scopes.append(("site", literal(0)))
+    day = cast(func.timezone("UTC", Donate.created_at), Date)
+    branches = [
+        select(
+            literal(scope).label("scope"),
+            scope_id.label("scope_id"),
+            bucket.label("day"),
+            Donate.user_id,
+            Donate.amount,
+        ).where(condition, scope_id.is_not(None))
+        for scope, scope_id in scopes
+        for bucket in (day, literal(ALL_TIME_DAY, Date))
+    ]
+    return union_all(*branches).subquery("scoped")
+
+
+ROLLUP_TABLES = (
+    (DonationDailyTotal.__table__, False, ("scope", "scope_id", "day")),
+    (DonorDailyTotal.__table__, True, ("scope", "scope_id", "day", "user_id")),
+)
+
+
+def _rollup_statements(condition, tables=None):
+    """Hai câu INSERT ... SELECT ... ON CONFLICT cộng các donate thỏa
+    `condition` vào rollup; dùng chung cho insert từng donate và backfill.
+    `tables` thay bảng đích (bảng tạm khi backfill)."""
+    statements = []
+    for table, with_site, keys in ROLLUP_TABLES:
+        target = (tables or {}).get(table.name, table)
+        scoped = _donation_scopes(condition, with_site)
+        key_columns = [scoped.c[key] for key in keys]
+        # ORDER BY khóa: các transaction khóa dòng rollup theo cùng thứ tự,
+        # tránh deadlock khi nhiều donate cùng group/story đến một lúc
+        source = (
+            select(
+                *key_columns,
+                func.sum(scoped.c.amount),
+                func.count(),
+            )
+            .group_by(*key_columns)
+            .order_by(*key_columns)
+        )
+        stmt = pg_insert(target).from_select([*keys, "total", "count"], source)
+        statements.append(
+            stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    "total": target.c.total + stmt.excluded.total,
+                    "count": target.c.count + stmt.excluded.count,
+                },
+            )
+        )
+    return statements
+
+
+async def create_donation(
+    session: AsyncSession, donation_in: DonationCreate, current_user: User
+) -> Donate:
+    if donation_in.group_id is None and donation_in.story_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="group_id or story_id is required",
+        )
+    if donation_in.group_id is not None and not await session.get(
+        Group, donation_in.group_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Group not found"
+        )
+    if donation_in.story_id is not None and not await session.get(
+        Story, donation_in.story_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Story not found"
+        )
+    donation = Donate(**donation_in.model_dump(), user_id=current_user.id)
+    session.add(donation)
+    await session.flush()
+    for stmt in _rollup_statements(Donate.id == donation.id):
+        await session.execute(stmt)
+    await session.commit()
+    await session.refresh(donation)
+    if donation.story_id is not None:
+        record_story_event(donation.story_id, "donate")
+    return donation
+
+
+def _period_start(period: str) -> date:
+    today = datetime.now(timezone.utc).date()
+    if period == "day":
+        return today
+    if period == "week":
+        return today - timedelta(days=6)
+    return today.replace(day=1)
+
+
+async def get_donor_leaderboard(
+    session: AsyncSession,
+    scope: str,
+    scope_id: int,
+    period: str = "month",
+    limit: int = 20,
+) -> list[dict]:
+    filters = [DonorDailyTotal.scope == scope, DonorDailyTotal.scope_id == scope_id]
+    if period == "all":
+        # Đã có sẵn dòng tổng mọi thời gian cho mỗi donor: đọc thẳng theo index
+        # (scope, scope_id, day, total), dừng sau `limit` dòng
+        ranked = (
+            select(
+                DonorDailyTotal.user_id,
+                DonorDailyTotal.total.label("total"),
+                DonorDailyTotal.count.label("count"),
+            )
+            .where(*filters, DonorDailyTotal.day == ALL_TIME_DAY)
+            .order_by(DonorDailyTotal.total.desc(), DonorDailyTotal.user_id)
+            .limit(limit)
+            .subquery()
+        )
+    else:
+        total = func.sum(DonorDailyTotal.total).label("total")
+        ranked = (
+            select(
+                DonorDailyTotal.user_id,
+                total,
+                func.sum(DonorDailyTotal.count).label("count"),
+            )
+            .where(*filters, DonorDailyTotal.day >= _period_start(period))
+            .group_by(DonorDailyTotal.user_id)
+            .order_by(total.desc(), DonorDailyTotal.user_id)
+            .limit(limit)
+            .subquery()
+        )
+    result = await session.execute(
+        select(ranked.c.user_id, User.username, ranked.c.total, ranked.c.count)
+        .join(User, User.id == ranked.c.user_id)
+        .order_by(ranked.c.total.desc(), ranked.c.user_id)
+    )
+    return [row._asdict() for row in result]
+
+
+async def get_donation_totals(
+    session: AsyncSession, scope: str, scope_id: int, days: int = 30
+) -> dict:
+    # Tổng mọi thời gian và chuỗi theo ngày của `days` ngày gần nhất
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    result = await session.execute(
+        select(
+            DonationDailyTotal.day, DonationDailyTotal.total, DonationDailyTotal.count
+        )
+        .where(
+            DonationDailyTotal.scope == scope,
+            DonationDailyTotal.scope_id == scope_id,
+            (DonationDailyTotal.day >= since)
+            | (DonationDailyTotal.day == ALL_TIME_DAY),
+        )
+        .order_by(DonationDailyTotal.day)
+    )
+    totals = {"scope": scope, "scope_id": scope_id, "total": 0.0, "count": 0}
+    daily = []
+    for row in result:
+        if row.day == ALL_TIME_DAY:
+            totals["total"], totals["count"] = row.total, row.count
+        else:
+            daily.append(row._asdict())
+    totals["daily"] = daily
+    return totals
+
+
+def _rebuild_table(table: Table) -> Table:
+    # Bảng tạm cùng cột và khóa chính với bảng rollup
+    return Table(
+        f"{table.name}_rebuild",
+        MetaData(),
+        *(
+            Column(column.name, column.type, primary_key=column.primary_key)
+            for column in table.columns
+        ),
+    )
+
+
+async def backfill_donation_rollups(chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+    # Cộng lại từ donates vào bảng tạm theo từng khoảng id, mỗi khoảng một
+    # transaction ngắn; bảng rollup thật chỉ bị đụng tới lúc thay ở cuối
+    staging = {table.name: _rebuild_table(table) for table, _, _ in ROLLUP_TABLES}
+    async with AsyncSessionLocal() as session:
+        for table, _, _ in ROLLUP_TABLES:
+            name = staging[table.name].name
+            await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            await session.execute(
+                text(
+                    f"CREATE UNLOGGED TABLE {name} "
+                    f"(LIKE {table.name} INCLUDING DEFAULTS INCLUDING INDEXES)"
+                )
+            )
+        max_id = await session.scalar(select(func.max(Donate.id))) or 0
+        await session.commit()
+    done = 0
+    for start in range(0, max_id, chunk_size):
+        condition = (Donate.id > start) & (Donate.id <= start + chunk_size)
+        async with AsyncSessionLocal() as session:
+            for stmt in _rollup_statements(condition, staging):
+                await session.execute(stmt)
+            await session.commit()
+        done = min(start + chunk_size, max_id)
+        print(f"backfilled donates up to id {done}/{max_id}")
+
+    async with AsyncSessionLocal() as session:
+        # EXCLUSIVE vẫn cho đọc nhưng chặn create_donation ghi rollup: donate
+        # mới đã commit được cộng vào bảng tạm, donate đang chờ sẽ ghi vào
+        # bảng đã thay sau khi transaction này commit
+        for table, _, _ in ROLLUP_TABLES:
+            await session.execute(text(f"LOCK TABLE {table.name} IN EXCLUSIVE MODE"))
+        for stmt in _rollup_statements(Donate.id > max_id, staging):
+            await session.execute(stmt)
+        for table, _, _ in ROLLUP_TABLES:
+            columns = ", ".join(column.name for column in table.columns)
+            name = staging[table.name].name
+            await session.execute(text(f"DELETE FROM {table.name}"))
+            await session.execute(
+                text(
+                    f"INSERT INTO {table.name} ({columns}) "
+                    f"SELECT {columns} FROM {name}"
+                )
+            )
+            await session.execute(text(f"DROP TABLE {name}"))
+        await session.commit()
+    print("swapped in rebuilt donation rollups")
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild donation rollups from the donates table"
+    )
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(backfill_donation_rollups(args.chunk_size))
@@ -1,10 +1,38 @@
+import os
+
 from fastapi import HTTPException, status
+from sqlalchemy import Integer, any_, literal, or_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 
+from cache import principal_cache
 from models import Group, GroupRole, User, UserRole
-from schemas.group import GroupCreate, GroupUpdate
+from pagination import paginate_keyset
+from response_cache import response_cache, version_etag
+from schemas.group import GroupCreate, GroupMembersUpdate, GroupRead, GroupUpdate
+from singleflight import SingleFlight
+
+GROUP_SORT_COLUMNS = {"created_at": Group.created_at, "name": Group.name}
+# Read path: chỉ select các cột GroupRead cần, trả dict thay vì ORM entity
+GROUP_READ_COLUMNS = tuple(getattr(Group, name) for name in GroupRead.model_fields)
+# description là cột deferred: refresh() mặc định bỏ qua, nên liệt kê rõ các
+# cột GroupRead cần khi trả về entity
+GROUP_REFRESH_ATTRIBUTES = list(GroupRead.model_fields)
+# get_group_read: gộp lookup trùng, giữ kết quả GROUP_READ_TTL giây
+group_reads = SingleFlight(ttl=float(os.getenv("GROUP_READ_TTL", "1")))
+
+def invalidate_group_responses(group_id: int):
+    # Response cache: key ("group", id) cho chi tiết, ("groups", ...) cho list
+    response_cache.invalidate(("group", group_id))
+    response_cache.invalidate_if(lambda key, _: key[0] == "groups")
+    group_reads.forget_if(lambda key: key[1] == group_id)
+
+def groups_etag(groups: list[dict], *extra) -> str:
+    # ETag theo (id, updated_at) từng group và các giá trị khác của response
+    rows = [(group["id"], group["updated_at"]) for group in groups]
+    return version_etag(rows, *extra)
 
 async def create_group(
     session: AsyncSession, group_in: GroupCreate, current_user: User
@@ -23,7 +51,9 @@ async def create_group(
 
     try:
         await session.commit()
-        await session.refresh(group)
+        principal_cache.invalidate(current_user.id)
+        invalidate_group_responses(group.id)
+        await session.refresh(group, GROUP_REFRESH_ATTRIBUTES)
         return group
     except IntegrityError:
         await session.rollback()
@@ -41,6 +71,50 @@ async def list_groups(
     result = await session.execute(select(Group).offset(skip).limit(limit))
     return result.scalars().all()
 
+async def get_group_read(session: AsyncSession, group_id: int) -> dict | None:
+    # Gộp các lookup trùng đang chạy. Session riêng cùng engine với caller
+    # (primary hoặc replica); key có engine để request vừa ghi (đọc primary)
+    # không nhận kết quả từ replica. Dict trả về dùng chung, không được sửa.
+    bind = session.bind
+
+    async def load():
+        async with AsyncSession(bind, expire_on_commit=False) as shared:
+            result = await shared.execute(
+                select(*GROUP_READ_COLUMNS).where(Group.id == group_id)
+            )
+            row = result.one_or_none()
+            return row._asdict() if row else None
+
+    return await group_reads.do((id(bind), group_id), load)
+
+async def list_groups_read(
+    session: AsyncSession, skip: int = 0, limit: int = 20
+) -> list[dict]:
+    result = await session.execute(
+        select(*GROUP_READ_COLUMNS).order_by(Group.id).offset(skip).limit(limit)
+    )
+    return [row._asdict() for row in result]
+
+async def list_groups_read_page(
+    session: AsyncSession,
+    limit: int = 20,
+    cursor: str | None = None,
+    sort: str = "created_at",
+    descending: bool = False,
+) -> tuple[list[dict], str | None]:
+    rows, next_cursor = await paginate_keyset(
+        session,
+        select(*GROUP_READ_COLUMNS),
+        sort_column=GROUP_SORT_COLUMNS[sort],
+        id_column=Group.id,
+        limit=limit,
+        cursor=cursor,
+        descending=descending,
+        scope=f"groups:{sort}:{int(descending)}",
+        scalars=False,
+    )
+    return [row._asdict() for row in rows], next_cursor
+
 async def update_group(
     session: AsyncSession, group: Group, group_in: GroupUpdate, current_user: User
 ) -> Group:
@@ -58,7 +132,8 @@ async def update_group(
     for key, value in data.items():
         setattr(group, key, value)
     await session.commit()
-    await session.refresh(group)
+    invalidate_group_responses(group.id)
+    await session.refresh(group, GROUP_REFRESH_ATTRIBUTES)
     return group
 
 async def delete_group(session: AsyncSession, group: Group, current_user: User):
@@ -74,31 +149,109 @@ async def delete_group(session: AsyncSession, group: Group, current_user: User):
         )
     await session.delete(group)
     await session.commit()
+    principal_cache.invalidate_if(lambda _, user: user["group_id"] == group.id)
+    invalidate_group_responses(group.id)
 
 
-async def add_member_to_group(
+async def bulk_update_members(
     session: AsyncSession,
     group: Group,
-    user: User,
-    current_user: User
-) -> User:
-    # Chỉ admin hoặc leader group này mới được add member
+    change: GroupMembersUpdate,
+    current_user: User,
+) -> list[dict]:
+    # Chỉ admin hoặc leader group này mới được thay đổi member
     if not (
-        current_user.role == UserRole.ADMIN or
-        (current_user.group_id == group.id and current_user.group_role == GroupRole.LEADER)
+        current_user.role == UserRole.ADMIN
+        or (
+            current_user.group_id == group.id
+            and current_user.group_role == GroupRole.LEADER
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    # Chỉ admin mới được gán quyền LEADER
+    if (
+        change.action != "remove"
+        and change.role == GroupRole.LEADER
+        and current_user.role != UserRole.ADMIN
     ):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    
-    # Kiểm tra user đã là member group khác chưa
-    if user.group_id is not None and user.group_id != group.id:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User already belongs to another group"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can grant the leader role",
         )
+    user_ids = list(dict.fromkeys(change.user_ids))
+    ids_param = literal(user_ids, ARRAY(Integer))
 
-    # Gán user vào group, set role là member
-    user.group_id = group.id
-    user.group_role = GroupRole.MEMBER
-    await session.commit()
-    await session.refresh(user)
-    return user
\ No newline at end of file
+    # Một query lấy trạng thái hiện tại của tất cả user
+    result = await session.execute(
+        select(User.id, User.group_id, User.group_role).where(
+            User.id == any_(ids_param)
+        )
+    )
+    current = {row.id: row for row in result}
+
+    results: dict[int, dict] = {}
+    pending: list[int] = []
+    for user_id in user_ids:
+        row = current.get(user_id)
+        if row is None:
+            results[user_id] = {"user_id": user_id, "status": "not_found"}
+        elif user_id == current_user.id:
+            # Không tự đổi membership của mình, tránh group mất leader
+            results[user_id] = {
+                "user_id": user_id,
+                "status": "conflict",
+                "detail": "Cannot change your own membership",
+            }
+        elif change.action == "add" and row.group_id not in (None, group.id):
+            results[user_id] = {
+                "user_id": user_id,
+                "status": "conflict",
+                "detail": "User already belongs to another group",
+            }
+        elif change.action != "add" and row.group_id != group.id:
+            results[user_id] = {
+                "user_id": user_id,
+                "status": "conflict",
+                "detail": "User is not a member of this group",
+            }
+        elif change.action != "remove" and (
+            row.group_id == group.id and row.group_role == change.role
+        ):
+            results[user_id] = {"user_id": user_id, "status": "unchanged"}
+        else:
+            pending.append(user_id)
+
+    if pending:
+        if change.action == "remove":
+            values = {"group_id": None, "group_role": None}
+            guard = User.group_id == group.id
+        elif change.action == "add":
+            values = {"group_id": group.id, "group_role": change.role}
+            guard = or_(User.group_id.is_(None), User.group_id == group.id)
+        else:
+            values = {"group_role": change.role}
+            guard = User.group_id == group.id
+        # Một câu UPDATE cho cả batch; guard chặn race với request đồng thời
+        result = await session.execute(
+            update(User)
+            .where(User.id == any_(literal(pending, ARRAY(Integer))), guard)
+            .values(**values)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = set(result.scalars().all())
+        await session.commit()
+        principal_cache.invalidate(*updated)
+        invalidate_group_responses(group.id)
+        for user_id in pending:
+            if user_id in updated:
+                results[user_id] = {"user_id": user_id, "status": "updated"}
+            else:
+                results[user_id] = {
+                    "user_id": user_id,
+                    "status": "conflict",
+                    "detail": "Membership changed concurrently",
+                }
+    return [results[user_id] for user_id in user_ids]
@@ -0,0 +1,193 @@
+"""Hàng đợi kiểm duyệt truyện/chương cho admin và duyệt/từ chối theo lô.
+
+Hàng đợi đọc index partial chỉ chứa dòng PENDING (ix_stories_pending_*,
+ix_chapters_pending_*), cũ nhất trước, phân trang keyset: mỗi trang tốn như
+nhau dù bảng có bao nhiêu dòng đã duyệt. Duyệt một lô là một câu UPDATE
+... RETURNING cho tất cả id; việc phía sau (mục lục, cache trang truyện,
+thông báo cho follower, tạo trước ảnh) chạy một lần cho cả lô thay vì từng
+dòng.
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, any_, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from background import Job, jobs
+from models import ApproveStatus, Chapter, Story, User, UserRole, status_is
+from pagination import paginate_keyset
+from schemas.moderation import ModerationBatch
+from services.notification import fan_out_new_chapters, fan_out_new_stories
+from services.story import invalidate_story_detail
+from services.toc import bump_chapter_version, invalidate_toc
+from services.variant import schedule_chapters_variants
+
+MODERATION_ACTIONS = {
+    "approve": ApproveStatus.APPROVED,
+    "reject": ApproveStatus.REJECTED,
+}
+
+
+def _require_admin(current_user: User):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+
+
+async def list_pending_stories(
+    session: AsyncSession,
+    current_user: User,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list, str | None]:
+    _require_admin(current_user)
+    return await paginate_keyset(
+        session,
+        select(Story.id, Story.title, Story.author, Story.created_at).where(
+            status_is(Story.status, ApproveStatus.PENDING)
+        ),
+        sort_column=Story.created_at,
+        id_column=Story.id,
+        limit=limit,
+        cursor=cursor,
+        scope="moderation:stories",
+        scalars=False,
+    )
+
+
+async def list_pending_chapters(
+    session: AsyncSession,
+    current_user: User,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list, str | None]:
+    _require_admin(current_user)
+    stmt = (
+        select(
+            Chapter.id,
+            Chapter.story_id,
+            Story.title.label("story_title"),
+            Chapter.group_id,
+            Chapter.number,
+            Chapter.title,
+            Chapter.created_at,
+        )
+        .join(Story, Story.id == Chapter.story_id)
+        .where(status_is(Chapter.status, ApproveStatus.PENDING))
+    )
+    return await paginate_keyset(
+        session,
+        stmt,
+        sort_column=Chapter.created_at,
+        id_column=Chapter.id,
+        limit=limit,
+        cursor=cursor,
+        scope="moderation:chapters",
+        scalars=False,
+    )
+
+
+async def _set_status(
+    session: AsyncSession, model, ids: list[int], new_status: ApproveStatus
+) -> list:
+    # Một câu UPDATE cho cả lô; điều kiện PENDING chặn duyệt hai lần khi hai
+    # admin xử lý cùng lô
+    returning = [model.id]
+    if model is Chapter:
+        returning.append(Chapter.story_id)
+    result = await session.execute(
+        update(model)
+        .where(
+            model.id == any_(literal(ids, ARRAY(Integer))),
+            model.status == ApproveStatus.PENDING,
+        )
+        .values(status=new_status)
+        .returning(*returning)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def _results(
+    session: AsyncSession, model, ids: list[int], updated: set[int]
+) -> list[dict]:
+    # Chỉ query thêm khi có id không được cập nhật, để phân biệt không tồn
+    # tại với đã được duyệt/từ chối trước đó
+    skipped = [item_id for item_id in ids if item_id not in updated]
+    current = {}
+    if skipped:
+        result = await session.execute(
+            select(model.id, model.status).where(
+                model.id == any_(literal(skipped, ARRAY(Integer)))
+            )
+        )
+        current = {row.id: row.status for row in result}
+    results = []
+    for item_id in ids:
+        if item_id in updated:
+            results.append({"id": item_id, "status": "updated"})
+        elif item_id in current:
+            results.append(
+                {
+                    "id": item_id,
+                    "status": "conflict",
+                    "detail": f"Already {current[item_id].value}",
+                }
+            )
+        else:
+            results.append({"id": item_id, "status": "not_found"})
+    return results
+
+
+async def moderate_stories(
+    session: AsyncSession, batch: ModerationBatch, current_user: User
+) -> tuple[list[dict], Job | None]:
+    _require_admin(current_user)
+    ids = list(dict.fromkeys(batch.ids))
+    rows = await _set_status(session, Story, ids, MODERATION_ACTIONS[batch.action])
+    await session.commit()
+    updated = [row.id for row in rows]
+    for story_id in updated:
+        invalidate_story_detail(story_id)
+    # Mục lục giữ cờ truyện đã duyệt (services.visibility)
+    invalidate_toc(*updated)
+
+    job = None
+    if updated and batch.action == "approve":
+        # Một job báo truyện mới cho follower của các nhóm dịch, cả lô
+        job = jobs.spawn(
+            "story_fanout",
+            lambda job: fan_out_new_stories(job, updated),
+            owner_id=current_user.id,
+        )
+    return await _results(session, Story, ids, set(updated)), job
+
+
+async def moderate_chapters(
+    session: AsyncSession, batch: ModerationBatch, current_user: User
+) -> tuple[list[dict], Job | None]:
+    _require_admin(current_user)
+    ids = list(dict.fromkeys(batch.ids))
+    rows = await _set_status(session, Chapter, ids, MODERATION_ACTIONS[batch.action])
+    updated = [row.id for row in rows]
+    story_ids = sorted({row.story_id for row in rows})
+    approved = bool(updated) and batch.action == "approve"
+    if approved:
+        # Chương đã duyệt xuất hiện trong mục lục: một lần bump mỗi truyện
+        await bump_chapter_version(session, *story_ids)
+    await session.commit()
+
+    job = None
+    if approved:
+        invalidate_toc(*story_ids)
+        # Một job thông báo cho cả lô, gộp theo truyện
+        job = jobs.spawn(
+            "chapter_fanout",
+            lambda job: fan_out_new_chapters(job, updated),
+            owner_id=current_user.id,
+        )
+        await schedule_chapters_variants(
+            session, [(row.story_id, row.id) for row in rows], current_user.id
+        )
+    return await _results(session, Chapter, ids, set(updated)), job
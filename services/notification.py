@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+
+from sqlalchemy import false, func, literal, select, union, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from background import Job
+from database import AsyncSessionLocal
+from models import (
+    Chapter,
+    Follow,
+    GroupStory,
+    Notification,
+    NotificationCounter,
+    NotificationType,
+    Story,
+)
+from pagination import paginate_keyset
+
+FANOUT_CHUNK_SIZE = int(os.getenv("FANOUT_CHUNK_SIZE", "1000"))
+# Kênh Postgres LISTEN/NOTIFY báo cho các worker có thông báo mới
+NOTIFICATION_CHANNEL = "notifications"
+# Payload NOTIFY tối đa 8000 byte, chia danh sách user id thành nhiều lần gửi
+_NOTIFY_IDS_PER_MESSAGE = 500
+
+
+async def notify_users(session: AsyncSession, user_ids: list[int]) -> None:
+    # pg_notify trong transaction của caller, chỉ được gửi khi commit
+    for start in range(0, len(user_ids), _NOTIFY_IDS_PER_MESSAGE):
+        payload = json.dumps(user_ids[start : start + _NOTIFY_IDS_PER_MESSAGE])
+        await session.execute(select(func.pg_notify(NOTIFICATION_CHANNEL, payload)))
+
+
+def _bump_unread_counters(user_ids):
+    # Upsert +1 vào notification_counters cho mỗi user trong `user_ids`
+    # (select/CTE có cột user_id, không trùng user)
+    stmt = pg_insert(NotificationCounter).from_select(
+        ["user_id", "unread"], select(user_ids.c.user_id, literal(1))
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + stmt.excluded.unread},
+    )
+
+
+async def create_notification(
+    session: AsyncSession,
+    user_id: int,
+    content: str,
+    type: NotificationType = NotificationType.OTHER,
+    link: str | None = None,
+) -> Notification:
+    # Insert một thông báo và tăng counter trong cùng transaction của caller
+    notification = Notification(user_id=user_id, type=type, content=content, link=link)
+    session.add(notification)
+    stmt = pg_insert(NotificationCounter).values(user_id=user_id, unread=1)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread": NotificationCounter.unread + 1},
+        )
+    )
+    await notify_users(session, [user_id])
+    await session.flush()
+    return notification
+
+
+async def get_unread_count(session: AsyncSession, user_id: int) -> int:
+    result = await session.execute(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def list_notifications(
+    session: AsyncSession,
+    user_id: int,
+    limit: int = 20,
+    cursor: str | None = None,
+    unread_only: bool = False,
+) -> tuple[list[Notification], str | None]:
+    stmt = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        stmt = stmt.where(Notification.is_read.is_(False))
+    return await paginate_keyset(
+        session,
+        stmt,
+        sort_column=Notification.id,
+        id_column=Notification.id,
+        limit=limit,
+        cursor=cursor,
+        descending=True,
+        scope=f"notifications:{user_id}:{int(unread_only)}",
+    )
+
+
+async def mark_notifications_read(
+    session: AsyncSession,
+    user_id: int,
+    up_to_id: int | None = None,
+    ids: list[int] | None = None,
+) -> tuple[int, int]:
+    """Đánh dấu đã đọc (tất cả, tới id N, hoặc theo danh sách id) và trừ counter
+    bằng một câu lệnh duy nhất. Trả về (số thông báo vừa đánh dấu, số chưa đọc)."""
+    conditions = [Notification.user_id == user_id, Notification.is_read.is_(False)]
+    if up_to_id is not None:
+        conditions.append(Notification.id <= up_to_id)
+    if ids is not None:
+        conditions.append(Notification.id.in_(ids))
+    marked = (
+        update(Notification)
+        .where(*conditions)
+        .values(is_read=True)
+        .returning(Notification.id)
+        .cte("marked")
+    )
+    marked_count = select(func.count()).select_from(marked).scalar_subquery()
+    counter = (
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=func.greatest(NotificationCounter.unread - marked_count, 0))
+        .returning(NotificationCounter.unread)
+        .cte("counter")
+    )
+    # Đếm từ `marked` chứ không từ dòng counter: user chưa có counter vẫn
+    # nhận đúng số thông báo vừa đánh dấu (số chưa đọc coi như 0)
+    result = await session.execute(
+        select(marked_count, select(counter.c.unread).scalar_subquery())
+    )
+    marked_total, unread = result.one()
+    await session.commit()
+    return marked_total, unread or 0
+
+
+def _followers_after(
+    story_id: int, group_ids: list[int], after_user_id: int, limit: int
+):
+    # Follower của truyện hoặc của một trong các group, user_id > after_user_id,
+    # không trùng. Mỗi truyện/group một nhánh đọc tối đa `limit` dòng theo
+    # index (story_id|group_id, user_id): mỗi chunk tốn như nhau dù có bao
+    # nhiêu follower. Một nhánh chung group_id IN (...) thì Postgres phải đọc
+    # hết follower của các group đó rồi sắp lại mỗi chunk, và user follow
+    # nhiều group chiếm nhiều chỗ trong `limit` dòng của nhánh đó: chunk thiếu
+    # dòng, _fan_out tưởng đã hết follower. DISTINCT giữ cho nhánh nào đủ
+    # `limit` dòng thì chunk cũng đủ.
+    branches = [
+        select(Follow.user_id)
+        .distinct()
+        .where(condition, Follow.user_id > after_user_id)
+        .order_by(Follow.user_id)
+        .limit(limit)
+        for condition in [
+            Follow.story_id == story_id,
+            *(Follow.group_id == group_id for group_id in group_ids),
+        ]
+    ]
+    followers = union(*branches).subquery()
+    return (
+        select(followers.c.user_id)
+        .order_by(followers.c.user_id)
+        .limit(limit)
+        .cte("followers")
+    )
+
+
+async def _fan_out(
+    job: Job,
+    story_id: int,
+    group_ids: list[int],
+    type: NotificationType,
+    content: str,
+    link: str,
+) -> None:
+    after_user_id = 0
+    while True:
+        followers = _followers_after(
+            story_id, group_ids, after_user_id, FANOUT_CHUNK_SIZE
+        )
+        # INSERT ... SELECT theo chunk, mỗi chunk một transaction ngắn; counter
+        # chưa đọc được cộng trong cùng câu lệnh
+        inserted = (
+            pg_insert(Notification)
+            .from_select(
+                ["user_id", "type", "content", "link", "is_read", "created_at"],
+                select(
+                    followers.c.user_id,
+                    literal(type, Notification.type.type),
+                    literal(content),
+                    literal(link),
+                    false(),
+                    func.now(),
+                ),
+            )
+            .returning(Notification.user_id)
+            .cte("inserted")
+        )
+        stmt = (
+            _bump_unread_counters(inserted)
+            .add_cte(inserted)
+            .returning(NotificationCounter.user_id)
+        )
+        async with AsyncSessionLocal() as session:
+            user_ids = (await session.execute(stmt)).scalars().all()
+            await notify_users(session, user_ids)
+            await session.commit()
+        if not user_ids:
+            break
+        after_user_id = max(user_ids)
+        job.advance(len(user_ids))
+        if len(user_ids) < FANOUT_CHUNK_SIZE:
+            break
+        await asyncio.sleep(0)
+
+
+async def fan_out_new_chapter(job: Job, chapter_id: int) -> None:
+    await fan_out_new_chapters(job, [chapter_id])
+
+
+async def fan_out_new_chapters(job: Job, chapter_ids: list[int]) -> None:
+    """Thông báo chương mới cho follower, gộp theo truyện: duyệt nhiều chương
+    của một truyện cùng lúc thì mỗi follower nhận một thông báo, không phải
+    một thông báo mỗi chương."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Chapter.story_id, Chapter.group_id, Chapter.number, Story.title)
+            .join(Story, Story.id == Chapter.story_id)
+            .where(Chapter.id.in_(chapter_ids))
+            .order_by(Chapter.story_id, Chapter.number)
+        )
+        chapters = result.all()
+    by_story: dict[int, list] = {}
+    for chapter in chapters:
+        by_story.setdefault(chapter.story_id, []).append(chapter)
+
+    for story_id, story_chapters in by_story.items():
+        first = story_chapters[0]
+        if len(story_chapters) == 1:
+            content = f"Truyện {first.title} đã có chương {first.number} mới"
+        else:
+            content = (
+                f"Truyện {first.title} đã có {len(story_chapters)} chương mới "
+                f"(chương {first.number}-{story_chapters[-1].number})"
+            )
+        link = f"/stories/{story_id}/chapters/{first.number}"
+        group_ids = sorted({chapter.group_id for chapter in story_chapters})
+        await _fan_out(
+            job, story_id, group_ids, NotificationType.NEW_CHAPTER, content, link
+        )
+
+
+async def fan_out_new_stories(job: Job, story_ids: list[int]) -> None:
+    # Truyện vừa duyệt: báo cho follower của các nhóm dịch đăng truyện
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Story.id, Story.title, GroupStory.group_id)
+            .join(GroupStory, GroupStory.story_id == Story.id)
+            .where(Story.id.in_(story_ids))
+            .order_by(Story.id)
+        )
+        rows = result.all()
+    by_story: dict[int, tuple[str, list[int]]] = {}
+    for row in rows:
+        by_story.setdefault(row.id, (row.title, []))[1].append(row.group_id)
+
+    for story_id, (title, group_ids) in by_story.items():
+        await _fan_out(
+            job,
+            story_id,
+            group_ids,
+            NotificationType.NEW_STORY,
+            f"Truyện mới: {title}",
+            f"/stories/{story_id}",
+        )
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+import asyncpg
+import orjson
+from sqlalchemy import Integer, any_, func, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+
+from database import DATABASE_URL, AsyncSessionLocal
+from models import Notification
+from services.notification import NOTIFICATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "10000"))
+# Số thông báo tối đa đọc cho mỗi user mỗi lần khi client bắt kịp
+SSE_FETCH_BATCH = 100
+# Số user tối đa trong một query đọc thông báo
+SSE_FETCH_USERS = int(os.getenv("SSE_FETCH_USERS", "500"))
+_RECONNECT_DELAY_SECONDS = 2
+
+_EVENT_COLUMNS = (
+    Notification.id,
+    Notification.type,
+    Notification.content,
+    Notification.link,
+    Notification.is_read,
+    Notification.created_at,
+)
+
+
+class _Subscriber:
+    __slots__ = ("user_id", "last_id", "events", "wake")
+
+    def __init__(self, user_id: int, last_id: Optional[int]):
+        self.user_id = user_id
+        # id thông báo cuối đã đưa vào `events`; None: chưa biết, lấy id mới
+        # nhất của user ở lần đọc đầu
+        self.last_id = last_id
+        # Sự kiện SSE đã đọc, chờ stream gửi đi. Subscriber còn sự kiện chưa
+        # gửi thì không được đọc thêm: client chậm không làm phình bộ nhớ
+        self.events: list[str] = []
+        self.wake = asyncio.Event()
+
+
+class NotificationHub:
+    """Một connection LISTEN dùng chung cho cả worker, chuyển NOTIFY tới các
+    stream SSE đang mở của đúng user.
+
+    Stream không giữ connection DB: một task đọc chung gom các subscriber
+    được đánh thức và đọc thông báo mới (id > last_id) của tất cả trong một
+    query, rồi chia cho từng stream. Một đợt fan-out hay reconnect chạm tới
+    hàng nghìn stream vẫn chỉ dùng một connection của pool.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[int, set[_Subscriber]] = {}
+        self._connections = 0
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._fetch_task: Optional[asyncio.Task] = None
+        # Subscriber cần đọc thông báo mới ở lượt đọc tới
+        self._due: set[_Subscriber] = set()
+        self._due_event = asyncio.Event()
+        self._closing = False
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def is_full(self) -> bool:
+        return self._connections >= SSE_MAX_CONNECTIONS
+
+    async def start(self) -> None:
+        self._closing = False
+        await self._connect()
+        self._fetch_task = asyncio.create_task(self._fetch_loop())
+
+    async def stop(self) -> None:
+        self._closing = True
+        for task in (self._reconnect_task, self._fetch_task):
+            if task:
+                task.cancel()
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+        # Cho các stream đang chờ thấy _closing và kết thúc
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.wake.set()
+
+    async def _connect(self) -> None:
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql")
+        self._conn = await asyncpg.connect(dsn.render_as_string(hide_password=False))
+        self._conn.add_termination_listener(self._on_connection_lost)
+        await self._conn.add_listener(NOTIFICATION_CHANNEL, self._on_notify)
+
+    def _on_connection_lost(self, conn) -> None:
+        if self._closing:
+            return
+        logger.warning("notification LISTEN connection lost, reconnecting")
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                logger.exception("notification LISTEN reconnect failed")
+                continue
+            # Có thể đã lỡ NOTIFY trong lúc mất kết nối: đọc lại cho mọi stream
+            for subscribers in self._subscribers.values():
+                self._request(*subscribers)
+            return
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        try:
+            user_ids = json.loads(payload)
+        except ValueError:
+            return
+        for user_id in user_ids:
+            self._request(*self._subscribers.get(user_id, ()))
+
+    def _request(self, *subscribers: _Subscriber) -> None:
+        if subscribers:
+            self._due.update(subscribers)
+            self._due_event.set()
+
+    def _subscribe(self, user_id: int, last_id: Optional[int]) -> Optional[_Subscriber]:
+        # Kiểm tra giới hạn và tăng số connection cùng một chỗ, không có await
+        # ở giữa: các request mở cùng lúc không vượt được SSE_MAX_CONNECTIONS
+        if self.is_full():
+            return None
+        subscriber = _Subscriber(user_id, last_id)
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        self._connections += 1
+        return subscriber
+
+    def _unsubscribe(self, subscriber: _Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+        self._due.discard(subscriber)
+        self._connections -= 1
+
+    async def _fetch_loop(self) -> None:
+        while True:
+            await self._due_event.wait()
+            self._due_event.clear()
+            ready = [subscriber for subscriber in self._due if not subscriber.events]
+            for start in range(0, len(ready), SSE_FETCH_USERS):
+                batch = ready[start : start + SSE_FETCH_USERS]
+                self._due.difference_update(batch)
+                try:
+                    await self._fetch(batch)
+                except Exception:
+                    # DB lỗi hay pool hết chỗ: giữ stream, đọc lại sau
+                    logger.exception("notification fetch failed, retrying")
+                    self._due.update(
+                        subscriber
+                        for subscriber in batch
+                        if subscriber in self._subscribers.get(subscriber.user_id, ())
+                    )
+                    await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+                    self._due_event.set()
+                    break
+
+    async def _fetch(self, batch: list[_Subscriber]) -> None:
+        unresolved = [subscriber for subscriber in batch if subscriber.last_id is None]
+        pending = [subscriber for subscriber in batch if subscriber.last_id is not None]
+        async with AsyncSessionLocal() as session:
+            if unresolved:
+                user_ids = list({subscriber.user_id for subscriber in unresolved})
+                result = await session.execute(
+                    select(Notification.user_id, func.max(Notification.id))
+                    .where(
+                        Notification.user_id == any_(literal(user_ids, ARRAY(Integer)))
+                    )
+                    .group_by(Notification.user_id)
+                )
+                latest = dict(result.all())
+                for subscriber in unresolved:
+                    subscriber.last_id = latest.get(subscriber.user_id, 0)
+            if not pending:
+                return
+            # Mỗi user đọc từ last_id nhỏ nhất trong các stream của user đó
+            after: dict[int, int] = {}
+            for subscriber in pending:
+                after[subscriber.user_id] = min(
+                    after.get(subscriber.user_id, subscriber.last_id),
+                    subscriber.last_id,
+                )
+            targets = (
+                func.unnest(
+                    literal(list(after), ARRAY(Integer)),
+                    literal(list(after.values()), ARRAY(Integer)),
+                )
+                .table_valued("user_id", "last_id")
+                .render_derived()
+            )
+            # LATERAL: mỗi user một lần đọc theo index (user_id, id), tối đa
+            # SSE_FETCH_BATCH dòng
+            rows = (
+                select(Notification.user_id, *_EVENT_COLUMNS)
+                .where(
+                    Notification.user_id == targets.c.user_id,
+                    Notification.id > targets.c.last_id,
+                )
+                .order_by(Notification.id)
+                .limit(SSE_FETCH_BATCH)
+                .lateral()
+            )
+            result = await session.execute(
+                select(rows).select_from(targets.join(rows, true()))
+            )
+            events: dict[int, list[tuple[int, str]]] = {}
+            for row in result:
+                payload = row._asdict()
+                del payload["user_id"]
+                data = orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+                events.setdefault(row.user_id, []).append(
+                    (
+                        row.id,
+                        f"id: {row.id}\nevent: notification\ndata: {data.decode()}\n\n",
+                    )
+                )
+        for user_events in events.values():
+            user_events.sort()
+        for subscriber in pending:
+            user_events = events.get(subscriber.user_id, [])
+            new = [event for event in user_events if event[0] > subscriber.last_id]
+            if new:
+                subscriber.events.extend(event for _, event in new)
+                subscriber.last_id = new[-1][0]
+                subscriber.wake.set()
+            if len(user_events) == SSE_FETCH_BATCH:
+                # Còn thông báo: đọc tiếp sau khi stream gửi xong phần này
+                self._due.add(subscriber)
+
+    async def stream(self, user_id: int, last_id: Optional[int]) -> AsyncIterator[str]:
+        # Sự kiện SSE: "id" là id thông báo, client gửi lại qua Last-Event-ID
+        # khi reconnect để nhận tiếp phần bị lỡ
+        subscriber = self._subscribe(user_id, last_id)
+        if subscriber is None:
+            # Hết chỗ (router đã kiểm tra nhưng request khác vừa chiếm):
+            # đóng stream, bảo client đợi lâu hơn rồi mới mở lại
+            yield f"retry: {SSE_HEARTBEAT_SECONDS * 1000:.0f}\n\n"
+            return
+        try:
+            yield f"retry: {_RECONNECT_DELAY_SECONDS * 1000}\n\n"
+            # Lấy id mới nhất, hoặc đọc phần bị lỡ khi có Last-Event-ID
+            self._request(subscriber)
+            while not self._closing:
+                try:
+                    await asyncio.wait_for(
+                        subscriber.wake.wait(), timeout=SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                subscriber.wake.clear()
+                events, subscriber.events = subscriber.events, []
+                for event in events:
+                    yield event
+                if subscriber in self._due:
+                    # Có NOTIFY mới trong lúc gửi: cho task đọc chạy lại
+                    self._due_event.set()
+        finally:
+            self._unsubscribe(subscriber)
+
+
+notification_hub = NotificationHub()
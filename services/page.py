@@ -0,0 +1,118 @@
+import asyncio
+import io
+import os
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import ApproveStatus, Chapter, ChapterPage, User, UserRole
+from services.variant import schedule_chapter_variants
+from services.visibility import chapter_visible
+from storage import blob_store
+
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", str(10 * 1024 * 1024)))
+MAX_PAGES_PER_CHAPTER = 500
+# Định dạng Pillow -> content type
+IMAGE_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+
+def _inspect_image(data: bytes) -> tuple[str, int, int]:
+    # Chỉ đọc header để lấy định dạng/kích thước, verify() kiểm tra file hỏng
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image"
+        )
+    if image_format not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported image format {image_format}",
+        )
+    return IMAGE_FORMATS[image_format], width, height
+
+
+def _can_edit_chapter(chapter: Chapter, current_user: User) -> bool:
+    return (
+        current_user.role == UserRole.ADMIN or current_user.group_id == chapter.group_id
+    )
+
+
+async def replace_chapter_pages(
+    session: AsyncSession,
+    chapter: Chapter,
+    files: list[UploadFile],
+    current_user: User,
+) -> list[ChapterPage]:
+    """Thay toàn bộ manifest trang của chương theo thứ tự file upload.
+
+    Ảnh trùng nội dung (giữa các trang hoặc với chương khác) chỉ lưu một lần.
+    Blob được ghi trước khi commit; nếu commit lỗi thì blob thừa vô hại và sẽ
+    được dùng lại khi upload lại cùng ảnh.
+    """
+    if not _can_edit_chapter(chapter, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    if not files or len(files) > MAX_PAGES_PER_CHAPTER:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A chapter needs 1 to {MAX_PAGES_PER_CHAPTER} pages",
+        )
+    pages = []
+    for number, file in enumerate(files, start=1):
+        data = await file.read(MAX_PAGE_BYTES + 1)
+        if len(data) > MAX_PAGE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Page {number} is larger than {MAX_PAGE_BYTES} bytes",
+            )
+        content_type, width, height = await asyncio.to_thread(_inspect_image, data)
+        blob_hash, _ = await blob_store.put(data)
+        pages.append(
+            ChapterPage(
+                chapter_id=chapter.id,
+                number=number,
+                blob_hash=blob_hash,
+                content_type=content_type,
+                size=len(data),
+                width=width,
+                height=height,
+            )
+        )
+    await session.execute(
+        delete(ChapterPage).where(ChapterPage.chapter_id == chapter.id)
+    )
+    session.add_all(pages)
+    await session.commit()
+    if chapter.status == ApproveStatus.APPROVED:
+        await schedule_chapter_variants(
+            session, chapter.story_id, chapter.id, current_user.id
+        )
+    return await list_chapter_pages(session, chapter.id, current_user)
+
+
+async def list_chapter_pages(
+    session: AsyncSession, chapter_id: int, current_user: User | None = None
+) -> list[ChapterPage]:
+    # Chương không tồn tại hoặc không xem được: danh sách rỗng
+    result = await session.execute(
+        select(ChapterPage)
+        .options(selectinload(ChapterPage.variants))
+        .where(
+            ChapterPage.chapter_id == chapter_id,
+            chapter_visible(chapter_id, current_user),
+        )
+        .order_by(ChapterPage.number)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,315 @@
+"""Tiến độ đọc và lượt xem chương, ghi theo kiểu write-behind.
+
+Mỗi sự kiện đọc chỉ cập nhật buffer trong process: tiến độ gộp theo
+(user, truyện) (giữ sự kiện mới nhất), lượt xem cộng dồn theo chương. Một
+PeriodicTask flush buffer mỗi READING_FLUSH_INTERVAL giây (hoặc sớm hơn khi
+buffer đạt READING_BUFFER_MAX_KEYS khóa) bằng vài câu upsert/UPDATE theo lô
+READING_FLUSH_MAX_BATCH dòng.
+
+Độ bền: khi tắt worker bình thường, lifespan flush nốt buffer. Nếu process
+chết đột ngột (SIGKILL, OOM, mất điện) thì mất tối đa các sự kiện của
+READING_FLUSH_INTERVAL giây gần nhất trên worker đó. Flush lỗi do kết nối
+(DB tạm không truy cập được) thì dữ liệu được trả lại buffer để lần sau ghi
+tiếp; lỗi do chính dữ liệu (vd. chương đã bị xóa) thì lô đó bị bỏ và ghi
+log, vì ghi lại bao nhiêu lần cũng lỗi như vậy.
+Lượt xem vì vậy là số gần đúng, không dùng cho việc cần chính xác tuyệt đối.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, and_, column, func, select, update, values
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from background import PeriodicTask
+from database import AsyncSessionLocal
+from models import Chapter, ReadingProgress, Story, User
+from services.trending import record_story_event
+
+READING_FLUSH_INTERVAL = float(os.getenv("READING_FLUSH_INTERVAL", "5"))
+READING_FLUSH_MAX_BATCH = int(os.getenv("READING_FLUSH_MAX_BATCH", "1000"))
+READING_BUFFER_MAX_KEYS = int(os.getenv("READING_BUFFER_MAX_KEYS", "50000"))
+
+logger = logging.getLogger(__name__)
+
+# (chapter_id, page, updated_at)
+ProgressEntry = tuple[int, int, datetime]
+
+
+class ReadingBuffer:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # user_id -> {story_id: ProgressEntry}
+        self._progress: dict[int, dict[int, ProgressEntry]] = {}
+        self._progress_keys = 0
+        # chapter_id -> số lượt xem chưa ghi
+        self._views: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._progress_keys + len(self._views)
+
+    def record(
+        self,
+        user_id: int,
+        story_id: int,
+        chapter_id: int,
+        page: int,
+        opened: bool,
+        at: datetime,
+    ) -> None:
+        self._merge_progress(user_id, story_id, (chapter_id, page, at))
+        if opened:
+            self._views[chapter_id] = self._views.get(chapter_id, 0) + 1
+
+    def _merge_progress(self, user_id: int, story_id: int, entry: ProgressEntry):
+        stories = self._progress.setdefault(user_id, {})
+        current = stories.get(story_id)
+        if current is None:
+            self._progress_keys += 1
+        elif current[2] > entry[2]:
+            return
+        stories[story_id] = entry
+
+    def pending_for(self, user_id: int) -> dict[int, ProgressEntry]:
+        return dict(self._progress.get(user_id, {}))
+
+    def drain(self) -> tuple[list[dict], list[dict]]:
+        # Lấy toàn bộ buffer ra để ghi; sắp theo khóa để các worker cùng khóa
+        # dòng theo một thứ tự, tránh deadlock
+        progress = [
+            {
+                "user_id": user_id,
+                "story_id": story_id,
+                "chapter_id": entry[0],
+                "page": entry[1],
+                "updated_at": entry[2],
+            }
+            for user_id, stories in sorted(self._progress.items())
+            for story_id, entry in sorted(stories.items())
+        ]
+        views = [
+            {"chapter_id": chapter_id, "n": n}
+            for chapter_id, n in sorted(self._views.items())
+        ]
+        self._progress = {}
+        self._progress_keys = 0
+        self._views = {}
+        return progress, views
+
+    def restore(self, progress: list[dict], views: list[dict]) -> None:
+        # Trả lại phần chưa ghi được; sự kiện mới hơn trong buffer được giữ
+        for row in progress:
+            self._merge_progress(
+                row["user_id"],
+                row["story_id"],
+                (row["chapter_id"], row["page"], row["updated_at"]),
+            )
+        for row in views:
+            self._views[row["chapter_id"]] = (
+                self._views.get(row["chapter_id"], 0) + row["n"]
+            )
+
+
+def _upsert_progress(rows: list[dict]):
+    batch = values(
+        column("user_id", Integer),
+        column("story_id", Integer),
+        column("chapter_id", Integer),
+        column("page", Integer),
+        column("updated_at", DateTime(timezone=True)),
+        name="batch",
+    ).data(
+        [
+            (
+                row["user_id"],
+                row["story_id"],
+                row["chapter_id"],
+                row["page"],
+                row["updated_at"],
+            )
+            for row in rows
+        ]
+    )
+    # Join chapters/users để bỏ qua sự kiện trỏ tới chương không thuộc truyện,
+    # hoặc user/chương đã bị xóa, thay vì làm hỏng cả lô vì vi phạm FK
+    source = (
+        select(
+            batch.c.user_id,
+            batch.c.story_id,
+            batch.c.chapter_id,
+            batch.c.page,
+            batch.c.updated_at,
+        )
+        .join(
+            Chapter,
+            and_(
+                Chapter.id == batch.c.chapter_id,
+                Chapter.story_id == batch.c.story_id,
+            ),
+        )
+        .join(User, User.id == batch.c.user_id)
+    )
+    stmt = pg_insert(ReadingProgress).from_select(
+        ["user_id", "story_id", "chapter_id", "page", "updated_at"], source
+    )
+    # Worker khác có thể đã ghi sự kiện mới hơn: chỉ ghi đè khi mới hơn
+    return stmt.on_conflict_do_update(
+        index_elements=[ReadingProgress.user_id, ReadingProgress.story_id],
+        set_={
+            "chapter_id": stmt.excluded.chapter_id,
+            "page": stmt.excluded.page,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=ReadingProgress.updated_at < stmt.excluded.updated_at,
+    )
+
+
+def _add_views(rows: list[dict]):
+    # Cộng lượt xem vào chapters rồi dồn theo story_id vào stories, một câu lệnh
+    batch = values(
+        column("chapter_id", Integer), column("n", Integer), name="batch"
+    ).data([(row["chapter_id"], row["n"]) for row in rows])
+    bumped = (
+        update(Chapter)
+        .where(Chapter.id == batch.c.chapter_id)
+        # Giữ nguyên updated_at (onupdate): lượt xem không phải sửa nội dung
+        .values(
+            view_count=Chapter.view_count + batch.c.n,
+            updated_at=Chapter.updated_at,
+        )
+        .returning(Chapter.story_id, batch.c.n)
+        .cte("bumped")
+    )
+    per_story = (
+        select(bumped.c.story_id, func.sum(bumped.c.n).label("n"))
+        .group_by(bumped.c.story_id)
+        .subquery()
+    )
+    return (
+        update(Story)
+        .add_cte(bumped)
+        .where(Story.id == per_story.c.story_id)
+        .values(
+            view_count=Story.view_count + per_story.c.n, updated_at=Story.updated_at
+        )
+        .returning(Story.id, per_story.c.n)
+        .execution_options(synchronize_session=False)
+    )
+
+
+reading_buffer = ReadingBuffer(READING_BUFFER_MAX_KEYS)
+
+
+def _is_transient(error: DBAPIError) -> bool:
+    # Mất kết nối/DB tạm không dùng được: thử lại ở lần flush sau
+    return error.connection_invalidated or isinstance(
+        error, (OperationalError, InterfaceError)
+    )
+
+
+async def flush_reading_buffer() -> None:
+    progress, views = reading_buffer.drain()
+    while progress or views:
+        progress_chunk = progress[:READING_FLUSH_MAX_BATCH]
+        views_chunk = views[:READING_FLUSH_MAX_BATCH]
+        try:
+            async with AsyncSessionLocal() as session:
+                if progress_chunk:
+                    await session.execute(_upsert_progress(progress_chunk))
+                story_views = []
+                if views_chunk:
+                    result = await session.execute(_add_views(views_chunk))
+                    story_views = result.all()
+                await session.commit()
+        except DBAPIError as e:
+            if _is_transient(e):
+                reading_buffer.restore(progress, views)
+                raise
+            # Lỗi dữ liệu: ghi lại cũng lỗi, bỏ lô này để các lô sau vẫn ghi được
+            logger.exception(
+                "dropping reading flush batch (%d progress, %d views)",
+                len(progress_chunk),
+                len(views_chunk),
+            )
+            story_views = []
+        except BaseException:
+            reading_buffer.restore(progress, views)
+            raise
+        # Lượt xem đã được kiểm tra chương/truyện tồn tại mới tính vào trending
+        for story_id, count in story_views:
+            record_story_event(story_id, "view", count)
+        progress = progress[READING_FLUSH_MAX_BATCH:]
+        views = views[READING_FLUSH_MAX_BATCH:]
+
+
+reading_flusher = PeriodicTask(
+    "reading_flush", flush_reading_buffer, READING_FLUSH_INTERVAL
+)
+
+
+def record_reading(
+    user_id: int, story_id: int, chapter_id: int, page: int, opened: bool
+) -> None:
+    reading_buffer.record(
+        user_id, story_id, chapter_id, page, opened, datetime.now(timezone.utc)
+    )
+    if len(reading_buffer) >= reading_buffer.max_keys:
+        reading_flusher.wake()
+
+
+def _progress_item(story_id: int, entry: ProgressEntry) -> dict:
+    chapter_id, page, updated_at = entry
+    return {
+        "story_id": story_id,
+        "chapter_id": chapter_id,
+        "page": page,
+        "updated_at": updated_at,
+    }
+
+
+async def list_reading_progress(
+    session: AsyncSession, user_id: int, limit: int = 20
+) -> list[dict]:
+    # Truyện đọc gần đây nhất; gộp cả sự kiện còn trong buffer của worker này
+    # để user thấy ngay tiến độ vừa gửi
+    result = await session.execute(
+        select(
+            ReadingProgress.story_id,
+            ReadingProgress.chapter_id,
+            ReadingProgress.page,
+            ReadingProgress.updated_at,
+        )
+        .where(ReadingProgress.user_id == user_id)
+        .order_by(ReadingProgress.updated_at.desc())
+        .limit(limit)
+    )
+    items = {row.story_id: row._asdict() for row in result}
+    for story_id, entry in reading_buffer.pending_for(user_id).items():
+        current = items.get(story_id)
+        if current is None or current["updated_at"] < entry[2]:
+            items[story_id] = _progress_item(story_id, entry)
+    items = sorted(items.values(), key=lambda item: item["updated_at"], reverse=True)
+    return items[:limit]
+
+
+async def get_reading_progress(
+    session: AsyncSession, user_id: int, story_id: int
+) -> dict | None:
+    entry = reading_buffer.pending_for(user_id).get(story_id)
+    if entry is not None:
+        return _progress_item(story_id, entry)
+    result = await session.execute(
+        select(
+            ReadingProgress.story_id,
+            ReadingProgress.chapter_id,
+            ReadingProgress.page,
+            ReadingProgress.updated_at,
+        ).where(
+            ReadingProgress.user_id == user_id, ReadingProgress.story_id == story_id
+        )
+    )
+    row = result.one_or_none()
+    return row._asdict() if row else None
@@ -0,0 +1,335 @@
+import os
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import (
+    ApproveStatus,
+    Follow,
+    Group,
+    GroupStory,
+    Story,
+    StoryTag,
+    Tag,
+    User,
+    UserRole,
+    status_is,
+)
+from pagination import paginate_keyset
+from schemas.story import StoryCreate, StoryRead, StoryUpdate
+from singleflight import SingleFlight
+from services.toc import get_story_toc
+from services.trending import record_story_event
+from services.visibility import can_view_unapproved
+
+MAX_TAGS_PER_STORY = 20
+TAGS_DISPLAY_LENGTH = Story.__table__.c.tags.type.length
+MAX_FACETS = 20
+# description là cột deferred: refresh() mặc định bỏ qua, nên liệt kê rõ các
+# cột StoryRead cần khi trả về entity
+STORY_REFRESH_ATTRIBUTES = list(StoryRead.model_fields)
+
+# Phần chung (không theo user) của trang truyện, tải single-flight và giữ
+# STORY_DETAIL_TTL giây; TTL ngắn vì follower_count, view_count,
+# comment_count đổi liên tục và không invalidate theo từng lần
+story_details = SingleFlight(
+    ttl=float(os.getenv("STORY_DETAIL_TTL", "5")),
+    maxsize=int(os.getenv("STORY_DETAIL_CACHE_SIZE", "2000")),
+)
+STORY_DETAIL_COLUMNS = (
+    Story.id,
+    Story.title,
+    Story.description,
+    Story.tags,
+    Story.author,
+    Story.status,
+    Story.view_count,
+    Story.comment_count,
+    Story.created_at,
+    Story.updated_at,
+)
+
+
+def invalidate_story_detail(story_id: int) -> None:
+    story_details.forget_if(lambda key: key[1] == story_id)
+
+
+def normalize_tags(raw: str | None) -> list[str]:
+    # "Action,  fantasy ,action" -> ["action", "fantasy"]
+    # Bản hiển thị stories.tags là các tag nối bằng ", " nên có thể dài hơn
+    # chuỗi nhập; bỏ các tag cuối không còn vừa cột
+    tags: list[str] = []
+    length = -len(", ")
+    for part in (raw or "").split(","):
+        name = re.sub(r"\s+", " ", part).strip().lower()[:50]
+        if not name or name in tags:
+            continue
+        if (
+            len(tags) == MAX_TAGS_PER_STORY
+            or length + len(", ") + len(name) > TAGS_DISPLAY_LENGTH
+        ):
+            break
+        tags.append(name)
+        length += len(", ") + len(name)
+    return tags
+
+
+async def _sync_story_tags(session: AsyncSession, story: Story, tags: list[str]):
+    # Đồng bộ story_tags theo danh sách tag mới bằng vài câu set-based
+    tag_ids: list[int] = []
+    if tags:
+        await session.execute(
+            pg_insert(Tag)
+            .values([{"name": name} for name in tags])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+        )
+        result = await session.execute(select(Tag.id).where(Tag.name.in_(tags)))
+        tag_ids = list(result.scalars().all())
+    await session.execute(
+        delete(StoryTag).where(
+            StoryTag.story_id == story.id, StoryTag.tag_id.not_in(tag_ids)
+        )
+    )
+    if tag_ids:
+        await session.execute(
+            pg_insert(StoryTag)
+            .values([{"story_id": story.id, "tag_id": tag_id} for tag_id in tag_ids])
+            .on_conflict_do_nothing()
+        )
+    story.tags = ", ".join(tags) or None
+
+
+async def get_story_by_id(session: AsyncSession, story_id: int) -> Story | None:
+    result = await session.execute(select(Story).where(Story.id == story_id))
+    return result.scalar_one_or_none()
+
+
+async def _can_edit_story(session: AsyncSession, story: Story, current_user: User):
+    if current_user.role == UserRole.ADMIN:
+        return True
+    if current_user.group_id is None:
+        return False
+    result = await session.execute(
+        select(GroupStory.id).where(
+            GroupStory.story_id == story.id,
+            GroupStory.group_id == current_user.group_id,
+        )
+    )
+    return result.first() is not None
+
+
+async def create_story(
+    session: AsyncSession, story_in: StoryCreate, current_user: User
+) -> Story:
+    # Admin hoặc thành viên nhóm dịch mới được đăng truyện
+    if current_user.role != UserRole.ADMIN and current_user.group_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    tags = normalize_tags(story_in.tags)
+    story = Story(**story_in.model_dump(exclude={"tags"}))
+    session.add(story)
+    await session.flush()
+    if current_user.group_id is not None:
+        session.add(GroupStory(group_id=current_user.group_id, story_id=story.id))
+    await _sync_story_tags(session, story, tags)
+    await session.commit()
+    await session.refresh(story, STORY_REFRESH_ATTRIBUTES)
+    return story
+
+
+async def update_story(
+    session: AsyncSession, story: Story, story_in: StoryUpdate, current_user: User
+) -> Story:
+    if not await _can_edit_story(session, story, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    data = story_in.model_dump(exclude_unset=True)
+    if "tags" in data:
+        await _sync_story_tags(session, story, normalize_tags(data.pop("tags")))
+    for key, value in data.items():
+        setattr(story, key, value)
+    await session.commit()
+    invalidate_story_detail(story.id)
+    await session.refresh(story, STORY_REFRESH_ATTRIBUTES)
+    return story
+
+
+async def _load_story_detail(bind, story_id: int) -> dict | None:
+    # Session riêng cùng engine với caller: kết quả dùng chung cho mọi request
+    # đang chờ, không gắn với session (và vòng đời) của request nào
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        follower_count = (
+            select(func.count())
+            .where(Follow.story_id == story_id)
+            .scalar_subquery()
+            .label("follower_count")
+        )
+        result = await session.execute(
+            select(*STORY_DETAIL_COLUMNS, follower_count).where(Story.id == story_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        result = await session.execute(
+            select(Group.id, Group.name, Group.avatar)
+            .join(GroupStory, GroupStory.group_id == Group.id)
+            .where(GroupStory.story_id == story_id)
+            .order_by(GroupStory.joined_at, Group.id)
+        )
+        detail = row._asdict()
+        detail["groups"] = [group._asdict() for group in result]
+        return detail
+
+
+async def get_story_detail(
+    session: AsyncSession, story_id: int, current_user: User | None = None
+) -> dict | None:
+    """Trang truyện: thông tin truyện, nhóm dịch, số follower, mục lục và
+    trạng thái follow của người gọi.
+
+    Cache nguội: 4 query (truyện + follower_count, nhóm dịch, version, mục
+    lục), cache nóng: 0; thêm 1 query trạng thái follow nếu đã đăng nhập.
+    Phần dùng chung đọc qua engine của `session` và cache theo engine, như
+    services.group.get_group_read: request vừa ghi (đọc primary) không nhận
+    dữ liệu cũ từ replica.
+    """
+    bind = session.bind
+    shared = await story_details.do(
+        (id(bind), story_id), lambda: _load_story_detail(bind, story_id)
+    )
+    if shared is None:
+        return None
+    if shared["status"] != ApproveStatus.APPROVED and not can_view_unapproved(
+        current_user, {group["id"] for group in shared["groups"]}
+    ):
+        # Truyện chờ duyệt/bị từ chối chỉ admin và nhóm dịch của truyện xem được
+        return None
+    toc = await get_story_toc(session, story_id)
+    if toc is None:
+        return None
+    detail = dict(shared)
+    detail["chapters"] = [entry._asdict() for entry in toc.entries]
+    if current_user is not None:
+        detail["is_following"] = await session.scalar(
+            select(
+                exists().where(
+                    Follow.user_id == current_user.id, Follow.story_id == story_id
+                )
+            )
+        )
+    return detail
+
+
+async def follow_story(session: AsyncSession, story_id: int, current_user: User):
+    if await session.scalar(select(Story.id).where(Story.id == story_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Story not found"
+        )
+    result = await session.execute(
+        pg_insert(Follow)
+        .values(user_id=current_user.id, story_id=story_id)
+        .on_conflict_do_nothing(
+            index_elements=[Follow.user_id, Follow.story_id],
+            index_where=Follow.story_id.is_not(None),
+        )
+        .returning(Follow.id)
+    )
+    created = result.first() is not None
+    await session.commit()
+    if created:
+        record_story_event(story_id, "follow")
+
+
+async def unfollow_story(session: AsyncSession, story_id: int, current_user: User):
+    await session.execute(
+        delete(Follow).where(
+            Follow.user_id == current_user.id, Follow.story_id == story_id
+        )
+    )
+    await session.commit()
+
+
+async def search_stories(
+    session: AsyncSession,
+    q: str | None = None,
+    tags: list[str] | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> dict:
+    """Tìm truyện đã duyệt theo full-text (title > author > description) và tag.
+
+    Có `q` thì xếp theo độ liên quan (ts_rank_cd), không có thì truyện mới
+    nhất trước; cả hai đều phân trang keyset. Facet tag chỉ tính ở trang đầu
+    và khi có điều kiện lọc (đếm tag trên toàn bộ truyện quá tốn).
+    """
+    # Hằng số APPROVED để dùng được ix_stories_approved_created_id
+    filters = [status_is(Story.status, ApproveStatus.APPROVED)]
+    # Bỏ trùng giữa các tham số tag (?tag=action&tag=Action), nếu không
+    # HAVING count() = len(tag_names) không bao giờ khớp
+    tag_names = list(
+        dict.fromkeys(name for raw in tags or [] for name in normalize_tags(raw))
+    )
+    if tag_names:
+        # Truyện phải có đủ tất cả tag được chọn
+        filters.append(
+            Story.id.in_(
+                select(StoryTag.story_id)
+                .join(Tag, Tag.id == StoryTag.tag_id)
+                .where(Tag.name.in_(tag_names))
+                .group_by(StoryTag.story_id)
+                .having(func.count() == len(tag_names))
+            )
+        )
+    columns = [Story.id, Story.title, Story.author, Story.tags]
+    if q:
+        query = func.websearch_to_tsquery("simple", q)
+        filters.append(Story.search_vector.op("@@")(query))
+        sort_column = func.ts_rank_cd(Story.search_vector, query).label("rank")
+        stmt = select(*columns, sort_column)
+        scope = "stories:search:rank"
+    else:
+        sort_column = Story.created_at
+        stmt = select(*columns, sort_column, literal(0.0).label("rank"))
+        scope = "stories:search:new"
+
+    rows, next_cursor = await paginate_keyset(
+        session,
+        stmt.where(*filters),
+        sort_column=sort_column,
+        id_column=Story.id,
+        limit=limit,
+        cursor=cursor,
+        descending=True,
+        scope=scope,
+        scalars=False,
+    )
+    items = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "author": row.author,
+            "tags": row.tags,
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+
+    facets = None
+    if cursor is None and (q or tag_names):
+        matched = select(Story.id).where(*filters)
+        count = func.count().label("count")
+        result = await session.execute(
+            select(Tag.name, count)
+            .join(StoryTag, StoryTag.tag_id == Tag.id)
+            .where(StoryTag.story_id.in_(matched))
+            .group_by(Tag.name)
+            .order_by(count.desc(), Tag.name)
+            .limit(MAX_FACETS)
+        )
+        facets = [{"name": row.name, "count": row.count} for row in result]
+    return {"items": items, "next_cursor": next_cursor, "facets": facets}
@@ -0,0 +1,165 @@
+"""Mục lục truyện (chương đã duyệt) và chương trước/sau, phục vụ từ cache.
+
+Mỗi truyện cache một tuple gọn (id, số chương, tên, group) đã sắp xếp, kèm
+stories.chapter_version lúc tải. Trong TOC_FRESH_SECONDS entry được dùng
+thẳng không chạm DB; quá hạn thì chỉ đọc lại chapter_version (một dòng theo
+khóa chính) và tải lại mục lục khi version đổi. Nơi thêm/duyệt/xóa chương
+gọi bump_chapter_version trong transaction ghi và invalidate_toc sau commit:
+worker ghi thấy ngay, worker khác chậm tối đa TOC_FRESH_SECONDS.
+"""
+
+import os
+import time
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional
+
+import orjson
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from models import ApproveStatus, Chapter, Story
+from singleflight import SingleFlight
+
+TOC_FRESH_SECONDS = float(os.getenv("TOC_FRESH_SECONDS", "5"))
+toc_cache = TTLCache(maxsize=int(os.getenv("TOC_CACHE_SIZE", "5000")), ttl=3600)
+
+# Theo story id: một lần kiểm tra/tải lại mục lục cho mọi request đang chờ
+toc_refreshes = SingleFlight()
+# Tăng mỗi lần invalidate_toc, xem _refresh_toc
+_generation = 0
+
+
+class TocEntry(NamedTuple):
+    id: int
+    number: int
+    title: Optional[str]
+    group_id: int
+
+
+class StoryToc:
+    __slots__ = (
+        "version",
+        "approved",
+        "checked_at",
+        "entries",
+        "numbers",
+        "positions",
+        "_body",
+    )
+
+    def __init__(self, version: int, approved: bool, entries: tuple[TocEntry, ...]):
+        self.version = version
+        # Truyện đã duyệt chưa; mục lục truyện chưa duyệt không công khai
+        # (xem services.visibility)
+        self.approved = approved
+        self.checked_at = time.monotonic()
+        # Sắp theo (number, id); cùng số chương có thể có bản của nhiều group
+        self.entries = entries
+        self.numbers = [entry.number for entry in entries]
+        self.positions = {entry.id: index for index, entry in enumerate(entries)}
+        self._body: Optional[bytes] = None
+
+    def json(self) -> bytes:
+        # Mục lục dài (vài nghìn chương) serialize một lần cho mỗi version
+        if self._body is None:
+            self._body = orjson.dumps([entry._asdict() for entry in self.entries])
+        return self._body
+
+    def navigation(self, chapter_id: int) -> Optional[dict]:
+        """Chương hiện tại và chương liền trước/sau theo số chương, ưu tiên
+        bản cùng group; None nếu chương không có trong mục lục."""
+        position = self.positions.get(chapter_id)
+        if position is None:
+            return None
+        current = self.entries[position]
+        start = bisect_left(self.numbers, current.number)
+        end = bisect_right(self.numbers, current.number)
+        prev_entry = next_entry = None
+        if start > 0:
+            number = self.numbers[start - 1]
+            prev_entry = self._pick(bisect_left(self.numbers, number), start, current)
+        if end < len(self.entries):
+            number = self.numbers[end]
+            next_entry = self._pick(end, bisect_right(self.numbers, number), current)
+        return {
+            "prev": prev_entry._asdict() if prev_entry else None,
+            "current": current._asdict(),
+            "next": next_entry._asdict() if next_entry else None,
+        }
+
+    def _pick(self, start: int, end: int, current: TocEntry) -> TocEntry:
+        for entry in self.entries[start:end]:
+            if entry.group_id == current.group_id:
+                return entry
+        return self.entries[start]
+
+
+async def _refresh_toc(
+    bind, story_id: int, toc: Optional[StoryToc]
+) -> Optional[StoryToc]:
+    generation = _generation
+    key = (id(bind), story_id)
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        # Đọc version trước mục lục: thay đổi chen giữa hai câu chỉ làm lần
+        # kiểm tra sau tải lại, không bao giờ giữ mục lục cũ với version mới
+        result = await session.execute(
+            select(Story.chapter_version, Story.status).where(Story.id == story_id)
+        )
+        story = result.one_or_none()
+        if story is None:
+            toc_cache.invalidate(key)
+            return None
+        version = story.chapter_version
+        approved = story.status == ApproveStatus.APPROVED
+        if toc is not None and toc.version == version:
+            toc.approved = approved
+            toc.checked_at = time.monotonic()
+            return toc
+        result = await session.execute(
+            select(Chapter.id, Chapter.number, Chapter.title, Chapter.group_id)
+            .where(
+                Chapter.story_id == story_id,
+                Chapter.status == ApproveStatus.APPROVED,
+            )
+            .order_by(Chapter.number, Chapter.id)
+        )
+        toc = StoryToc(version, approved, tuple(TocEntry(*row) for row in result))
+    # Có invalidate trong lúc tải thì dữ liệu vừa đọc có thể đã cũ: trả cho
+    # các request đang chờ nhưng không cache
+    if generation == _generation:
+        toc_cache.set(key, toc)
+    return toc
+
+
+async def get_story_toc(session: AsyncSession, story_id: int) -> Optional[StoryToc]:
+    # None nếu truyện không tồn tại. Đọc qua engine của `session` (primary
+    # hoặc replica) và cache theo engine: request vừa ghi đọc primary nên
+    # thấy ngay chương mình vừa duyệt
+    bind = session.bind
+    key = (id(bind), story_id)
+    toc = toc_cache.get(key)
+    if toc is not None and time.monotonic() - toc.checked_at < TOC_FRESH_SECONDS:
+        return toc
+    # Single-flight: chương mới ra kéo hàng trăm người đọc cùng lúc nhưng chỉ
+    # một lần kiểm tra/tải lại mục lục; session riêng vì kết quả dùng chung
+    return await toc_refreshes.do(key, lambda: _refresh_toc(bind, story_id, toc))
+
+
+async def bump_chapter_version(session: AsyncSession, *story_ids: int) -> None:
+    # Gọi trong transaction thay đổi chương; giữ nguyên updated_at của truyện
+    await session.execute(
+        update(Story)
+        .where(Story.id.in_(story_ids))
+        .values(chapter_version=Story.chapter_version + 1, updated_at=Story.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_toc(*story_ids: int) -> None:
+    # Gọi sau commit để worker này không phục vụ mục lục cũ
+    global _generation
+    _generation += 1
+    story_ids = set(story_ids)
+    toc_cache.invalidate_if(lambda key, _: key[1] in story_ids)
+    toc_refreshes.forget_if(lambda key: key[1] in story_ids)
@@ -0,0 +1,237 @@
+"""Bảng xếp hạng trending của truyện, cập nhật tăng dần theo sự kiện.
+
+Dùng forward decay: sự kiện trọng số w lúc t đóng góp w * exp((t - EPOCH) / tau)
+và không bao giờ phải tính lại khi thời gian trôi, vì mọi truyện cùng chia
+một hệ số exp(-(now - EPOCH) / tau). Giá trị đó tăng theo thời gian nên lưu
+dạng log (log-sum-exp) để không tràn số; muốn ra điểm hiện tại chỉ cần
+exp(score - (now - EPOCH) / tau).
+
+Sự kiện được gộp trong buffer của worker (đã ở dạng log) rồi flush bằng
+một câu upsert cho mỗi lô; top-K của mỗi cửa sổ được đọc lại định kỳ theo
+index và giữ trong bộ nhớ để phục vụ GET /stories/trending. Giống
+services.reading, worker chết đột ngột mất tối đa một chu kỳ sự kiện.
+"""
+
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import Float, Integer, column, func, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from background import PeriodicTask
+from database import AsyncSessionLocal
+from models import ApproveStatus, Story, StoryTrending, TrendingSnapshot
+
+TRENDING_INTERVAL = float(os.getenv("TRENDING_INTERVAL", "15"))
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "100"))
+TRENDING_SNAPSHOT_INTERVAL = float(os.getenv("TRENDING_SNAPSHOT_INTERVAL", "3600"))
+TRENDING_FLUSH_MAX_BATCH = 1000
+# Key advisory lock để chỉ một worker chụp snapshot mỗi chu kỳ
+TRENDING_SNAPSHOT_LOCK_KEY = 0x7472656E64
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Thời gian suy giảm e lần của từng cửa sổ (giây)
+DECAY_SECONDS = {"day": 86400.0, "week": 7 * 86400.0}
+WINDOWS = ("day", "week", "all")
+EVENT_WEIGHTS = {"view": 1.0, "comment": 3.0, "follow": 5.0, "donate": 10.0}
+# exp(-50) ~ 2e-22: bỏ qua phần nhỏ hơn, tránh lỗi underflow của exp() trong Postgres
+_MIN_LOG_DIFF = -50.0
+
+
+def _offset(at: datetime, window: str) -> float:
+    return (at - TRENDING_EPOCH).total_seconds() / DECAY_SECONDS[window]
+
+
+def _log_add(a: float | None, b: float) -> float:
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _sql_log_add(a, b):
+    high = func.greatest(a, b)
+    low = func.least(a, b)
+    return high + func.ln(1 + func.exp(func.greatest(low - high, _MIN_LOG_DIFF)))
+
+
+class TrendingBuffer:
+    def __init__(self):
+        # story_id -> [log day, log week, tổng all]
+        self._scores: dict[int, list[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def add(self, story_id: int, weight: float, at: datetime) -> None:
+        log_weight = math.log(weight)
+        day = log_weight + _offset(at, "day")
+        week = log_weight + _offset(at, "week")
+        current = self._scores.get(story_id)
+        if current is None:
+            self._scores[story_id] = [day, week, weight]
+        else:
+            current[0] = _log_add(current[0], day)
+            current[1] = _log_add(current[1], week)
+            current[2] += weight
+
+    def drain(self) -> list[tuple[int, float, float, float]]:
+        rows = [
+            (story_id, *scores) for story_id, scores in sorted(self._scores.items())
+        ]
+        self._scores = {}
+        return rows
+
+    def restore(self, rows: list[tuple[int, float, float, float]]) -> None:
+        for story_id, day, week, total in rows:
+            current = self._scores.get(story_id)
+            if current is None:
+                self._scores[story_id] = [day, week, total]
+            else:
+                current[0] = _log_add(current[0], day)
+                current[1] = _log_add(current[1], week)
+                current[2] += total
+
+
+trending_buffer = TrendingBuffer()
+# window -> danh sách top-K đã sắp, thay nguyên cả list mỗi lần refresh
+_top: dict[str, list[dict]] = {window: [] for window in WINDOWS}
+_last_snapshot_at: float | None = None
+
+
+def record_story_event(
+    story_id: int, kind: str, count: int = 1, at: datetime | None = None
+) -> None:
+    # Gọi từ các service (lượt xem, follow, bình luận, donate); chỉ ghi buffer
+    if count <= 0:
+        return
+    trending_buffer.add(
+        story_id, EVENT_WEIGHTS[kind] * count, at or datetime.now(timezone.utc)
+    )
+
+
+def _upsert_scores(rows: list[tuple[int, float, float, float]]):
+    batch = values(
+        column("story_id", Integer),
+        column("score_day", Float),
+        column("score_week", Float),
+        column("score_all", Float),
+        name="batch",
+    ).data(rows)
+    # Join stories: bỏ qua truyện đã bị xóa thay vì làm hỏng cả lô
+    source = select(
+        batch.c.story_id,
+        batch.c.score_day,
+        batch.c.score_week,
+        batch.c.score_all,
+        func.now(),
+    ).join(Story, Story.id == batch.c.story_id)
+    stmt = pg_insert(StoryTrending).from_select(
+        ["story_id", "score_day", "score_week", "score_all", "updated_at"], source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[StoryTrending.story_id],
+        set_={
+            "score_day": _sql_log_add(StoryTrending.score_day, stmt.excluded.score_day),
+            "score_week": _sql_log_add(
+                StoryTrending.score_week, stmt.excluded.score_week
+            ),
+            "score_all": StoryTrending.score_all + stmt.excluded.score_all,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+async def flush_trending_buffer() -> None:
+    rows = trending_buffer.drain()
+    while rows:
+        chunk = rows[:TRENDING_FLUSH_MAX_BATCH]
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(_upsert_scores(chunk))
+                await session.commit()
+        except BaseException:
+            trending_buffer.restore(rows)
+            raise
+        rows = rows[TRENDING_FLUSH_MAX_BATCH:]
+
+
+def _current_score(window: str, stored: float, now: datetime) -> float:
+    if window == "all":
+        return stored
+    return math.exp(stored - _offset(now, window))
+
+
+async def refresh_trending_top() -> None:
+    now = datetime.now(timezone.utc)
+    top: dict[str, list[dict]] = {}
+    async with AsyncSessionLocal() as session:
+        for window in WINDOWS:
+            score_column = getattr(StoryTrending, f"score_{window}")
+            result = await session.execute(
+                select(Story.id, Story.title, Story.author, Story.tags, score_column)
+                .select_from(StoryTrending)
+                .join(Story, Story.id == StoryTrending.story_id)
+                .where(Story.status == ApproveStatus.APPROVED)
+                .order_by(score_column.desc())
+                .limit(TRENDING_TOP_K)
+            )
+            top[window] = [
+                {
+                    "id": row.id,
+                    "title": row.title,
+                    "author": row.author,
+                    "tags": row.tags,
+                    "score": _current_score(window, row[4], now),
+                }
+                for row in result
+            ]
+    _top.update(top)
+
+
+async def _take_snapshot() -> None:
+    async with AsyncSessionLocal() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(TRENDING_SNAPSHOT_LOCK_KEY))
+        )
+        if not locked:
+            return
+        # Worker khác có thể vừa chụp xong
+        last = await session.scalar(select(func.max(TrendingSnapshot.taken_at)))
+        now = datetime.now(timezone.utc)
+        if last and (now - last).total_seconds() < TRENDING_SNAPSHOT_INTERVAL:
+            return
+        session.add_all(
+            TrendingSnapshot(
+                period=window,
+                taken_at=now,
+                rank=rank,
+                story_id=item["id"],
+                score=item["score"],
+            )
+            for window in WINDOWS
+            for rank, item in enumerate(_top[window], start=1)
+        )
+        await session.commit()
+
+
+async def run_trending_cycle() -> None:
+    global _last_snapshot_at
+    await flush_trending_buffer()
+    await refresh_trending_top()
+    due = (
+        _last_snapshot_at is None
+        or time.monotonic() - _last_snapshot_at >= TRENDING_SNAPSHOT_INTERVAL
+    )
+    if due and any(_top.values()):
+        _last_snapshot_at = time.monotonic()
+        await _take_snapshot()
+
+
+trending_task = PeriodicTask("trending", run_trending_cycle, TRENDING_INTERVAL)
+
+
+def get_trending(window: str, limit: int) -> list[dict]:
+    return _top[window][:limit]
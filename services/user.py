@@ -1,26 +1,76 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
-from models import User, UserRole, UserStatus
+from cache import principal_cache
+from models import User, UserPurgeJob, UserRole, UserStatus
 from schemas.user import UserCreate, UserRead, UserUpdate
+from services.user_purge import DELETED_USERNAME, create_purge_job, user_purge_task
+from singleflight import SingleFlight
+
+# Read path: chỉ select các cột UserRead cần, trả dict thay vì ORM entity
+USER_READ_COLUMNS = tuple(getattr(User, name) for name in UserRead.model_fields)
+# get_user_read_by_username: gộp lookup trùng, giữ kết quả USER_READ_TTL giây
+user_reads = SingleFlight(ttl=float(os.getenv("USER_READ_TTL", "1")))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt tốn ~200ms CPU mỗi lần, chạy trong thread pool riêng (bcrypt nhả GIL)
+# để không chặn event loop. Quá PASSWORD_HASH_MAX_PENDING job đang chờ thì từ chối ngay.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_pending = 0
+
+
+async def _run_password_job(func, *args):
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+def shutdown_password_hasher():
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_password_hash(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str | None) -> bool:
+    if not hashed_password:
+        return False
+    return await _run_password_job(pwd_context.verify, plain_password, hashed_password)
 
 
 async def create_user(session: AsyncSession, user_in: UserCreate) -> User:
+    # Tên của user hệ thống (services.user_purge) không cho đăng ký
+    if user_in.username == DELETED_USERNAME:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username or Email already exists!",
+        )
     user_dict: dict = {
         **user_in.model_dump(),
-        "hashed_password": get_password_hash(user_in.password),
+        "hashed_password": await get_password_hash(user_in.password),
     }
     user_dict.pop("password")
     user = User(**user_dict)
@@ -48,6 +98,37 @@ async def get_user_by_username(session: AsyncSession, username: str) -> User | N
     return result.scalar_one_or_none()
 
 
+async def get_user_read_by_id(session: AsyncSession, user_id: int) -> dict | None:
+    result = await session.execute(
+        select(*USER_READ_COLUMNS).where(User.id == user_id)
+    )
+    row = result.one_or_none()
+    return row._asdict() if row else None
+
+
+async def get_user_read_by_username(
+    session: AsyncSession, username: str
+) -> dict | None:
+    # Gộp các lookup trùng đang chạy, như services.group.get_group_read.
+    # Dict trả về dùng chung, không được sửa (xem user_row_safe).
+    bind = session.bind
+
+    async def load():
+        async with AsyncSession(bind, expire_on_commit=False) as shared:
+            result = await shared.execute(
+                select(*USER_READ_COLUMNS).where(User.username == username)
+            )
+            row = result.one_or_none()
+            return row._asdict() if row else None
+
+    return await user_reads.do((id(bind), username), load)
+
+
+def forget_user_reads(username: str):
+    # Gọi sau commit khi user đổi/xóa để lookup sau đọc lại từ DB
+    user_reads.forget_if(lambda key: key[1] == username)
+
+
 async def update_user_details(
     session: AsyncSession, user_id: int, user_in: UserUpdate, current_user: User
 ) -> User:
@@ -61,6 +142,11 @@ async def update_user_details(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
+    # User hệ thống phải giữ không có mật khẩu (xem get_deleted_user_id)
+    if user.username == DELETED_USERNAME:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="System user"
+        )
     # Prevent role escalation to admin
     data = user_in.model_dump(exclude_unset=True)
     # if "role" in data:
@@ -69,11 +155,13 @@ async def update_user_details(
     #         detail="You are not allowed to set role",
     #     )
     if "password" in data and data["password"]:
-        data["hashed_password"] = get_password_hash(data.pop("password"))
+        data["hashed_password"] = await get_password_hash(data.pop("password"))
     for key, value in data.items():
         setattr(user, key, value)
     try:
         await session.commit()
+        principal_cache.invalidate(user.id)
+        forget_user_reads(user.username)
         await session.refresh(user)
         return user
     except IntegrityError:
@@ -84,32 +172,58 @@ async def update_user_details(
         )
 
 
-def user_read_safe(user: User, current_user: User) -> UserRead:
-    user_copy = user
-    # Ẩn email nếu không phải chính chủ hoặc admin
-    if current_user.id != user.id and current_user.role != UserRole.ADMIN:
-        user_copy.email = None
-    return UserRead.model_validate(user_copy)
+def user_row_safe(user: dict, current_user: User) -> dict:
+    # Ẩn email nếu không phải chính chủ hoặc admin. Trả bản copy vì dict có
+    # thể đang dùng chung giữa các request (get_user_read_by_username)
+    if current_user.id != user["id"] and current_user.role != UserRole.ADMIN:
+        return {**user, "email": None}
+    return user
 
 
-async def delete_user(session: AsyncSession, user: User, current_user: User):
+async def delete_user(
+    session: AsyncSession, user: User, current_user: User
+) -> UserPurgeJob:
     if current_user.id != user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
-    await session.delete(user)
+    if user.username == DELETED_USERNAME:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="System user"
+        )
+    # Khóa tài khoản ngay (token cũ bị từ chối), dữ liệu con và dòng user được
+    # xóa dần trong job nền (services.user_purge)
+    user.status = UserStatus.INACTIVE
+    user.hashed_password = None
+    job = await create_purge_job(session, user.id, "delete", current_user.id)
     await session.commit()
+    principal_cache.invalidate(user.id)
+    forget_user_reads(user.username)
+    user_purge_task.wake()
+    return job
 
 
-async def anonymize_user(session: AsyncSession, user: User, current_user: User):
+async def anonymize_user(
+    session: AsyncSession, user: User, current_user: User
+) -> UserPurgeJob:
     if current_user.id != user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
+    if user.username == DELETED_USERNAME:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="System user"
+        )
+    # Thông tin trên dòng user xóa ngay; follow, thông báo, tiến độ đọc xóa
+    # trong job nền
+    username = user.username
     user.username = f"anonymous_{user.id}"
     user.email = None
     user.hashed_password = None
     user.status = UserStatus.ANONYMIZED
+    job = await create_purge_job(session, user.id, "anonymize", current_user.id)
     await session.commit()
-    await session.refresh(user)
-    return user
+    principal_cache.invalidate(user.id)
+    forget_user_reads(username)
+    user_purge_task.wake()
+    return job
@@ -0,0 +1,352 @@
+"""Xóa và ẩn danh user chạy nền, theo chunk, chạy tiếp được sau restart.
+
+Request chỉ khóa tài khoản (xóa) hoặc xóa thông tin cá nhân trên dòng user
+(ẩn danh) rồi tạo một dòng user_purge_jobs. Job xử lý dữ liệu con theo từng
+bước, mỗi chunk là một câu lệnh set-based trên tối đa PURGE_CHUNK_SIZE dòng
+và một transaction ngắn, cập nhật tiến độ trong cùng transaction:
+
+- follows, notifications, reading_progress: xóa
+- comments, donates (chỉ khi xóa): chuyển sang user hệ thống DELETED_USERNAME,
+  giữ nguyên thread bình luận và tổng donate của truyện/nhóm
+- donor_daily_totals (chỉ khi xóa): cộng vào dòng của user hệ thống rồi xóa,
+  để khớp với donates (rollup dựng lại từ donates cũng ra như vậy)
+- cuối cùng xóa dòng user (xóa) hoặc counter thông báo (ẩn danh)
+
+Mỗi bước chạy lại được nhiều lần mà không sai, nên job bị ngắt giữa chừng
+chỉ cần chạy lại từ bước đang ghi. Worker nhận job bằng lease; lease hết hạn
+(worker chết) thì worker khác nhận tiếp ở lần quét sau.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from background import Job, PeriodicTask, jobs
+from cache import principal_cache
+from database import AsyncSessionLocal
+from models import (
+    Comment,
+    Donate,
+    DonorDailyTotal,
+    Follow,
+    Notification,
+    NotificationCounter,
+    ReadingProgress,
+    User,
+    UserPurgeJob,
+    UserRole,
+    UserStatus,
+)
+
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "5000"))
+PURGE_LEASE_SECONDS = float(os.getenv("PURGE_LEASE_SECONDS", "60"))
+PURGE_POLL_SECONDS = float(os.getenv("PURGE_POLL_SECONDS", "30"))
+# Số job chạy cùng lúc trong một worker
+PURGE_CONCURRENCY = int(os.getenv("PURGE_CONCURRENCY", "2"))
+# User hệ thống nhận bình luận/donate của user bị xóa
+DELETED_USERNAME = "deleted_user"
+
+PURGE_STEPS = {
+    "delete": (
+        "follows",
+        "notifications",
+        "reading_progress",
+        "comments",
+        "donates",
+        "donor_totals",
+        "user",
+    ),
+    "anonymize": ("follows", "notifications", "reading_progress", "user"),
+}
+
+_deleted_user_id: int | None = None
+# id các job worker này đang chạy
+_running: set[int] = set()
+
+
+async def get_deleted_user_id() -> int:
+    global _deleted_user_id
+    if _deleted_user_id is None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                pg_insert(User)
+                .values(
+                    username=DELETED_USERNAME,
+                    role=UserRole.USER,
+                    status=UserStatus.ANONYMIZED,
+                )
+                .on_conflict_do_nothing(index_elements=[User.username])
+            )
+            row = (
+                await session.execute(
+                    select(User.id, User.hashed_password).where(
+                        User.username == DELETED_USERNAME
+                    )
+                )
+            ).one()
+            await session.commit()
+        if row.hashed_password is not None:
+            # Có người đăng ký trước tên này: không được chuyển dữ liệu sang họ
+            raise RuntimeError(f"username {DELETED_USERNAME!r} is a real account")
+        _deleted_user_id = row.id
+    return _deleted_user_id
+
+
+async def create_purge_job(
+    session: AsyncSession, user_id: int, action: str, requested_by: int
+) -> UserPurgeJob:
+    """Thêm job vào transaction của caller (cùng lúc với thay đổi trên dòng
+    user); caller commit rồi gọi user_purge_task.wake()."""
+    result = await session.execute(
+        pg_insert(UserPurgeJob)
+        .values(user_id=user_id, action=action, requested_by=requested_by)
+        .on_conflict_do_nothing(
+            index_elements=[UserPurgeJob.user_id],
+            index_where=UserPurgeJob.status.in_(("pending", "running")),
+        )
+        .returning(UserPurgeJob.id)
+    )
+    job_id = result.scalar_one_or_none()
+    if job_id is None:
+        # Đã có job đang chờ/chạy cho user này: trả lại job đó
+        job = await session.scalar(
+            select(UserPurgeJob).where(
+                UserPurgeJob.user_id == user_id,
+                UserPurgeJob.status.in_(("pending", "running")),
+            )
+        )
+        if job.action != action:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A {job.action} job is already running for this user",
+            )
+        return job
+    return await session.get(UserPurgeJob, job_id)
+
+
+async def get_purge_job(session: AsyncSession, job_id: int) -> UserPurgeJob | None:
+    return await session.get(UserPurgeJob, job_id)
+
+
+def _chunk_statement(step: str, user_id: int, deleted_user_id: int | None):
+    # Một câu lệnh xử lý tối đa PURGE_CHUNK_SIZE dòng của bước `step`;
+    # rowcount là số dòng đã xử lý
+    if step in ("follows", "notifications"):
+        model = Follow if step == "follows" else Notification
+        chunk = select(model.id).where(model.user_id == user_id).limit(PURGE_CHUNK_SIZE)
+        return delete(model).where(model.id.in_(chunk))
+    if step == "reading_progress":
+        chunk = (
+            select(ReadingProgress.story_id)
+            .where(ReadingProgress.user_id == user_id)
+            .limit(PURGE_CHUNK_SIZE)
+        )
+        return delete(ReadingProgress).where(
+            ReadingProgress.user_id == user_id, ReadingProgress.story_id.in_(chunk)
+        )
+    if step == "comments":
+        chunk = (
+            select(Comment.id).where(Comment.user_id == user_id).limit(PURGE_CHUNK_SIZE)
+        )
+        # Không tính là sửa bình luận: giữ updated_at
+        return (
+            update(Comment)
+            .where(Comment.id.in_(chunk))
+            .values(user_id=deleted_user_id, updated_at=Comment.updated_at)
+        )
+    if step == "donates":
+        chunk = (
+            select(Donate.id).where(Donate.user_id == user_id).limit(PURGE_CHUNK_SIZE)
+        )
+        return (
+            update(Donate).where(Donate.id.in_(chunk)).values(user_id=deleted_user_id)
+        )
+    if step == "donor_totals":
+        keys = (
+            DonorDailyTotal.scope,
+            DonorDailyTotal.scope_id,
+            DonorDailyTotal.day,
+            DonorDailyTotal.user_id,
+        )
+        chunk = select(*keys).where(DonorDailyTotal.user_id == user_id)
+        moved = (
+            delete(DonorDailyTotal)
+            .where(tuple_(*keys).in_(chunk.limit(PURGE_CHUNK_SIZE)))
+            .returning(*keys[:3], DonorDailyTotal.total, DonorDailyTotal.count)
+            .cte("moved")
+        )
+        # Cộng theo thứ tự khóa: hai job xóa chạy cùng lúc ghi vào cùng các
+        # dòng của user hệ thống theo cùng thứ tự, không deadlock
+        stmt = pg_insert(DonorDailyTotal).from_select(
+            ["scope", "scope_id", "day", "user_id", "total", "count"],
+            select(
+                moved.c.scope,
+                moved.c.scope_id,
+                moved.c.day,
+                literal(deleted_user_id),
+                moved.c.total,
+                moved.c.count,
+            ).order_by(moved.c.scope, moved.c.scope_id, moved.c.day),
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=["scope", "scope_id", "day", "user_id"],
+            set_={
+                "total": DonorDailyTotal.total + stmt.excluded.total,
+                "count": DonorDailyTotal.count + stmt.excluded.count,
+            },
+        ).add_cte(moved)
+    raise ValueError(step)
+
+
+def _touch(job_id: int, token: str, **values):
+    # Ghi tiến độ và gia hạn lease; không trả dòng nào nghĩa là job đã bị
+    # worker khác nhận (lease hết hạn), chunk vừa chạy phải rollback
+    values.setdefault(
+        "lease_until", func.now() + timedelta(seconds=PURGE_LEASE_SECONDS)
+    )
+    return (
+        update(UserPurgeJob)
+        .where(UserPurgeJob.id == job_id, UserPurgeJob.lease_token == token)
+        .values(**values)
+        .returning(UserPurgeJob.id)
+    )
+
+
+async def _finish_step(session: AsyncSession, purge, job_id: int, token: str) -> bool:
+    # Bước cuối, cùng transaction với đánh dấu job xong
+    await session.execute(
+        delete(NotificationCounter).where(NotificationCounter.user_id == purge.user_id)
+    )
+    if purge.action == "delete":
+        await session.execute(delete(User).where(User.id == purge.user_id))
+    result = await session.execute(
+        _touch(job_id, token, step="user", status="done", lease_until=None)
+    )
+    return result.first() is not None
+
+
+async def _run_purge(job: Job, purge) -> None:
+    steps = PURGE_STEPS[purge.action]
+    start = steps.index(purge.step) if purge.step in steps else 0
+    job.progress = purge.progress
+    try:
+        deleted_user_id = (
+            await get_deleted_user_id() if purge.action == "delete" else None
+        )
+        for step in steps[start:]:
+            if step == "user":
+                async with AsyncSessionLocal() as session:
+                    if not await _finish_step(session, purge, purge.id, purge.token):
+                        return
+                    await session.commit()
+                principal_cache.invalidate(purge.user_id)
+                return
+            while True:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        _chunk_statement(
+                            step, purge.user_id, deleted_user_id
+                        ).execution_options(synchronize_session=False)
+                    )
+                    count = result.rowcount
+                    touched = await session.execute(
+                        _touch(
+                            purge.id,
+                            purge.token,
+                            step=step,
+                            progress=UserPurgeJob.progress + count,
+                        )
+                    )
+                    if touched.first() is None:
+                        return
+                    await session.commit()
+                job.advance(count)
+                if count < PURGE_CHUNK_SIZE:
+                    break
+                await asyncio.sleep(0)
+    except asyncio.CancelledError:
+        # Worker tắt: chunk dở đã rollback, job chạy tiếp khi lease hết hạn
+        raise
+    except Exception as e:
+        # Lỗi không tự hết khi chạy lại (vd. dữ liệu sai): dừng job, yêu cầu
+        # xóa/ẩn danh lại sẽ tạo job mới
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                _touch(
+                    purge.id,
+                    purge.token,
+                    status="failed",
+                    detail=str(e),
+                    lease_until=None,
+                )
+            )
+            await session.commit()
+        raise
+    finally:
+        _running.discard(purge.id)
+        # Còn chỗ: nhận job đang chờ tiếp, không đợi tới lần quét sau
+        user_purge_task.wake()
+
+
+async def _claim_purge_job():
+    token = uuid.uuid4().hex
+    runnable = (
+        select(UserPurgeJob.id)
+        .where(
+            UserPurgeJob.status.in_(("pending", "running")),
+            or_(
+                UserPurgeJob.lease_until.is_(None),
+                UserPurgeJob.lease_until < func.now(),
+            ),
+        )
+        .order_by(UserPurgeJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(UserPurgeJob)
+            .where(UserPurgeJob.id == runnable)
+            .values(
+                status="running",
+                lease_token=token,
+                lease_until=func.now() + timedelta(seconds=PURGE_LEASE_SECONDS),
+            )
+            .returning(
+                UserPurgeJob.id,
+                UserPurgeJob.user_id,
+                UserPurgeJob.action,
+                UserPurgeJob.step,
+                UserPurgeJob.progress,
+                UserPurgeJob.requested_by,
+                UserPurgeJob.lease_token.label("token"),
+            )
+        )
+        purge = result.one_or_none()
+        await session.commit()
+    return purge
+
+
+async def run_user_purges() -> None:
+    # Nhận job chờ hoặc job có lease hết hạn (kể cả job đang chạy dở lúc
+    # worker trước tắt) tới khi đủ PURGE_CONCURRENCY job trong worker này
+    while len(_running) < PURGE_CONCURRENCY:
+        purge = await _claim_purge_job()
+        if purge is None:
+            return
+        _running.add(purge.id)
+        jobs.spawn(
+            "user_purge",
+            lambda job, purge=purge: _run_purge(job, purge),
+            owner_id=purge.requested_by,
+        )
+
+
+user_purge_task = PeriodicTask("user_purge", run_user_purges, PURGE_POLL_SECONDS)
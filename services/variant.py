@@ -0,0 +1,224 @@
+"""Tạo ảnh thu nhỏ (WebP theo VARIANT_WIDTHS) cho trang truyện.
+
+Decode/resize/encode tốn CPU nên chạy trong process pool dùng mọi core,
+không chặn upload hay event loop. Variant được tạo:
+- lazy: lần đầu có người xin ảnh theo chiều rộng (GET /media/...?w=),
+- eager: khi duyệt chương mới của truyện có người follow (job nền).
+Nhiều request cùng lúc cho cùng một ảnh chỉ tạo variant một lần.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import imaging
+from background import Job, jobs
+from cache import TTLCache
+from database import AsyncSessionLocal
+from models import ChapterPage, Follow, ImageVariant, Story
+from singleflight import SingleFlight
+from storage import blob_store
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 1)))
+# Quá số ảnh đang chờ xử lý thì request lazy trả ảnh gốc thay vì xếp hàng
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", "64"))
+VARIANT_WIDTHS = tuple(
+    sorted(
+        int(width) for width in os.getenv("VARIANT_WIDTHS", "240,720,1080").split(",")
+    )
+)
+VARIANT_QUALITY = int(os.getenv("VARIANT_QUALITY", "80"))
+
+# (hash gốc, width) -> (hash variant, content type), None nếu phục vụ ảnh gốc
+variant_cache = TTLCache(maxsize=50000, ttl=600)
+
+_MISS = object()
+
+
+class VariantUnavailable(Exception):
+    """Variant tạm thời chưa có (pool quá tải hoặc tạo lỗi): trả ảnh gốc
+    nhưng không được cache lâu, lần sau có thể đã có variant."""
+
+
+_image_executor: Optional[ProcessPoolExecutor] = None
+_image_pending = 0
+# Theo hash gốc: nhiều request cùng ảnh chỉ tạo variant một lần
+variant_flights = SingleFlight()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        # spawn thay vì fork: fork một process đang chạy event loop và các
+        # thread (DB, hasher) dễ kẹt lock trong process con
+        _image_executor = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _image_executor
+
+
+def shutdown_image_workers():
+    global _image_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
+
+
+def choose_width(requested: int) -> Optional[int]:
+    # Chiều rộng variant nhỏ nhất >= requested; None: dùng ảnh gốc
+    for width in VARIANT_WIDTHS:
+        if width >= requested:
+            return width
+    return None
+
+
+async def _generate(source_hash: str) -> dict[int, tuple[str, str]]:
+    global _image_pending
+    _image_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(
+            _executor(),
+            imaging.render_variants,
+            str(blob_store.path(source_hash)),
+            list(VARIANT_WIDTHS),
+            VARIANT_QUALITY,
+        )
+    except BrokenProcessPool:
+        # Process con chết (vd bị OOM kill với ảnh quá lớn): bỏ pool hỏng,
+        # lần sau tạo pool mới
+        shutdown_image_workers()
+        raise
+    finally:
+        _image_pending -= 1
+    rows = []
+    for width, height, data in rendered:
+        blob_hash, _ = await blob_store.put(data)
+        rows.append(
+            {
+                "source_hash": source_hash,
+                "width": width,
+                "height": height,
+                "blob_hash": blob_hash,
+                "content_type": imaging.VARIANT_CONTENT_TYPE,
+                "size": len(data),
+            }
+        )
+    if rows:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                pg_insert(ImageVariant).values(rows).on_conflict_do_nothing()
+            )
+            await session.commit()
+    return {row["width"]: (row["blob_hash"], row["content_type"]) for row in rows}
+
+
+async def ensure_variants(source_hash: str) -> dict[int, tuple[str, str]]:
+    return await variant_flights.do(source_hash, lambda: _generate(source_hash))
+
+
+async def get_variant(
+    session: AsyncSession, source_hash: str, requested_width: int
+) -> Optional[tuple[str, str]]:
+    """(hash, content type) của variant gần nhất >= requested_width, hoặc None
+    nếu luôn dùng ảnh gốc (ảnh đã nhỏ hơn). VariantUnavailable nếu pool đang
+    quá tải hoặc tạo variant lỗi."""
+    width = choose_width(requested_width)
+    if width is None:
+        return None
+    key = (source_hash, width)
+    cached = variant_cache.get(key, _MISS)
+    if cached is not _MISS:
+        return cached
+    result = await session.execute(
+        select(ImageVariant.blob_hash, ImageVariant.content_type).where(
+            ImageVariant.source_hash == source_hash, ImageVariant.width == width
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        original_width = await session.scalar(
+            select(ChapterPage.width)
+            .where(ChapterPage.blob_hash == source_hash)
+            .limit(1)
+        )
+        if original_width is None or width >= original_width:
+            # Không phải trang truyện, hoặc ảnh gốc đã đủ nhỏ
+            variant_cache.set(key, None)
+            return None
+        if source_hash not in variant_flights and _image_pending >= IMAGE_MAX_PENDING:
+            raise VariantUnavailable(source_hash)
+        try:
+            variant = (await ensure_variants(source_hash)).get(width)
+        except Exception as e:
+            # Ảnh gốc vẫn phục vụ được; lần sau sẽ thử tạo lại
+            logger.exception("generating variants for %s failed", source_hash)
+            raise VariantUnavailable(source_hash) from e
+    else:
+        variant = (row.blob_hash, row.content_type)
+    variant_cache.set(key, variant)
+    return variant
+
+
+async def generate_chapter_variants(job: Job, *chapter_ids: int) -> None:
+    # Tạo trước variant cho các trang chưa có, tối đa IMAGE_WORKERS ảnh cùng lúc
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ChapterPage.blob_hash)
+            .where(
+                ChapterPage.chapter_id.in_(chapter_ids),
+                ~exists().where(ImageVariant.source_hash == ChapterPage.blob_hash),
+            )
+            .distinct()
+        )
+        hashes = list(result.scalars().all())
+    job.total = len(hashes)
+    semaphore = asyncio.Semaphore(IMAGE_WORKERS)
+
+    async def run(source_hash: str):
+        async with semaphore:
+            await ensure_variants(source_hash)
+            job.advance(1)
+
+    await asyncio.gather(*(run(source_hash) for source_hash in hashes))
+
+
+async def schedule_chapter_variants(
+    session: AsyncSession, story_id: int, chapter_id: int, owner_id: int
+) -> Optional[Job]:
+    return await schedule_chapters_variants(session, [(story_id, chapter_id)], owner_id)
+
+
+async def schedule_chapters_variants(
+    session: AsyncSession, chapters: list[tuple[int, int]], owner_id: int
+) -> Optional[Job]:
+    # chapters: các cặp (story_id, chapter_id). Chỉ tạo trước cho truyện có
+    # người follow (một query cho cả lô), chương ít người đọc để lazy
+    story_ids = {story_id for story_id, _ in chapters}
+    # EXISTS dừng ở follower đầu tiên, không đọc hết follower của truyện
+    result = await session.execute(
+        select(Story.id).where(
+            Story.id.in_(story_ids), exists().where(Follow.story_id == Story.id)
+        )
+    )
+    followed = set(result.scalars().all())
+    chapter_ids = [
+        chapter_id for story_id, chapter_id in chapters if story_id in followed
+    ]
+    if not chapter_ids:
+        return None
+    return jobs.spawn(
+        "chapter_variants",
+        lambda job: generate_chapter_variants(job, *chapter_ids),
+        owner_id=owner_id,
+    )
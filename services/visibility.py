@@ -0,0 +1,62 @@
+"""Ai được xem truyện/chương chưa duyệt.
+
+Nội dung công khai chỉ gồm truyện đã duyệt và chương đã duyệt của truyện đã
+duyệt. Admin xem được tất cả; thành viên nhóm dịch xem được truyện của nhóm
+(group_story) và chương nhóm đăng, để kiểm tra trước khi được duyệt.
+
+Các hàm trả điều kiện SQL (EXISTS tương quan theo cột id truyền vào) để gắn
+thẳng vào query đọc, không tốn thêm query.
+"""
+
+from sqlalchemy import and_, exists, or_, true
+from sqlalchemy.orm import aliased
+
+from models import ApproveStatus, Chapter, GroupStory, Story, User, UserRole, status_is
+
+
+def can_view_unapproved(current_user: User | None, group_ids) -> bool:
+    # Kiểm tra trong Python khi đã có sẵn danh sách nhóm của truyện
+    if current_user is None:
+        return False
+    if current_user.role == UserRole.ADMIN:
+        return True
+    return current_user.group_id is not None and current_user.group_id in group_ids
+
+
+def _in_story_groups(story_id, current_user: User):
+    return exists().where(
+        GroupStory.story_id == story_id,
+        GroupStory.group_id == current_user.group_id,
+    )
+
+
+def story_visible(story_id, current_user: User | None):
+    """Điều kiện: truyện `story_id` (cột hoặc giá trị) xem được."""
+    if current_user is not None and current_user.role == UserRole.ADMIN:
+        return true()
+    story = aliased(Story)
+    public = exists().where(
+        story.id == story_id, status_is(story.status, ApproveStatus.APPROVED)
+    )
+    if current_user is None or current_user.group_id is None:
+        return public
+    return or_(public, _in_story_groups(story_id, current_user))
+
+
+def chapter_visible(chapter_id, current_user: User | None):
+    """Điều kiện: chương `chapter_id` (cột hoặc giá trị) xem được."""
+    if current_user is not None and current_user.role == UserRole.ADMIN:
+        return true()
+    chapter = aliased(Chapter)
+    story = aliased(Story)
+    rule = and_(
+        status_is(chapter.status, ApproveStatus.APPROVED),
+        status_is(story.status, ApproveStatus.APPROVED),
+    )
+    if current_user is not None and current_user.group_id is not None:
+        rule = or_(
+            rule,
+            chapter.group_id == current_user.group_id,
+            _in_story_groups(chapter.story_id, current_user),
+        )
+    return exists().where(chapter.id == chapter_id, story.id == chapter.story_id, rule)
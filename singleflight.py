@@ -0,0 +1,90 @@
+"""Gộp các lần tải trùng key đang chạy đồng thời (single-flight).
+
+Khi hàng trăm request cùng cần một key (truyện vừa ra chương mới), chỉ
+request đầu chạy hàm tải; các request sau chờ chung kết quả đó, lỗi cũng
+được trả cho tất cả. Có thể giữ kết quả thêm một TTL ngắn (micro-TTL) để
+đợt request ngay sau cũng không chạm DB. Phạm vi là một worker.
+
+Kết quả được chia sẻ giữa các request: caller không được sửa tại chỗ
+(copy trước nếu cần). Hàm tải không nên dùng session của request gọi nó,
+vì request đó có thể kết thúc trước khi các request khác nhận kết quả.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from cache import TTLCache
+
+_MISS = object()
+
+
+class SingleFlight:
+    def __init__(self, ttl: float = 0, maxsize: int = 10000):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if ttl > 0 else None
+        # Tăng mỗi lần forget: kết quả đang tải dở có thể đã cũ, không cache
+        self._generation = 0
+        self.loads = 0
+        self.shared = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        # Key đang được tải
+        return key in self._inflight
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self._cache is not None:
+            value = self._cache.get(key, _MISS)
+            if value is not _MISS:
+                return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        # shield: request đầu bị hủy (client ngắt) không hủy lần tải mà các
+        # request khác đang chờ
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        self.loads += 1
+        generation = self._generation
+        value = await load()
+        if self._cache is not None and generation == self._generation:
+            self._cache.set(key, value)
+        return value
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mọi caller đã bị hủy thì không ai lấy lỗi; lấy ở đây để asyncio
+        # không log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, *keys: Hashable) -> None:
+        # Gọi sau khi ghi: request sau tải lại thay vì nhận kết quả cũ
+        self._generation += 1
+        for key in keys:
+            self._inflight.pop(key, None)
+        if self._cache is not None:
+            self._cache.invalidate(*keys)
+
+    def forget_if(self, predicate: Callable[[Hashable], bool]) -> None:
+        self._generation += 1
+        for key in [key for key in self._inflight if predicate(key)]:
+            del self._inflight[key]
+        if self._cache is not None:
+            self._cache.invalidate_if(lambda key, _: predicate(key))
+
+    def stats(self) -> dict:
+        # Cho metrics.register_cache: hits là số lần không phải tự tải (trúng
+        # micro-TTL hoặc chờ chung lần tải đang chạy), misses là số lần tải
+        cache_stats = self._cache.stats() if self._cache is not None else {}
+        return {
+            "size": cache_stats.get("size", 0) + len(self._inflight),
+            "hits": cache_stats.get("hits", 0) + self.shared,
+            "misses": self.loads,
+            "evictions": cache_stats.get("evictions", 0),
+        }
@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+# Content type ảnh được phục vụ -> đuôi file trong URL /media/<hash>.<đuôi>
+MEDIA_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+MEDIA_TYPES = {ext: content_type for content_type, ext in MEDIA_EXTENSIONS.items()}
+
+
+def media_url(digest: str, content_type: str) -> str:
+    return f"/media/{digest}.{MEDIA_EXTENSIONS[content_type]}"
+
+
+class BlobStore:
+    """Lưu file theo sha256 của nội dung (content-addressed) trên đĩa local.
+
+    Cùng nội dung thì cùng đường dẫn nên upload trùng không tốn thêm chỗ, và
+    file không bao giờ bị ghi đè: URL theo hash có thể cache vĩnh viễn.
+    Blob nằm ở <root>/<2 ký tự đầu>/<2 ký tự kế>/<hash> để mỗi thư mục
+    không có quá nhiều file.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def _store(self, data: bytes) -> tuple[str, bool]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.is_file():
+            return digest, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Ghi ra file tạm cùng thư mục rồi rename: người đọc không bao giờ
+        # thấy file ghi dở, hai request ghi cùng blob cũng không hỏng nhau
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return digest, True
+
+    async def put(self, data: bytes) -> tuple[str, bool]:
+        # Trả về (hash, có ghi file mới hay không); hash và I/O đĩa chạy trong
+        # thread để không chặn event loop
+        return await asyncio.to_thread(self._store, data)
+
+
+blob_store = BlobStore(MEDIA_ROOT)
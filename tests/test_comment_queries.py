@@ -0,0 +1,119 @@
+"""Số query của một trang bình luận không phụ thuộc số bình luận.
+
+Cần một database Postgres riêng cho test (bảng bị drop/tạo lại):
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/mangaread_test \
+        python -m pytest tests
+"""
+
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from metrics import RequestQueryStats, _request_stats, instrument_engine
+from models import ApproveStatus, Base, Chapter, Comment, Group, Story, User
+from services.comment import list_comments, list_replies
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"),
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+async def _story_with_comments(session: AsyncSession, count: int):
+    # Mỗi bình luận một tác giả khác nhau: tác giả phải nạp theo lô, không
+    # phải mỗi bình luận một query
+    group = Group(name=f"group-{count}")
+    story = Story(title=f"story-{count}", status=ApproveStatus.APPROVED)
+    session.add_all([group, story])
+    await session.flush()
+    chapter = Chapter(
+        story_id=story.id, group_id=group.id, number=1, status=ApproveStatus.APPROVED
+    )
+    users = [User(username=f"user-{count}-{i}") for i in range(count)]
+    session.add(chapter)
+    session.add_all(users)
+    await session.flush()
+    comments = [
+        Comment(user_id=user.id, story_id=story.id, chapter_id=chapter.id, content="x")
+        for user in users
+    ]
+    session.add_all(comments)
+    await session.flush()
+    session.add_all(
+        Comment(
+            user_id=user.id,
+            story_id=story.id,
+            chapter_id=chapter.id,
+            parent_id=comments[0].id,
+            content="y",
+        )
+        for user in users
+    )
+    await session.commit()
+    session.expunge_all()
+    return chapter, comments[0]
+
+
+async def _count_queries(call) -> tuple[int, list]:
+    stats = RequestQueryStats()
+    token = _request_stats.set(stats)
+    try:
+        items, _ = await call()
+    finally:
+        _request_stats.reset(token)
+    return stats.count, items
+
+
+async def test_comment_page_query_count_is_constant(session):
+    small_chapter, _ = await _story_with_comments(session, 1)
+    large_chapter, _ = await _story_with_comments(session, 20)
+
+    small, small_items = await _count_queries(
+        lambda: list_comments(session, "chapter", small_chapter.id)
+    )
+    large, large_items = await _count_queries(
+        lambda: list_comments(session, "chapter", large_chapter.id)
+    )
+
+    assert (len(small_items), len(large_items)) == (1, 20)
+    # Một query cho trang, một query selectin cho tác giả
+    assert small == large == 2
+    assert {comment.user.username for comment in large_items} == {
+        f"user-20-{i}" for i in range(20)
+    }
+
+
+async def test_reply_page_query_count_is_constant(session):
+    _, small_root = await _story_with_comments(session, 1)
+    _, large_root = await _story_with_comments(session, 20)
+
+    small, small_items = await _count_queries(
+        lambda: list_replies(session, small_root.id)
+    )
+    large, large_items = await _count_queries(
+        lambda: list_replies(session, large_root.id)
+    )
+
+    assert (len(small_items), len(large_items)) == (1, 20)
+    assert small == large == 2
@@ -0,0 +1,139 @@
+"""Stream SSE thông báo: NOTIFY tới đúng user, Last-Event-ID đọc tiếp phần
+bị lỡ, giới hạn số stream.
+
+Cần một database Postgres riêng cho test (bảng bị drop/tạo lại):
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/mangaread_test \
+        python -m pytest tests
+"""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import services.notification_stream as notification_stream
+from models import Base, User
+from services.notification import create_notification
+from services.notification_stream import NotificationHub
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"),
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session_factory(monkeypatch):
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # Hub đọc và LISTEN trên database test
+    monkeypatch.setattr(notification_stream, "DATABASE_URL", TEST_DATABASE_URL)
+    monkeypatch.setattr(notification_stream, "AsyncSessionLocal", factory)
+    yield factory
+    await engine.dispose()
+
+
+@pytest.fixture
+async def hub(session_factory):
+    hub = NotificationHub()
+    await hub.start()
+    yield hub
+    await hub.stop()
+
+
+async def _users(session_factory, *usernames) -> list[int]:
+    async with session_factory() as session:
+        users = [User(username=username) for username in usernames]
+        session.add_all(users)
+        await session.commit()
+        return [user.id for user in users]
+
+
+async def _notify(session_factory, user_id: int, content: str) -> int:
+    async with session_factory() as session:
+        notification = await create_notification(session, user_id, content)
+        await session.commit()
+        return notification.id
+
+
+async def _wait_until(predicate, timeout: float = 5):
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+async def test_notify_reaches_only_the_target_user(hub, session_factory):
+    alice, bob = await _users(session_factory, "alice", "bob")
+    alice_stream = hub.stream(alice, None)
+    bob_stream = hub.stream(bob, None)
+    assert (await anext(alice_stream)).startswith("retry:")
+    assert (await anext(bob_stream)).startswith("retry:")
+    alice_next = asyncio.create_task(anext(alice_stream))
+    bob_next = asyncio.create_task(anext(bob_stream))
+    # Đợi hub lấy xong id mới nhất của cả hai stream
+    await _wait_until(
+        lambda: all(
+            subscriber.last_id is not None
+            for subscribers in hub._subscribers.values()
+            for subscriber in subscribers
+        )
+    )
+
+    notification_id = await _notify(session_factory, alice, "chương mới")
+
+    event = await asyncio.wait_for(alice_next, 5)
+    assert event.startswith(f"id: {notification_id}\nevent: notification\n")
+    assert "chương mới" in event
+    await asyncio.sleep(0.2)
+    assert not bob_next.done()
+
+    bob_next.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await bob_next
+    await alice_stream.aclose()
+    await bob_stream.aclose()
+    assert hub.connections == 0
+
+
+async def test_last_event_id_resumes_missed_notifications(hub, session_factory):
+    (alice,) = await _users(session_factory, "alice")
+    ids = [await _notify(session_factory, alice, f"n{i}") for i in range(3)]
+
+    stream = hub.stream(alice, ids[0])
+    await anext(stream)
+    events = [await asyncio.wait_for(anext(stream), 5) for _ in ids[1:]]
+
+    assert [event.split("\n", 1)[0] for event in events] == [
+        f"id: {notification_id}" for notification_id in ids[1:]
+    ]
+    await stream.aclose()
+
+
+async def test_stream_limit_is_enforced_on_subscribe(hub, session_factory, monkeypatch):
+    (alice,) = await _users(session_factory, "alice")
+    monkeypatch.setattr(notification_stream, "SSE_MAX_CONNECTIONS", 1)
+    first = hub.stream(alice, None)
+    second = hub.stream(alice, None)
+    await anext(first)
+
+    # Stream thứ hai chỉ nhận retry rồi đóng, không được tính vào số stream
+    assert (await anext(second)).startswith("retry:")
+    with pytest.raises(StopAsyncIteration):
+        await anext(second)
+    assert hub.connections == 1
+
+    await first.aclose()
+    assert hub.connections == 0